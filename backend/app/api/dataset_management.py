@@ -1,9 +1,15 @@
 import os
-from typing import List
+from typing import List, Optional, Tuple
 from fastapi import Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from ..database import get_db
+from ..dataset.ds_util import (
+    DatasetProfiler,
+    convert_ds_to_parquet,
+    get_ds_column_types,
+    get_ds_row_count,
+)
 from ..models.dataset_model import DatasetModel
 from ..models.run_model import RunModel
 from ..schemas.dataset_schemas import DatasetResponseSchema
@@ -14,42 +20,122 @@ from fastapi import APIRouter
 router = APIRouter()
 
 
-def save_file(file: UploadFile) -> str:
+# Bytes of the uploaded file held in memory at a time
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+def reserve_file_location(file_location: str) -> str:
+    """
+    Create an empty file at file_location, or at the first free
+    "<stem>_<n><extension>" variant of it, and return its path. The file is
+    created exclusively, concurrent uploads never reserve the same path.
+    """
+    stem, extension = os.path.splitext(file_location)
+    suffix = 0
+    while True:
+        try:
+            with open(file_location, "xb"):
+                return file_location
+        except FileExistsError:
+            suffix += 1
+            file_location = f"{stem}_{suffix}{extension}"
+
+
+def save_file(file: UploadFile) -> Tuple[str, Optional[DatasetProfiler]]:
+    """
+    Stream the uploaded file to the datasets directory, UPLOAD_CHUNK_BYTES at a
+    time. CSV and JSONL files are profiled as they are written.
+    Files are never overwritten, the file of another dataset may have the same name.
+    """
     filename = file.filename
     assert filename is not None
-    file_location = os.path.join(
-        os.path.dirname(__file__), "..", "..", "datasets", filename
+    filename = os.path.basename(filename)
+    datasets_dir = os.path.join(os.path.dirname(__file__), "..", "..", "datasets")
+    os.makedirs(datasets_dir, exist_ok=True)
+    extension = os.path.splitext(filename)[1]
+    file_location = reserve_file_location(os.path.join(datasets_dir, filename))
+
+    profiler = None if extension == ".parquet" else DatasetProfiler(filename)
+    with open(file_location, "wb") as file_object:
+        while block := file.file.read(UPLOAD_CHUNK_BYTES):
+            file_object.write(block)
+            if profiler is not None:
+                profiler.update(block)
+    if profiler is not None:
+        profiler.finish()
+    return file_location, profiler
+
+
+def dataset_to_response(dataset: DatasetModel) -> DatasetResponseSchema:
+    return DatasetResponseSchema(
+        id=dataset.id,
+        name=dataset.name,
+        description=dataset.description,
+        filename=dataset.file_path,
+        created_at=dataset.uploaded_at,
+        updated_at=dataset.uploaded_at,
+        file_size=dataset.file_size,
+        row_count=dataset.row_count,
+        column_types=dataset.column_types,
     )
-    with open(file_location, "wb+") as file_object:
-        file_object.write(file.file.read())
-    return file_location
 
 
 @router.post("/", description="Upload a new dataset")
 def upload_dataset(
     name: str,
     description: str = "",
+    convert_to_parquet: bool = False,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
 ) -> DatasetResponseSchema:
-    file_location = save_file(file)
+    if not (file.filename or "").endswith((".csv", ".parquet", ".jsonl")):
+        raise HTTPException(
+            status_code=400, detail="Dataset files must be CSV, JSONL or Parquet files"
+        )
+    if db.query(DatasetModel).filter(DatasetModel.name == name).first():
+        raise HTTPException(status_code=400, detail="Dataset name already exists")
+
+    from pyarrow import ArrowException
+
+    file_location, profiler = save_file(file)
+    parquet_location: Optional[str] = None
+    try:
+        if convert_to_parquet and profiler is not None:
+            # Reserved before the conversion replaces it
+            parquet_location = reserve_file_location(
+                os.path.splitext(file_location)[0] + ".parquet"
+            )
+            convert_ds_to_parquet(file_location, parquet_location)
+            os.remove(file_location)
+            file_location, profiler = parquet_location, None
+        # Also checks that the file can be parsed
+        column_types = get_ds_column_types(file_location)
+    except (ArrowException, ValueError, TypeError) as e:
+        # pandas and pyarrow parsing errors, e.g. malformed rows or column types
+        # that cannot be converted to Parquet
+        os.remove(file_location)
+        if parquet_location is not None and os.path.exists(parquet_location):
+            os.remove(parquet_location)
+        raise HTTPException(status_code=400, detail=f"Invalid dataset file: {e}")
+
     new_dataset = DatasetModel(
         name=name,
         description=description,
         file_path=file_location,
         uploaded_at=datetime.now(timezone.utc),
+        file_size=os.path.getsize(file_location),
+        row_count=(
+            profiler.row_count
+            if profiler is not None
+            else get_ds_row_count(file_location)
+        ),
+        column_types=column_types,
+        row_offsets=profiler.index if profiler is not None else None,
     )
     db.add(new_dataset)
     db.commit()
     db.refresh(new_dataset)
-    return DatasetResponseSchema(
-        id=new_dataset.id,
-        name=new_dataset.name,
-        description=new_dataset.description,
-        filename=new_dataset.file_path,
-        created_at=new_dataset.uploaded_at,
-        updated_at=new_dataset.uploaded_at,
-    )
+    return dataset_to_response(new_dataset)
 
 
 @router.get(
@@ -57,17 +143,7 @@ def upload_dataset(
 )
 def list_datasets(db: Session = Depends(get_db)) -> List[DatasetResponseSchema]:
     datasets = db.query(DatasetModel).all()
-    dataset_list = [
-        DatasetResponseSchema(
-            id=ds.id,
-            name=ds.name,
-            description=ds.description,
-            filename=ds.file_path,
-            created_at=ds.uploaded_at,
-            updated_at=ds.uploaded_at,
-        )
-        for ds in datasets
-    ]
+    dataset_list = [dataset_to_response(ds) for ds in datasets]
     return dataset_list
 
 
@@ -82,14 +158,7 @@ def get_dataset(
     dataset = db.query(DatasetModel).filter(DatasetModel.id == dataset_id).first()
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
-    return DatasetResponseSchema(
-        id=dataset.id,
-        name=dataset.name,
-        description=dataset.description,
-        filename=dataset.file_path,
-        created_at=dataset.uploaded_at,
-        updated_at=dataset.uploaded_at,
-    )
+    return dataset_to_response(dataset)
 
 
 @router.delete(
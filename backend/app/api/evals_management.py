@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime, timezone
 
 from ..database import get_db
+from ..jobs.queue import get_job_queue
 from ..models.workflow_model import WorkflowModel
 from ..evals.evaluator import prepare_and_evaluate_dataset, load_yaml_config
 from ..schemas.workflow_schemas import WorkflowDefinitionSchema
@@ -53,7 +54,6 @@ def list_evals() -> List[Dict[str, Any]]:
 )
 async def launch_eval(
     request: EvalRunRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ) -> EvalRunResponse:
     """
@@ -66,15 +66,13 @@ async def launch_eval(
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
 
-    workflow_definition = WorkflowDefinitionSchema.model_validate(workflow.definition)
-
     eval_file = EVALS_DIR / f"{request.eval_name}.yaml"
     if not eval_file.exists():
         raise HTTPException(status_code=404, detail="Eval configuration not found")
 
     try:
-        # Load the eval configuration
-        eval_config = load_yaml_config(eval_file)
+        # Check that the eval configuration can be loaded, the worker loads it again
+        load_yaml_config(eval_file)
 
         # Validate the output variable
         leaf_node_output_variables = get_workflow_output_variables(
@@ -110,40 +108,9 @@ async def launch_eval(
         db.commit()
         db.refresh(new_eval_run)
 
-        async def run_eval_task(eval_run_id: str):
-            with next(get_db()) as session:
-                eval_run = (
-                    session.query(EvalRunModel)
-                    .filter(EvalRunModel.id == eval_run_id)
-                    .first()
-                )
-                if not eval_run:
-                    session.close()
-                    return
-
-                eval_run.status = EvalRunStatus.RUNNING
-                session.commit()
-
-                try:
-                    # Run the evaluation asynchronously
-                    results = await prepare_and_evaluate_dataset(
-                        eval_config,
-                        workflow_definition=workflow_definition,
-                        num_samples=eval_run.num_samples,
-                        output_variable=eval_run.output_variable,
-                    )
-                    eval_run.results = results
-                    eval_run.status = EvalRunStatus.COMPLETED
-                    eval_run.end_time = datetime.now(timezone.utc)
-                except Exception as e:
-                    eval_run.status = EvalRunStatus.FAILED
-                    eval_run.end_time = datetime.now(timezone.utc)
-                    session.commit()
-                    raise e
-                finally:
-                    session.commit()
-
-        background_tasks.add_task(run_eval_task, new_eval_run.id)
+        get_job_queue().enqueue(
+            "eval_run", {"eval_run_id": new_eval_run.id}, resource_id=new_eval_run.id
+        )
 
         # Return all required parameters
         return EvalRunResponse(
@@ -158,6 +125,53 @@ async def launch_eval(
         raise HTTPException(status_code=500, detail=f"Error launching eval: {e}")
 
 
+async def execute_eval_run(eval_run_id: str) -> None:
+    """Run an eval launched by launch_eval, handler of eval_run jobs"""
+    with next(get_db()) as session:
+        eval_run = (
+            session.query(EvalRunModel).filter(EvalRunModel.id == eval_run_id).first()
+        )
+        if not eval_run:
+            session.close()
+            return
+        workflow = (
+            session.query(WorkflowModel)
+            .filter(WorkflowModel.id == eval_run.workflow_id)
+            .first()
+        )
+        if not workflow:
+            eval_run.status = EvalRunStatus.FAILED
+            eval_run.end_time = datetime.now(timezone.utc)
+            session.commit()
+            return
+        workflow_definition = WorkflowDefinitionSchema.model_validate(
+            workflow.definition
+        )
+        eval_config = load_yaml_config(EVALS_DIR / f"{eval_run.eval_name}.yaml")
+
+        eval_run.status = EvalRunStatus.RUNNING
+        session.commit()
+
+        try:
+            # Run the evaluation asynchronously
+            results = await prepare_and_evaluate_dataset(
+                eval_config,
+                workflow_definition=workflow_definition,
+                num_samples=eval_run.num_samples,
+                output_variable=eval_run.output_variable,
+            )
+            eval_run.results = results
+            eval_run.status = EvalRunStatus.COMPLETED
+            eval_run.end_time = datetime.now(timezone.utc)
+        except Exception as e:
+            eval_run.status = EvalRunStatus.FAILED
+            eval_run.end_time = datetime.now(timezone.utc)
+            session.commit()
+            raise e
+        finally:
+            session.commit()
+
+
 @router.get(
     "/runs/{eval_run_id}",
     response_model=EvalRunResponse,
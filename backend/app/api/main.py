@@ -1,3 +1,6 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,13 +20,29 @@ from .evals_management import router as evals_management_router
 from ..integrations.google.auth import router as google_auth_router
 from .rag_management import router as rag_management_router
 from .file_management import router as file_management_router
+from ..jobs.handlers import get_job_handlers
+from ..jobs.queue import get_job_queue
+from ..jobs.worker import JobWorker
 
 
 load_dotenv()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Without separate worker processes (python -m app.jobs.worker),
+    # the jobs of the queue can be run by the API process itself
+    if os.getenv("JOB_WORKER_EMBEDDED", "false").lower() != "true":
+        yield
+        return
+    worker = JobWorker(get_job_queue(), get_job_handlers())
+    worker_task = asyncio.create_task(worker.run())
+    yield
+    worker.stop()
+    await worker_task
 
-app = FastAPI(root_path="/api")
+
+app = FastAPI(root_path="/api", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
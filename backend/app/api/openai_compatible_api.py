@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 
 from ..models.workflow_model import WorkflowModel
 from ..database import get_db
+from ..execution.usage_tracker import track_llm_usage
 from .workflow_run import run_workflow_blocking
 from ..schemas.run_schemas import StartRunRequestSchema
 
@@ -78,12 +79,14 @@ async def chat_completions(
         initial_inputs=initial_inputs,
         parent_run_id=None,
     )
-    outputs = await run_workflow_blocking(
-        workflow_id=request.model,
-        request=start_run_request,
-        db=db,
-        run_type="openai",
-    )
+    with track_llm_usage() as usage_tracker:
+        outputs = await run_workflow_blocking(
+            workflow_id=request.model,
+            request=start_run_request,
+            db=db,
+            run_type="openai",
+        )
+    usage = usage_tracker.usage
 
     # Format the response with outputs from the workflow
     response = ChatCompletionResponse(
@@ -102,9 +105,9 @@ async def chat_completions(
             }
         ],
         usage={
-            "prompt_tokens": outputs.get("prompt_tokens", 0),
-            "completion_tokens": outputs.get("completion_tokens", 0),
-            "total_tokens": outputs.get("total_tokens", 0),
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
         },
     )
     return response
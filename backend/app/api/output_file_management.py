@@ -1,8 +1,10 @@
-from typing import List
-from fastapi import Depends, HTTPException
+import os
+from typing import List, Optional
+from fastapi import Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from ..database import get_db
+from ..dataset.output_writer import OutputFormat, convert_jsonl_to_parquet
 from ..models.output_file_model import OutputFileModel
 from ..schemas.output_file_schemas import OutputFileResponseSchema
 
@@ -69,32 +71,62 @@ def delete_output_file(output_file_id: str, db: Session = Depends(get_db)):
 # download_output_file endpoint
 @router.get(
     "/{output_file_id}/download/",
-    description="Download an output file by ID",
+    description="Download an output file by ID, JSONL files can be downloaded as Parquet",
 )
-def download_output_file(output_file_id: str, db: Session = Depends(get_db)):
+def download_output_file(
+    output_file_id: str,
+    format: Optional[OutputFormat] = Query(default=None),
+    db: Session = Depends(get_db),
+):
     output_file = (
         db.query(OutputFileModel).filter(OutputFileModel.id == output_file_id).first()
     )
     if not output_file:
         raise HTTPException(status_code=404, detail="Output file not found")
 
+    file_path = output_file.file_path
+    file_name = output_file.file_name
+    if format is not None and not file_name.endswith(f".{format.value}"):
+        if format != OutputFormat.PARQUET or not file_name.endswith(".jsonl"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Output file cannot be downloaded as {format.value}",
+            )
+        # The Parquet file is converted once and kept next to the JSONL file
+        file_path = file_path[: -len(".jsonl")] + ".parquet"
+        file_name = file_name[: -len(".jsonl")] + ".parquet"
+        if not os.path.exists(file_path) or os.path.getmtime(
+            file_path
+        ) < os.path.getmtime(output_file.file_path):
+            from pyarrow import ArrowException
+
+            try:
+                convert_jsonl_to_parquet(output_file.file_path, file_path)
+            except (ArrowException, TypeError, ValueError) as e:
+                # pyarrow errors, e.g. a field that is a string in some rows and a
+                # number in others, or empty objects that Parquet cannot store
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Output file cannot be converted to Parquet: {e}",
+                )
+
     # get the appropriate media type based on the file extension
     media_type = "application/octet-stream"
-    if output_file.file_name.endswith(".csv"):
+    if file_name.endswith(".csv"):
         media_type = "text/csv"
-    elif output_file.file_name.endswith(".json"):
+    elif file_name.endswith(".json"):
         media_type = "application/json"
-    elif output_file.file_name.endswith(".txt"):
+    elif file_name.endswith(".txt"):
         media_type = "text/plain"
-    elif output_file.file_name.endswith(".jsonl"):
+    elif file_name.endswith(".jsonl"):
         media_type = "application/x-ndjson"
+    elif file_name.endswith(".parquet"):
+        media_type = "application/vnd.apache.parquet"
 
     return FileResponse(
-        output_file.file_path,
+        file_path,
         media_type=media_type,
-        filename=output_file.file_name,
-        headers={
-            "Content-Disposition": f"attachment; filename={output_file.file_name}"
-        },
+        filename=file_name,
+        headers={"Content-Disposition": f"attachment; filename={file_name}"},
         content_disposition_type="attachment",
     )
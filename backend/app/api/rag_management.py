@@ -2,7 +2,6 @@ from fastapi import (
     APIRouter,
     UploadFile,
     HTTPException,
-    BackgroundTasks,
     File,
     Form,
     Depends,
@@ -21,6 +20,7 @@ from ..models.dc_and_vi_model import (
     DocumentStatus,
 )
 from ..database import get_db
+from ..jobs.queue import get_job_queue
 from ..rag.document_collection import DocumentStore
 from ..rag.vector_index import VectorIndex
 from ..rag.schemas.document_schemas import (
@@ -276,12 +276,35 @@ async def process_document_collection(
         )
 
 
+async def execute_document_collection_processing(
+    collection_id: str, file_infos: List[Dict[str, Any]], config: Dict[str, Any]
+) -> None:
+    """Parse and chunk the files added to a collection, handler of document_collection jobs"""
+    with next(get_db()) as session:
+        await process_document_collection(collection_id, file_infos, config, session)
+
+
+async def execute_vector_index_creation(
+    index_id: str, collection_id: str, config: Dict[str, Any]
+) -> None:
+    """Embed the chunks of a collection into an index, handler of vector_index jobs"""
+    # Get documents with chunks
+    doc_store = DocumentStore(collection_id)
+    docs_with_chunks: List[DocumentWithChunksSchema] = []
+    for doc_id in doc_store.list_documents():
+        doc = doc_store.get_document(doc_id)
+        if doc:
+            docs_with_chunks.append(doc)
+
+    with next(get_db()) as session:
+        await process_vector_index_creation(index_id, docs_with_chunks, config, session)
+
+
 router = APIRouter()
 
 
 @router.post("/collections/", response_model=DocumentCollectionResponseSchema)
 async def create_document_collection(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(None),
     metadata: str = Form(...),
     db: Session = Depends(get_db),
@@ -339,13 +362,15 @@ async def create_document_collection(
                         }
                     )
 
-            # Start background processing with new function
-            background_tasks.add_task(
-                process_document_collection,
-                collection.id,
-                file_infos,
-                collection_config.text_processing.model_dump(),
-                db,
+            # Processed by a worker
+            get_job_queue().enqueue(
+                "document_collection",
+                {
+                    "collection_id": collection.id,
+                    "file_infos": file_infos,
+                    "config": collection_config.text_processing.model_dump(),
+                },
+                resource_id=collection.id,
             )
 
         # Create response
@@ -366,7 +391,6 @@ async def create_document_collection(
 
 @router.post("/indices/", response_model=VectorIndexResponseSchema)
 async def create_vector_index(
-    background_tasks: BackgroundTasks,
     index_config: VectorIndexCreateSchema,
     db: Session = Depends(get_db),
 ):
@@ -415,21 +439,15 @@ async def create_vector_index(
         db.commit()
         logger.debug(f"Initialized progress tracking for index {index.id}")
 
-        # Get documents with chunks
-        doc_store = DocumentStore(collection.id)
-        docs_with_chunks: List[DocumentWithChunksSchema] = []
-        for doc_id in doc_store.list_documents():
-            doc = doc_store.get_document(doc_id)
-            if doc:
-                docs_with_chunks.append(doc)
-
-        # Start background processing with new function
-        background_tasks.add_task(
-            process_vector_index_creation,
-            index.id,
-            docs_with_chunks,
-            index_config.embedding.model_dump(),
-            db,
+        # Processed by a worker
+        get_job_queue().enqueue(
+            "vector_index",
+            {
+                "index_id": index.id,
+                "collection_id": collection.id,
+                "config": index_config.embedding.model_dump(),
+            },
+            resource_id=index.id,
         )
 
         # Create response
@@ -628,11 +646,33 @@ async def get_vector_index(index_id: str, db: Session = Depends(get_db)):
 @router.get(
     "/collections/{collection_id}/progress/", response_model=ProcessingProgressSchema
 )
-async def get_collection_progress(collection_id: str):
+async def get_collection_progress(collection_id: str, db: Session = Depends(get_db)):
     """Get document collection processing progress"""
-    if collection_id not in collection_progress:
+    if collection_id in collection_progress:
+        return collection_progress[collection_id]
+
+    # Processed by a worker process, only the state stored on the collection is known here
+    collection = (
+        db.query(DocumentCollectionModel)
+        .filter(DocumentCollectionModel.id == collection_id)
+        .first()
+    )
+    if not collection:
         raise HTTPException(status_code=404, detail="No progress information found")
-    return collection_progress[collection_id]
+    ready = collection.status == "ready"
+    return ProcessingProgressSchema(
+        id=collection.id,
+        status="completed" if ready else str(collection.status),
+        progress=1.0 if ready else 0.0,
+        current_step="completed" if ready else str(collection.status),
+        total_files=collection.document_count,
+        processed_files=collection.document_count if ready else 0,
+        total_chunks=collection.chunk_count,
+        processed_chunks=collection.chunk_count if ready else 0,
+        error_message=collection.error_message,
+        created_at=collection.created_at.isoformat(),
+        updated_at=collection.updated_at.isoformat(),
+    )
 
 
 @router.get("/indices/{index_id}/progress/", response_model=ProcessingProgressSchema)
@@ -676,7 +716,6 @@ async def get_index_progress(index_id: str, db: Session = Depends(get_db)):
 )
 async def add_documents_to_collection(
     collection_id: str,
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db),
 ):
@@ -716,29 +755,16 @@ async def add_documents_to_collection(
         db.commit()
         db.refresh(collection)
 
-        # Start background processing
+        # Processed by a worker
         if file_infos:
-            doc_store = DocumentStore(collection.id)
-
-            # Create progress callback
-            async def progress_callback(
-                progress: float, step: str, processed: int, total: int
-            ) -> None:
-                await update_collection_progress(
-                    collection.id,
-                    progress=progress,
-                    current_step=step,
-                    processed_files=processed if step == "parsing" else None,
-                    processed_chunks=processed if step == "chunking" else None,
-                    total_chunks=total if step == "chunking" else None,
-                    db=db,
-                )
-
-            background_tasks.add_task(
-                doc_store.process_documents,
-                file_infos,
-                collection.text_processing_config,
-                progress_callback,
+            get_job_queue().enqueue(
+                "document_collection",
+                {
+                    "collection_id": collection.id,
+                    "file_infos": file_infos,
+                    "config": collection.text_processing_config,
+                },
+                resource_id=collection.id,
             )
 
         return DocumentCollectionResponseSchema(
@@ -1,14 +1,38 @@
-from typing import List, Optional
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from ..schemas.run_schemas import RunResponseSchema
+from ..schemas.run_schemas import (
+    BatchOutputFieldSummarySchema,
+    BatchProgressResponseSchema,
+    BatchResultResponseSchema,
+    BatchResultsSummarySchema,
+    RunResponseSchema,
+)
+from ..schemas.usage_schemas import (
+    LLMUsageSchema,
+    RunUsageResponseSchema,
+    TaskUsageResponseSchema,
+)
 from ..database import get_db
+from ..execution.run_registry import run_registry
+from ..jobs.queue import get_job_queue
 from ..models.run_model import RunModel, RunStatus
+from ..models.batch_checkpoint_model import BatchCheckpointModel
+from ..models.batch_shard_model import BatchShardModel
+from ..models.batch_result_model import BatchResultModel
 from ..models.task_model import TaskStatus
 
 router = APIRouter()
 
+# Seconds without progress after which a comment is sent on progress streams
+SSE_KEEPALIVE_SECONDS = 15
+
 
 @router.get(
     "/",
@@ -49,7 +73,7 @@ def get_run_status(run_id: str, db: Session = Depends(get_db)):
     run = db.query(RunModel).filter(RunModel.id == run_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
-    if run.status != RunStatus.FAILED:
+    if run.status not in (RunStatus.FAILED, RunStatus.CANCELED):
         failed_tasks = [task for task in run.tasks if task.status == TaskStatus.FAILED]
         running_and_pending_tasks = [
             task
@@ -63,3 +87,284 @@ def get_run_status(run_id: str, db: Session = Depends(get_db)):
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     return run
+
+
+def _get_batch_progress(
+    db: Session, run_id: str
+) -> Optional[BatchProgressResponseSchema]:
+    # Only the counters are read, neither the subruns nor the tasks
+    run = (
+        db.query(
+            RunModel.status,
+            RunModel.total_rows,
+            RunModel.completed_rows,
+            RunModel.failed_rows,
+        )
+        .filter(RunModel.id == run_id)
+        .first()
+    )
+    if run is None:
+        return None
+    if run.status == RunStatus.COMPLETED:
+        percentage_complete = 100.0
+    elif run.total_rows:
+        percentage_complete = (
+            (run.completed_rows + run.failed_rows) / run.total_rows * 100
+        )
+    else:
+        percentage_complete = 0.0
+    return BatchProgressResponseSchema(
+        run_id=run_id,
+        status=run.status,
+        total_rows=run.total_rows,
+        completed_rows=run.completed_rows,
+        failed_rows=run.failed_rows,
+        percentage_complete=percentage_complete,
+    )
+
+
+@router.get(
+    "/{run_id}/progress/",
+    response_model=BatchProgressResponseSchema,
+    description="Get the progress of a batch run from its row counters",
+)
+def get_batch_progress(run_id: str, db: Session = Depends(get_db)):
+    progress = _get_batch_progress(db, run_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return progress
+
+
+@router.get(
+    "/{run_id}/progress/stream/",
+    description="Server-sent events with the progress of a batch run, until it finishes",
+)
+async def stream_batch_progress(
+    run_id: str,
+    interval: float = Query(default=1.0, ge=0.2, le=60),
+    db: Session = Depends(get_db),
+):
+    if _get_batch_progress(db, run_id) is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    def read_progress() -> Optional[BatchProgressResponseSchema]:
+        with next(get_db()) as session:
+            return _get_batch_progress(session, run_id)
+
+    async def progress_events() -> AsyncIterator[str]:
+        last_progress = None
+        last_event = time.monotonic()
+        while True:
+            progress = await asyncio.to_thread(read_progress)
+            if progress is None:
+                return
+            if progress != last_progress:
+                yield f"event: progress\ndata: {progress.model_dump_json()}\n\n"
+                last_progress = progress
+                last_event = time.monotonic()
+            elif time.monotonic() - last_event >= SSE_KEEPALIVE_SECONDS:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                last_event = time.monotonic()
+            if progress.status not in (RunStatus.PENDING, RunStatus.RUNNING):
+                return
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(
+        progress_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/{run_id}/cancel/",
+    response_model=RunResponseSchema,
+    description="Cancel a pending or running run, including its subruns",
+)
+async def cancel_run(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(RunModel).filter(RunModel.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.status not in (RunStatus.PENDING, RunStatus.RUNNING):
+        raise HTTPException(status_code=400, detail="Run has already finished")
+
+    # A worker running the job of the run cancels it when renewing its lease
+    get_job_queue().cancel(run_id)
+    # Canceling a run also cancels the subruns awaited by it (e.g. the rows of a batch run)
+    if not run_registry.cancel(run_id):
+        # The run is queued, executed by a worker process or was interrupted,
+        # update its records here
+        now = datetime.now(timezone.utc)
+        for subrun in [run, *run.subruns]:
+            if subrun.status in (RunStatus.PENDING, RunStatus.RUNNING):
+                subrun.status = RunStatus.CANCELED
+                subrun.end_time = now
+            for task in subrun.tasks:
+                if task.status in (TaskStatus.PENDING, TaskStatus.RUNNING):
+                    task.status = TaskStatus.CANCELED
+                    task.end_time = now
+    run.status = RunStatus.CANCELED
+    run.end_time = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+@router.post(
+    "/{run_id}/resume/",
+    response_model=RunResponseSchema,
+    description="Resume an interrupted, failed or canceled batch run, skipping its completed rows",
+)
+def resume_run(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(RunModel).filter(RunModel.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.status == RunStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Run has already finished")
+    job_queue = get_job_queue()
+    if run_registry.is_running(run_id) or job_queue.is_active(run_id):
+        raise HTTPException(status_code=409, detail="Run is still being executed")
+    checkpoint = db.get(BatchCheckpointModel, run_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=400, detail="Run is not a resumable batch run")
+
+    # Jobs of the run whose worker died must not be claimed again alongside the new one
+    job_queue.cancel(run_id)
+    # The shards of a sharded batch run that did not complete run again
+    db.query(BatchShardModel).filter(
+        BatchShardModel.run_id == run_id,
+        BatchShardModel.status != RunStatus.COMPLETED,
+    ).update({"status": RunStatus.PENDING}, synchronize_session=False)
+    run.status = RunStatus.PENDING
+    run.end_time = None
+    db.commit()
+    job_queue.enqueue("batch_run", checkpoint.job_payload, resource_id=run_id)
+    db.refresh(run)
+    return run
+
+
+@router.get(
+    "/{run_id}/results/",
+    response_model=List[BatchResultResponseSchema],
+    description="List the results of the rows of a batch run, in the order of the dataset",
+)
+def list_batch_results(
+    run_id: str,
+    status: Optional[RunStatus] = None,
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    query = db.query(BatchResultModel).filter(BatchResultModel.run_id == run_id)
+    if status:
+        query = query.filter(BatchResultModel.status == status)
+    return (
+        query.order_by(BatchResultModel.row_index)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+
+
+@router.get(
+    "/{run_id}/results/summary/",
+    response_model=BatchResultsSummarySchema,
+    description="Aggregate the results of the rows of a batch run written so far",
+)
+def get_batch_results_summary(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(RunModel).filter(RunModel.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    # The numeric fields of the output node are aggregated in the same query
+    output_node = next(
+        (
+            node
+            for node in run.workflow_version.definition.get("nodes", [])
+            if node["node_type"] == "OutputNode" and not node.get("parent_id")
+        ),
+        None,
+    )
+    output_schema: Dict[str, str] = (
+        output_node["config"].get("output_schema", {}) if output_node else {}
+    )
+    numeric_fields = [
+        field
+        for field, field_type in output_schema.items()
+        if field_type in ("int", "float")
+    ]
+    field_aggregates = []
+    for field in numeric_fields:
+        value = BatchResultModel.outputs[field].as_float()
+        field_aggregates.extend(
+            [func.count(value), func.avg(value), func.min(value), func.max(value)]
+        )
+
+    of_run = BatchResultModel.run_id == run_id
+    totals = (
+        db.query(
+            func.count(),
+            func.avg(BatchResultModel.latency),
+            func.max(BatchResultModel.latency),
+            func.coalesce(func.sum(BatchResultModel.prompt_tokens), 0),
+            func.coalesce(func.sum(BatchResultModel.completion_tokens), 0),
+            *field_aggregates,
+        )
+        .filter(of_run)
+        .one()
+    )
+    status_counts = (
+        db.query(BatchResultModel.status, func.count())
+        .filter(of_run)
+        .group_by(BatchResultModel.status)
+        .all()
+    )
+    return BatchResultsSummarySchema(
+        run_id=run_id,
+        total_rows=totals[0],
+        status_counts={status.value: count for status, count in status_counts},
+        mean_latency=totals[1],
+        max_latency=totals[2],
+        prompt_tokens=totals[3],
+        completion_tokens=totals[4],
+        output_fields=[
+            BatchOutputFieldSummarySchema(
+                field=field,
+                count=totals[5 + 4 * i],
+                mean=totals[6 + 4 * i],
+                min=totals[7 + 4 * i],
+                max=totals[8 + 4 * i],
+            )
+            for i, field in enumerate(numeric_fields)
+        ],
+    )
+
+
+@router.get(
+    "/{run_id}/usage/",
+    response_model=RunUsageResponseSchema,
+    description="Get the LLM token usage and latency of a run and its tasks",
+)
+def get_run_usage(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(RunModel).filter(RunModel.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    tasks = [
+        TaskUsageResponseSchema(
+            task_id=task.id,
+            node_id=task.node_id,
+            llm_usage=task.llm_usage,
+        )
+        for task in run.tasks
+        if task.llm_usage
+    ]
+    llm_usage = run.llm_usage
+    if llm_usage is None and run.subruns:
+        # Batch runs aggregate the usage of their child runs
+        total = LLMUsageSchema()
+        for subrun in run.subruns:
+            if subrun.llm_usage:
+                total.merge(LLMUsageSchema.model_validate(subrun.llm_usage))
+        llm_usage = total
+    return RunUsageResponseSchema(run_id=run.id, llm_usage=llm_usage, tasks=tasks)
@@ -1,14 +1,18 @@
 import asyncio
+import itertools
 import os
-import json
 import base64
 import hashlib
 import re
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
+import time
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
+from contextlib import aclosing
 from pathlib import Path  # Import Path for directory handling
-from typing import Awaitable, Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 
 from ..schemas.run_schemas import (
     StartRunRequestSchema,
@@ -20,17 +24,46 @@ from ..schemas.workflow_schemas import WorkflowDefinitionSchema
 from ..database import get_db
 from ..models.workflow_model import WorkflowModel as WorkflowModel
 from ..models.run_model import RunModel as RunModel, RunStatus
-from ..models.task_model import TaskStatus
+from ..models.task_model import TaskModel, TaskStatus
 from ..models.dataset_model import DatasetModel
 from ..models.output_file_model import OutputFileModel
-from ..execution.workflow_executor import WorkflowExecutor
-from ..dataset.ds_util import get_ds_iterator, get_ds_column_names
+from ..models.batch_checkpoint_model import BatchCheckpointModel
+from ..models.batch_result_model import BatchResultModel
+from ..models.batch_shard_model import BatchShardModel
+from ..execution.workflow_executor import NODE_TIMEOUT_SECONDS, WorkflowExecutor
+from ..execution.workflow_plan import get_workflow_plan
+from ..nodes.base import BaseNodeOutput
+from ..dataset.ds_util import (
+    get_ds_column_names,
+    get_ds_hash,
+    get_ds_iterator,
+    get_ds_row_count,
+)
+from ..dataset.output_writer import JsonlOutputWriter
 from ..execution.task_recorder import TaskRecorder
+from ..execution.batch_collector import collect_batches
+from ..execution.batch_scheduler import map_sliding_window
+from ..execution.run_registry import RUN_TIMEOUT_SECONDS, RunCanceled, run_registry
+from ..jobs.queue import get_job_queue
 from ..utils.workflow_version_utils import fetch_workflow_version
 from ..execution.workflow_execution_context import WorkflowExecutionContext
 
 router = APIRouter()
 
+# Line of the output file and batch result of a dataset row
+BatchRow = Tuple[Dict[str, Any], Dict[str, Any]]
+
+# Rows of a batch run completed between two checkpoints of its progress
+BATCH_CHECKPOINT_ROWS = int(os.getenv("BATCH_CHECKPOINT_ROWS", "100"))
+# Rows of the shards of batch runs that do not set their own, each shard is a job
+# that any worker can claim. Unset means batch runs are not sharded
+BATCH_SHARD_ROWS = (
+    int(os.environ["BATCH_SHARD_ROWS"]) if os.getenv("BATCH_SHARD_ROWS") else None
+)
+
+# Characters of a data URI decoded at a time, a multiple of 4
+EMBEDDED_FILE_CHUNK_CHARS = 1 << 20
+
 # Define EVALS_DIR (same as in evals_management.py)
 EVALS_DIR = Path(__file__).parent.parent / "evals" / "tasks"
 
@@ -67,6 +100,8 @@ def process_embedded_files(
     Returns updated inputs with file paths instead of data URIs.
     """
     processed_inputs = initial_inputs.copy()
+    # The same file embedded several times in the inputs is decoded once
+    saved_files: Dict[str, str] = {}
 
     # Iterate through the values to find data URIs recursively
     def find_and_replace_data_uris(data: Any) -> Any:
@@ -75,7 +110,9 @@ def process_embedded_files(
         elif isinstance(data, list):
             return [find_and_replace_data_uris(item) for item in data]  # type: ignore
         elif isinstance(data, str) and data.startswith("data:"):
-            return save_embedded_file(data, workflow_id)
+            if data not in saved_files:
+                saved_files[data] = save_embedded_file(data, workflow_id)
+            return saved_files[data]
         else:
             return data
 
@@ -134,14 +171,28 @@ async def run_workflow_blocking(
         workflow=workflow_definition,
         task_recorder=task_recorder,
         context=context,
+        node_timeout=request.node_timeout or NODE_TIMEOUT_SECONDS,
     )
     input_node = next(
         node for node in workflow_definition.nodes if node.node_type == "InputNode"
     )
-    outputs = await executor(initial_inputs[input_node.id])
+    try:
+        outputs = await run_registry.run(
+            new_run.id,
+            executor(initial_inputs[input_node.id]),
+            timeout=request.timeout or RUN_TIMEOUT_SECONDS,
+        )
+    except RunCanceled as e:
+        record_run_canceled(new_run, executor, db)
+        raise HTTPException(status_code=409, detail=str(e))
+    except asyncio.CancelledError:
+        # e.g. the parent batch run was canceled
+        record_run_canceled(new_run, executor, db)
+        raise
     new_run.status = RunStatus.COMPLETED
     new_run.end_time = datetime.now(timezone.utc)
     new_run.outputs = {k: v.model_dump() for k, v in outputs.items()}
+    new_run.llm_usage = executor.llm_usage.usage.model_dump()
     db.commit()
     return outputs
 
@@ -154,7 +205,6 @@ async def run_workflow_blocking(
 async def run_workflow_non_blocking(
     workflow_id: str,
     start_run_request: StartRunRequestSchema,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     run_type: str = "interactive",
 ) -> RunResponseSchema:
@@ -163,9 +213,6 @@ async def run_workflow_non_blocking(
         raise HTTPException(status_code=404, detail="Workflow not found")
 
     workflow_version = fetch_workflow_version(workflow_id, workflow, db)
-    workflow_definition = WorkflowDefinitionSchema.model_validate(
-        workflow_version.definition
-    )
 
     initial_inputs = start_run_request.initial_inputs or {}
 
@@ -181,48 +228,15 @@ async def run_workflow_non_blocking(
         db,
     )
 
-    async def run_workflow_task(
-        run_id: str, workflow_definition: WorkflowDefinitionSchema
-    ):
-        with next(get_db()) as session:
-            run = session.query(RunModel).filter(RunModel.id == run_id).first()
-            if not run:
-                session.close()
-                return
-            run.status = RunStatus.RUNNING
-            session.commit()
-            task_recorder = TaskRecorder(db, run_id)
-            context = WorkflowExecutionContext(
-                workflow_id=run.workflow_id,
-                run_id=run_id,
-                parent_run_id=start_run_request.parent_run_id,
-                run_type=run_type,
-                db_session=session,
-            )
-            executor = WorkflowExecutor(
-                workflow=workflow_definition,
-                task_recorder=task_recorder,
-                context=context,
-            )
-            try:
-                assert run.initial_inputs
-                input_node = next(
-                    node
-                    for node in workflow_definition.nodes
-                    if node.node_type == "InputNode"
-                )
-                outputs = await executor(run.initial_inputs[input_node.id])
-                run.outputs = {k: v.model_dump() for k, v in outputs.items()}
-                run.status = RunStatus.COMPLETED
-                run.end_time = datetime.now(timezone.utc)
-            except Exception as e:
-                run.status = RunStatus.FAILED
-                run.end_time = datetime.now(timezone.utc)
-                session.commit()
-                raise e
-            session.commit()
-
-    background_tasks.add_task(run_workflow_task, new_run.id, workflow_definition)
+    get_job_queue().enqueue(
+        "workflow_run",
+        {
+            "run_id": new_run.id,
+            "timeout": start_run_request.timeout,
+            "node_timeout": start_run_request.node_timeout,
+        },
+        resource_id=new_run.id,
+    )
 
     return new_run
 
@@ -263,7 +277,6 @@ async def run_partial_workflow(
 async def batch_run_workflow_non_blocking(
     workflow_id: str,
     request: BatchRunRequestSchema,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ) -> RunResponseSchema:
     workflow = db.query(WorkflowModel).filter(WorkflowModel.id == workflow_id).first()
@@ -283,7 +296,11 @@ async def batch_run_workflow_non_blocking(
         raise HTTPException(status_code=404, detail="Dataset not found")
 
     # ensure ds columns match workflow inputs
-    dataset_columns = get_ds_column_names(dataset.file_path)
+    dataset_columns = (
+        set(dataset.column_types)
+        if dataset.column_types is not None
+        else get_ds_column_names(dataset.file_path)
+    )
     workflow_definition = WorkflowDefinitionSchema.model_validate(
         workflow_version.definition
     )
@@ -309,86 +326,30 @@ async def batch_run_workflow_non_blocking(
         file_path=output_file_path,
     )
     db.add(output_file)
+    db.flush()
+    # Committed before the job is enqueued, a worker may claim it at once
+    new_run.output_file_id = output_file.id
+    new_run.input_dataset_id = dataset.id
     db.commit()
 
-    file_path = dataset.file_path
-
-    mini_batch_size = request.mini_batch_size
-
-    async def start_mini_batch_runs(
-        file_path: str,
-        workflow_id: str,
-        workflow_input_schema: Dict[str, str],
-        input_node_id: str,
-        parent_run_id: str,
-        background_tasks: BackgroundTasks,
-        db: Session,
-        mini_batch_size: int,
-        output_file_path: str,
-    ):
-        ds_iter = get_ds_iterator(file_path)
-        current_batch: List[Awaitable[Dict[str, Any]]] = []
-        batch_count = 0
-        for inputs in ds_iter:
-            initial_inputs = {
-                input_node_id: {
-                    k: v for k, v in inputs.items() if k in workflow_input_schema
-                }
-            }
-            single_input_run_task = run_workflow_blocking(
-                workflow_id=workflow_id,
-                request=StartRunRequestSchema(
-                    initial_inputs=initial_inputs, parent_run_id=parent_run_id
-                ),
-                db=db,
-                run_type="batch",
-            )
-            current_batch.append(single_input_run_task)
-            if len(current_batch) == mini_batch_size:
-                minibatch_results = await asyncio.gather(*current_batch)
-                current_batch = []
-                batch_count += 1
-                with open(output_file_path, "a") as output_file:
-                    for output in minibatch_results:
-                        output = {
-                            node_id: output.model_dump()
-                            for node_id, output in output.items()
-                        }
-                        output_file.write(json.dumps(output) + "\n")
-
-        if current_batch:
-            results = await asyncio.gather(*current_batch)
-            with open(output_file_path, "a") as output_file:
-                for output in results:
-                    output = {
-                        node_id: output.model_dump()
-                        for node_id, output in output.items()
-                    }
-                    output_file.write(json.dumps(output) + "\n")
-
-        with next(get_db()) as session:
-            run = session.query(RunModel).filter(RunModel.id == parent_run_id).first()
-            if not run:
-                session.close()
-                return
-            run.status = RunStatus.COMPLETED
-            run.end_time = datetime.now(timezone.utc)
-            session.commit()
-
-    background_tasks.add_task(
-        start_mini_batch_runs,
-        file_path,
-        workflow_id,
-        workflow_input_schema,
-        input_node_id,
-        new_run.id,
-        background_tasks,
-        db,
-        mini_batch_size,
-        output_file_path,
+    get_job_queue().enqueue(
+        "batch_run",
+        {
+            "run_id": new_run.id,
+            "workflow_id": workflow_id,
+            "file_path": dataset.file_path,
+            "workflow_input_schema": workflow_input_schema,
+            "input_node_id": input_node_id,
+            "mini_batch_size": request.mini_batch_size,
+            "output_file_path": output_file_path,
+            "shard_rows": (
+                request.shard_rows
+                if request.shard_rows is not None
+                else BATCH_SHARD_ROWS
+            ),
+        },
+        resource_id=new_run.id,
     )
-    new_run.output_file_id = output_file.id
-    db.commit()
     return new_run
 
 
@@ -415,7 +376,7 @@ def list_runs(
 
     # Update run status based on task status
     for run in runs:
-        if run.status != RunStatus.FAILED:
+        if run.status not in (RunStatus.FAILED, RunStatus.CANCELED):
             failed_tasks = [
                 task for task in run.tasks if task.status == TaskStatus.FAILED
             ]
@@ -432,21 +393,813 @@ def list_runs(
     return runs
 
 
+async def execute_workflow_run(
+    run_id: str, timeout: Optional[float] = None, node_timeout: Optional[float] = None
+) -> None:
+    """Execute a run started by run_workflow_non_blocking, handler of workflow_run jobs"""
+    with next(get_db()) as session:
+        run = session.query(RunModel).filter(RunModel.id == run_id).first()
+        if not run or run.status not in (RunStatus.PENDING, RunStatus.RUNNING):
+            # Deleted, or canceled before a worker picked it up
+            return
+        # A worker failure interrupted a previous attempt, its tasks are recorded again
+        session.query(TaskModel).filter(TaskModel.run_id == run_id).delete()
+        run.status = RunStatus.RUNNING
+        session.commit()
+        workflow_definition = WorkflowDefinitionSchema.model_validate(
+            run.workflow_version.definition
+        )
+        task_recorder = TaskRecorder(session, run_id)
+        context = WorkflowExecutionContext(
+            workflow_id=run.workflow_id,
+            run_id=run_id,
+            parent_run_id=run.parent_run_id,
+            run_type=run.run_type,
+            db_session=session,
+        )
+        executor = WorkflowExecutor(
+            workflow=workflow_definition,
+            task_recorder=task_recorder,
+            context=context,
+            node_timeout=node_timeout or NODE_TIMEOUT_SECONDS,
+        )
+        try:
+            assert run.initial_inputs
+            input_node = next(
+                node
+                for node in workflow_definition.nodes
+                if node.node_type == "InputNode"
+            )
+            outputs = await run_registry.run(
+                run_id,
+                executor(run.initial_inputs[input_node.id]),
+                timeout=timeout or RUN_TIMEOUT_SECONDS,
+            )
+            run.outputs = {k: v.model_dump() for k, v in outputs.items()}
+            run.status = RunStatus.COMPLETED
+            run.end_time = datetime.now(timezone.utc)
+        except RunCanceled:
+            record_run_canceled(run, executor, session)
+            return
+        except asyncio.CancelledError:
+            record_run_canceled(run, executor, session)
+            raise
+        except Exception as e:
+            run.status = RunStatus.FAILED
+            run.end_time = datetime.now(timezone.utc)
+            run.llm_usage = executor.llm_usage.usage.model_dump()
+            session.commit()
+            raise e
+        run.llm_usage = executor.llm_usage.usage.model_dump()
+        session.commit()
+
+
+def get_dataset_profile(
+    session: Session, dataset_id: Optional[str], file_path: str
+) -> Optional[DatasetModel]:
+    """The dataset of a batch run, None if its file changed since it was profiled"""
+    dataset = session.query(DatasetModel).filter(DatasetModel.id == dataset_id).first()
+    if (
+        dataset is None
+        or dataset.file_path != file_path
+        or dataset.file_size != os.path.getsize(file_path)
+    ):
+        return None
+    return dataset
+
+
+class BatchRowRunner:
+    """
+    Runs rows of a batch run and writes their outputs and results, for batch_run
+    jobs and for the batch_shard jobs of sharded batch runs.
+
+    The workflow version of the batch run is resolved once, the rows run directly
+    on executors sharing its plan and their child runs are created in bulk.
+    """
+
+    def __init__(self, run: RunModel, input_node_id: str, mini_batch_size: int):
+        self.run_id = run.id
+        self.workflow_id = run.workflow_id
+        self.workflow_version_id = run.workflow_version_id
+        self.workflow_definition = WorkflowDefinitionSchema.model_validate(
+            run.workflow_version.definition
+        )
+        self.output_node = get_workflow_plan(self.workflow_definition).output_node
+        # Fields materialized in the batch results
+        self.output_fields: List[str] = (
+            list(self.output_node.config.get("output_schema", {}))
+            if self.output_node
+            else []
+        )
+        self.input_node_id = input_node_id
+        self.mini_batch_size = mini_batch_size
+
+    def create_child_runs(
+        self, db: Session, rows: Iterator[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Pair the rows with their child runs, created mini_batch_size at a time"""
+        while True:
+            chunk = [
+                process_embedded_files(self.workflow_id, {self.input_node_id: inputs})
+                for inputs in itertools.islice(rows, self.mini_batch_size)
+            ]
+            if not chunk:
+                return
+            now = datetime.now(timezone.utc)
+            child_runs = [
+                RunModel(
+                    workflow_id=self.workflow_id,
+                    workflow_version_id=self.workflow_version_id,
+                    status=RunStatus.PENDING,
+                    initial_inputs=initial_inputs,
+                    start_time=now,
+                    parent_run_id=self.run_id,
+                    run_type="batch",
+                )
+                for initial_inputs in chunk
+            ]
+            db.add_all(child_runs)
+            db.flush()
+            child_run_ids = [child_run.id for child_run in child_runs]
+            db.commit()
+            for child_run_id, initial_inputs in zip(child_run_ids, chunk):
+                yield child_run_id, initial_inputs[self.input_node_id]
+
+    async def run_row(
+        self, db: Session, child_run_id: str, inputs: Dict[str, Any]
+    ) -> Tuple[Dict[str, BaseNodeOutput], Dict[str, Any]]:
+        """Run a row, returns its outputs and its batch result"""
+        executor = WorkflowExecutor(
+            workflow=self.workflow_definition,
+            task_recorder=TaskRecorder(db, child_run_id),
+            context=WorkflowExecutionContext(
+                workflow_id=self.workflow_id,
+                run_id=child_run_id,
+                parent_run_id=self.run_id,
+                run_type="batch",
+                db_session=db,
+            ),
+        )
+        child_run = db.query(RunModel).filter(RunModel.id == child_run_id)
+        status = RunStatus.FAILED
+        outputs: Optional[Dict[str, BaseNodeOutput]] = None
+        start = time.monotonic()
+        try:
+            outputs = await run_registry.run(
+                child_run_id, executor(inputs), timeout=RUN_TIMEOUT_SECONDS
+            )
+            # Failed nodes do not stop the row, it completes with partial outputs
+            status = RunStatus.FAILED if executor.failed_nodes else RunStatus.COMPLETED
+        except RunCanceled as e:
+            status = RunStatus.CANCELED
+            # Fails the batch run, as any failed row does
+            raise RuntimeError(f"Run {child_run_id} was canceled: {e}") from e
+        except asyncio.CancelledError:
+            status = RunStatus.CANCELED
+            raise
+        finally:
+            child_run.update(
+                {
+                    "status": status,
+                    "end_time": datetime.now(timezone.utc),
+                    "outputs": (
+                        {k: v.model_dump() for k, v in outputs.items()}
+                        if outputs is not None
+                        else None
+                    ),
+                    "llm_usage": executor.llm_usage.usage.model_dump(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+
+        usage = executor.llm_usage.usage
+        output = outputs.get(self.output_node.id) if self.output_node else None
+        output_values = output.model_dump() if output is not None else None
+        result = {
+            "child_run_id": child_run_id,
+            "status": status,
+            "error": (
+                f"Nodes failed: {', '.join(sorted(executor.failed_nodes))}"
+                if executor.failed_nodes
+                else None
+            ),
+            "latency": time.monotonic() - start,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "outputs": (
+                {field: output_values.get(field) for field in self.output_fields}
+                if output_values is not None
+                else None
+            ),
+        }
+        return outputs, result
+
+    def write_rows(
+        self, writer: JsonlOutputWriter, rows: List[BatchRow], first_row: int
+    ) -> None:
+        # The results of the rows are inserted in bulk
+        results = [
+            {
+                **result,
+                "run_id": self.run_id,
+                "row_index": first_row + writer.rows_written + i,
+            }
+            for i, (_, result) in enumerate(rows)
+        ]
+        writer.write_rows([output for output, _ in rows])
+        if results:
+            completed = sum(
+                1 for result in results if result["status"] == RunStatus.COMPLETED
+            )
+            with next(get_db()) as session:
+                session.execute(insert(BatchResultModel), results)
+                # The counters are incremented in the database, in the same
+                # transaction. The shards of a batch run increment them concurrently
+                session.query(RunModel).filter(RunModel.id == self.run_id).update(
+                    {
+                        "completed_rows": RunModel.completed_rows + completed,
+                        "failed_rows": RunModel.failed_rows + len(results) - completed,
+                    },
+                    synchronize_session=False,
+                )
+                session.commit()
+
+    async def write_outputs(
+        self,
+        queue: "asyncio.Queue[Optional[BatchRow]]",
+        writer: JsonlOutputWriter,
+        first_row: int,
+        save_checkpoint: Callable[[JsonlOutputWriter], None],
+    ) -> None:
+        # Writes the rows put in the queue until None, the file and database I/O
+        # runs in a thread so that it does not hold up the rows
+        while True:
+            rows = [await queue.get()]
+            while not queue.empty():
+                rows.append(queue.get_nowait())
+            finished = rows[-1] is None
+            if finished:
+                rows.pop()
+            checkpoints_before = writer.rows_written // BATCH_CHECKPOINT_ROWS
+            await asyncio.to_thread(self.write_rows, writer, rows, first_row)  # type: ignore
+            if writer.rows_written // BATCH_CHECKPOINT_ROWS > checkpoints_before:
+                await asyncio.to_thread(save_checkpoint, writer)
+            if finished:
+                return
+
+    async def run(
+        self,
+        db: Session,
+        rows: Iterator[Dict[str, Any]],
+        output_file_path: str,
+        output_offset: int,
+        rows_written: int,
+        save_checkpoint: Callable[[JsonlOutputWriter], None],
+        first_row: int = 0,
+    ) -> None:
+        """
+        Run the rows and append their outputs to the output file, truncated to
+        output_offset bytes, after the rows_written rows it holds. The rows of
+        the file are the rows of the dataset from first_row on.
+        save_checkpoint is called every BATCH_CHECKPOINT_ROWS rows and at the end.
+        """
+        # Up to mini_batch_size rows run concurrently, a new row starts as soon as
+        # one finishes. Batch-capable nodes the rows share (e.g. Python function
+        # nodes in batch mode) are called once for the rows reaching them together
+        with collect_batches(max_batch_size=self.mini_batch_size):
+            child_rows = self.create_child_runs(db, rows)
+            # Drops the outputs written after the last checkpoint
+            with JsonlOutputWriter(
+                output_file_path, offset=output_offset, rows_written=rows_written
+            ) as writer:
+                queue: asyncio.Queue[Optional[BatchRow]] = asyncio.Queue()
+                writer_task = asyncio.create_task(
+                    self.write_outputs(queue, writer, first_row, save_checkpoint)
+                )
+                try:
+                    # The outputs are written as they complete, in the order of the rows
+                    async with aclosing(
+                        map_sliding_window(
+                            child_rows,
+                            lambda row: self.run_row(db, *row),
+                            window=self.mini_batch_size,
+                        )
+                    ) as results:
+                        async for outputs, result in results:
+                            if writer_task.done():
+                                # Writing failed, its error is raised below
+                                break
+                            output = {
+                                node_id: output.model_dump()
+                                for node_id, output in outputs.items()
+                            }
+                            queue.put_nowait((output, result))
+                finally:
+                    queue.put_nowait(None)
+                    try:
+                        await writer_task
+                    finally:
+                        await asyncio.to_thread(save_checkpoint, writer)
+
+
+async def execute_batch_run(
+    run_id: str,
+    workflow_id: str,
+    file_path: str,
+    workflow_input_schema: Dict[str, str],
+    input_node_id: str,
+    mini_batch_size: int,
+    output_file_path: str,
+    shard_rows: Optional[int] = None,
+) -> None:
+    """
+    Run the workflow over the rows of a dataset, handler of batch_run jobs.
+    Each row is a child run of the batch run, the outputs are appended to the output file.
+
+    Progress is checkpointed every BATCH_CHECKPOINT_ROWS rows. When the run is
+    executed again (its worker died, or it was resumed), the rows completed by
+    earlier attempts are skipped and the outputs written after the last
+    checkpoint are overwritten.
+
+    When shard_rows is set and the dataset has more rows, the rows are split into
+    shards of shard_rows rows instead, each run by a batch_shard job that any
+    worker can claim (see execute_batch_shard).
+    """
+    with next(get_db()) as session:
+        run = session.query(RunModel).filter(RunModel.id == run_id).first()
+        if not run or run.status not in (RunStatus.PENDING, RunStatus.RUNNING):
+            return
+        run.status = RunStatus.RUNNING
+
+        dataset_hash = get_ds_hash(file_path)
+        checkpoint = session.get(BatchCheckpointModel, run_id)
+        if checkpoint is None:
+            checkpoint = BatchCheckpointModel(
+                run_id=run_id,
+                dataset_hash=dataset_hash,
+                rows_completed=0,
+                output_offset=0,
+                job_payload={
+                    "run_id": run_id,
+                    "workflow_id": workflow_id,
+                    "file_path": file_path,
+                    "workflow_input_schema": workflow_input_schema,
+                    "input_node_id": input_node_id,
+                    "mini_batch_size": mini_batch_size,
+                    "output_file_path": output_file_path,
+                    "shard_rows": shard_rows,
+                },
+            )
+            session.add(checkpoint)
+        elif checkpoint.dataset_hash != dataset_hash or checkpoint.output_offset > (
+            os.path.getsize(output_file_path) if os.path.exists(output_file_path) else 0
+        ):
+            print(
+                f"[WARNING]: The dataset or the output file of batch run {run_id} "
+                "changed since its last checkpoint, running all the rows again"
+            )
+            checkpoint.dataset_hash = dataset_hash
+            checkpoint.rows_completed = 0
+            checkpoint.output_offset = 0
+            run.total_rows = None
+            session.query(BatchShardModel).filter(
+                BatchShardModel.run_id == run_id
+            ).delete(synchronize_session=False)
+        # The profile recorded at upload, unless the file changed since
+        dataset = get_dataset_profile(session, run.input_dataset_id, file_path)
+        row_offsets = dataset.row_offsets if dataset else None
+        if run.total_rows is None:
+            if dataset is not None and dataset.row_count is not None:
+                run.total_rows = dataset.row_count
+            else:
+                run.total_rows = get_ds_row_count(file_path)
+
+        # The rows an interrupted attempt was running are run again
+        now = datetime.now(timezone.utc)
+        interrupted_runs = session.query(RunModel).filter(
+            RunModel.parent_run_id == run_id,
+            RunModel.status.in_([RunStatus.PENDING, RunStatus.RUNNING]),
+        )
+        session.query(TaskModel).filter(
+            TaskModel.run_id.in_(interrupted_runs.with_entities(RunModel.id)),
+            TaskModel.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING]),
+        ).update(
+            {"status": TaskStatus.CANCELED, "end_time": now},
+            synchronize_session=False,
+        )
+        interrupted_runs.update(
+            {"status": RunStatus.CANCELED, "end_time": now},
+            synchronize_session=False,
+        )
+
+        sharded = shard_rows is not None and run.total_rows > shard_rows
+        if sharded:
+            assert shard_rows is not None
+            shard_tokens = plan_batch_shards(session, run, shard_rows, output_file_path)
+            # The tokens are committed before the jobs that carry them are enqueued
+            session.commit()
+        else:
+            session.query(BatchResultModel).filter(
+                BatchResultModel.run_id == run_id,
+                BatchResultModel.row_index >= checkpoint.rows_completed,
+            ).delete(synchronize_session=False)
+            # The progress counters start again from the results that were kept
+            status_counts = dict(
+                session.query(BatchResultModel.status, func.count())
+                .filter(BatchResultModel.run_id == run_id)
+                .group_by(BatchResultModel.status)
+                .all()
+            )
+            run.completed_rows = status_counts.pop(RunStatus.COMPLETED, 0)
+            run.failed_rows = sum(status_counts.values())
+            session.commit()
+            rows_completed = checkpoint.rows_completed
+            output_offset = checkpoint.output_offset
+            runner = BatchRowRunner(run, input_node_id, mini_batch_size)
+
+    if sharded:
+        shard_payload = {
+            "run_id": run_id,
+            "file_path": file_path,
+            "workflow_input_schema": workflow_input_schema,
+            "input_node_id": input_node_id,
+            "mini_batch_size": mini_batch_size,
+            "output_file_path": output_file_path,
+        }
+        for shard_index, job_token in shard_tokens.items():
+            get_job_queue().enqueue(
+                "batch_shard",
+                {**shard_payload, "shard_index": shard_index, "job_token": job_token},
+                resource_id=run_id,
+            )
+        if not shard_tokens:
+            # All the shards completed, the last one did not merge them
+            await asyncio.to_thread(merge_batch_shards, run_id, output_file_path)
+        return
+
+    def save_checkpoint(writer: JsonlOutputWriter) -> None:
+        # The outputs are on disk before the checkpoint refers to them
+        output_offset = writer.sync()
+        with next(get_db()) as session:
+            session.query(BatchCheckpointModel).filter(
+                BatchCheckpointModel.run_id == run_id
+            ).update(
+                {"rows_completed": writer.rows_written, "output_offset": output_offset},
+                synchronize_session=False,
+            )
+            session.commit()
+
+    # Only the columns of the input schema are read
+    # and the rows completed by earlier attempts are skipped
+    rows = get_ds_iterator(
+        file_path,
+        columns=list(workflow_input_schema),
+        start_row=rows_completed,
+        row_offsets=row_offsets,
+    )
+    status = RunStatus.FAILED
+    with next(get_db()) as db:
+        try:
+            # The rows run inside the run's task, canceling it cancels them
+            await run_registry.run(
+                run_id,
+                runner.run(
+                    db,
+                    rows,
+                    output_file_path,
+                    output_offset,
+                    rows_completed,
+                    save_checkpoint,
+                ),
+            )
+            status = RunStatus.COMPLETED
+        except RunCanceled:
+            status = RunStatus.CANCELED
+        except asyncio.CancelledError:
+            status = RunStatus.CANCELED
+            raise
+        finally:
+            with next(get_db()) as session:
+                run = session.query(RunModel).filter(RunModel.id == run_id).first()
+                if run:
+                    run.status = status
+                    run.end_time = datetime.now(timezone.utc)
+                    session.commit()
+
+
+def plan_batch_shards(
+    session: Session, run: RunModel, shard_rows: int, output_file_path: str
+) -> Dict[int, str]:
+    """
+    Split the rows of a batch run into shards, unless it was already split.
+    Returns the indexes of the pending shards with a new job token for each.
+
+    A shard stays pending until its job starts. When the batch_run job is
+    interrupted before all the shard jobs are enqueued, its next attempt gives
+    the pending shards new tokens and enqueues them again, the jobs enqueued
+    with the older tokens exit without running them.
+    """
+    shards = (
+        session.query(BatchShardModel)
+        .filter(BatchShardModel.run_id == run.id)
+        .order_by(BatchShardModel.shard_index)
+        .with_for_update()
+        .all()
+    )
+    if not shards:
+        # Results of an earlier attempt whose dataset changed
+        session.query(BatchResultModel).filter(
+            BatchResultModel.run_id == run.id
+        ).delete(synchronize_session=False)
+        run.completed_rows = 0
+        run.failed_rows = 0
+        assert run.total_rows is not None
+        file_stem = os.path.splitext(output_file_path)[0]
+        shards = [
+            BatchShardModel(
+                run_id=run.id,
+                shard_index=shard_index,
+                start_row=start_row,
+                stop_row=min(start_row + shard_rows, run.total_rows),
+                status=RunStatus.PENDING,
+                output_file_path=f"{file_stem}.shard{shard_index}.jsonl",
+                rows_completed=0,
+                output_offset=0,
+            )
+            for shard_index, start_row in enumerate(
+                range(0, run.total_rows, shard_rows)
+            )
+        ]
+        session.add_all(shards)
+    shard_tokens: Dict[int, str] = {}
+    for shard in shards:
+        if shard.status == RunStatus.PENDING:
+            shard.job_token = uuid.uuid4().hex
+            shard_tokens[shard.shard_index] = shard.job_token
+    return shard_tokens
+
+
+async def execute_batch_shard(
+    run_id: str,
+    shard_index: int,
+    file_path: str,
+    workflow_input_schema: Dict[str, str],
+    input_node_id: str,
+    mini_batch_size: int,
+    output_file_path: str,
+    job_token: str,
+) -> None:
+    """
+    Run the rows of a shard of a batch run, handler of batch_shard jobs.
+    The outputs are appended to the part file of the shard, with checkpoints
+    as for unsharded batch runs.
+
+    The shards of a batch run are run by any number of workers at the same time,
+    the last one to complete merges their outputs into the output file of the
+    batch run. A failed shard fails the batch run and cancels its other shards.
+    """
+    with next(get_db()) as session:
+        run = session.query(RunModel).filter(RunModel.id == run_id).first()
+        # Locked until the shard is marked as running, see plan_batch_shards
+        shard = (
+            session.query(BatchShardModel)
+            .filter(
+                BatchShardModel.run_id == run_id,
+                BatchShardModel.shard_index == shard_index,
+            )
+            .with_for_update()
+            .first()
+        )
+        if (
+            not run
+            or run.status != RunStatus.RUNNING
+            or shard is None
+            or shard.job_token != job_token
+        ):
+            return
+        shard_completed = shard.status == RunStatus.COMPLETED
+        if not shard_completed:
+            part_size = (
+                os.path.getsize(shard.output_file_path)
+                if os.path.exists(shard.output_file_path)
+                else 0
+            )
+            if shard.output_offset > part_size:
+                print(
+                    f"[WARNING]: The output file of shard {shard_index} of batch run "
+                    f"{run_id} changed since its last checkpoint, "
+                    "running its rows again"
+                )
+                shard.rows_completed = 0
+                shard.output_offset = 0
+            first_row = shard.start_row + shard.rows_completed
+            stale_results = session.query(BatchResultModel).filter(
+                BatchResultModel.run_id == run_id,
+                BatchResultModel.row_index >= first_row,
+                BatchResultModel.row_index < shard.stop_row,
+            )
+            status_counts = dict(
+                stale_results.with_entities(BatchResultModel.status, func.count())
+                .group_by(BatchResultModel.status)
+                .all()
+            )
+            stale_results.delete(synchronize_session=False)
+            # The counters are decremented, the other shards update them concurrently
+            completed = status_counts.pop(RunStatus.COMPLETED, 0)
+            session.query(RunModel).filter(RunModel.id == run_id).update(
+                {
+                    "completed_rows": RunModel.completed_rows - completed,
+                    "failed_rows": RunModel.failed_rows - sum(status_counts.values()),
+                },
+                synchronize_session=False,
+            )
+            shard.status = RunStatus.RUNNING
+            dataset = get_dataset_profile(session, run.input_dataset_id, file_path)
+            rows = get_ds_iterator(
+                file_path,
+                columns=list(workflow_input_schema),
+                start_row=first_row,
+                stop_row=shard.stop_row,
+                row_offsets=dataset.row_offsets if dataset else None,
+            )
+            start_row = shard.start_row
+            rows_completed = shard.rows_completed
+            output_offset = shard.output_offset
+            part_file_path = shard.output_file_path
+            runner = BatchRowRunner(run, input_node_id, mini_batch_size)
+        session.commit()
+
+    def save_checkpoint(writer: JsonlOutputWriter) -> None:
+        # The outputs are on disk before the checkpoint refers to them
+        output_offset = writer.sync()
+        with next(get_db()) as session:
+            session.query(BatchShardModel).filter(
+                BatchShardModel.run_id == run_id,
+                BatchShardModel.shard_index == shard_index,
+            ).update(
+                {"rows_completed": writer.rows_written, "output_offset": output_offset},
+                synchronize_session=False,
+            )
+            session.commit()
+
+    if not shard_completed:
+        status = RunStatus.FAILED
+        with next(get_db()) as db:
+            try:
+                await run_registry.run(
+                    f"{run_id}/shard{shard_index}",
+                    runner.run(
+                        db,
+                        rows,
+                        part_file_path,
+                        output_offset,
+                        rows_completed,
+                        save_checkpoint,
+                        first_row=start_row,
+                    ),
+                )
+                status = RunStatus.COMPLETED
+            except RunCanceled:
+                status = RunStatus.CANCELED
+            except asyncio.CancelledError:
+                status = RunStatus.CANCELED
+                raise
+            finally:
+                with next(get_db()) as session:
+                    session.query(BatchShardModel).filter(
+                        BatchShardModel.run_id == run_id,
+                        BatchShardModel.shard_index == shard_index,
+                    ).update({"status": status}, synchronize_session=False)
+                    if status == RunStatus.FAILED:
+                        session.query(RunModel).filter(
+                            RunModel.id == run_id,
+                            RunModel.status == RunStatus.RUNNING,
+                        ).update(
+                            {
+                                "status": RunStatus.FAILED,
+                                "end_time": datetime.now(timezone.utc),
+                            },
+                            synchronize_session=False,
+                        )
+                    session.commit()
+                if status == RunStatus.FAILED:
+                    # The workers of the other shards cancel them when renewing
+                    # their leases
+                    get_job_queue().cancel(run_id)
+        if status != RunStatus.COMPLETED:
+            return
+
+    await asyncio.to_thread(merge_batch_shards, run_id, output_file_path)
+
+
+def merge_batch_shards(run_id: str, output_file_path: str) -> None:
+    """
+    Concatenate the part files of the shards of a batch run into its output file
+    and complete the run, once all its shards are completed.
+    """
+    with next(get_db()) as session:
+        # Shards completing at the same time merge one after the other, the lock
+        # is released if the process holding it dies
+        checkpoint = (
+            session.query(BatchCheckpointModel)
+            .filter(BatchCheckpointModel.run_id == run_id)
+            .with_for_update()
+            .first()
+        )
+        run = session.query(RunModel).filter(RunModel.id == run_id).first()
+        if checkpoint is None or run is None or run.status != RunStatus.RUNNING:
+            return
+        shards = (
+            session.query(BatchShardModel)
+            .filter(BatchShardModel.run_id == run_id)
+            .order_by(BatchShardModel.shard_index)
+            .all()
+        )
+        if any(shard.status != RunStatus.COMPLETED for shard in shards):
+            return
+
+        # Written next to the output file, so that readers never see a partial file
+        tmp_path = f"{output_file_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as output_file:
+                for shard in shards:
+                    # Only the outputs up to the last checkpoint of the shard
+                    remaining = shard.output_offset
+                    with open(shard.output_file_path, "rb") as part_file:
+                        while remaining > 0:
+                            block = part_file.read(min(remaining, 1 << 20))
+                            if not block:
+                                raise RuntimeError(
+                                    f"Output file of shard {shard.shard_index} of "
+                                    f"batch run {run_id} is truncated"
+                                )
+                            output_file.write(block)
+                            remaining -= len(block)
+                output_file.flush()
+                os.fsync(output_file.fileno())
+            os.replace(tmp_path, output_file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        checkpoint.rows_completed = sum(shard.rows_completed for shard in shards)
+        checkpoint.output_offset = sum(shard.output_offset for shard in shards)
+        part_file_paths = [shard.output_file_path for shard in shards]
+        run.status = RunStatus.COMPLETED
+        run.end_time = datetime.now(timezone.utc)
+        session.commit()
+
+    for part_file_path in part_file_paths:
+        if os.path.exists(part_file_path):
+            os.remove(part_file_path)
+
+
+def record_run_canceled(
+    run: RunModel, executor: WorkflowExecutor, db: Session
+) -> None:
+    run.status = RunStatus.CANCELED
+    run.end_time = datetime.now(timezone.utc)
+    run.llm_usage = executor.llm_usage.usage.model_dump()
+    db.commit()
+
+
+def _decode_base64_chunks(data_uri: str, start: int) -> Iterator[bytes]:
+    """
+    Decode the base64 payload of a data URI, starting at index start, one chunk
+    at a time, so that neither the payload nor the file is copied whole in memory.
+    """
+    carry = ""
+    for i in range(start, len(data_uri), EMBEDDED_FILE_CHUNK_CHARS):
+        chunk = carry + data_uri[i : i + EMBEDDED_FILE_CHUNK_CHARS]
+        if any(space in chunk for space in ("\n", "\r", " ", "\t")):
+            # Line breaks or spaces would shift the 4 character groups
+            chunk = re.sub(r"\s", "", chunk)
+        usable = len(chunk) - len(chunk) % 4
+        carry = chunk[usable:]
+        if usable:
+            yield base64.b64decode(chunk[:usable])
+    if carry:
+        yield base64.b64decode(carry + "=" * (-len(carry) % 4))
+
+
 def save_embedded_file(data_uri: str, workflow_id: str) -> str:
     """
     Save a file from a data URI and return its relative path.
-    Uses file content hash for the filename to avoid duplicates.
+    Uses file content hash for the filename to avoid duplicates, a file that
+    was already saved is not written again.
     """
-    # Extract the base64 data from the data URI
-    match = re.match(r"data:([^;]+);base64,(.+)", data_uri)
+    # Only the header is matched, the payload is decoded in chunks
+    header_end = data_uri.find(",", 0, 256)
+    match = header_end > 0 and re.fullmatch(
+        r"data:([^;]+);base64", data_uri[:header_end]
+    )
     if not match:
         raise ValueError("Invalid data URI format")
-
-    mime_type, base64_data = match.groups()
-    file_data = base64.b64decode(base64_data)
-
-    # Generate hash from file content
-    file_hash = hashlib.sha256(file_data).hexdigest()[:16]  # Use first 16 chars of hash
+    mime_type = match.group(1)
+    payload_start = header_end + 1
+    if payload_start == len(data_uri):
+        raise ValueError("Invalid data URI format")
 
     # Determine file extension from mime type
     ext_map = {
@@ -460,14 +1213,29 @@ def save_embedded_file(data_uri: str, workflow_id: str) -> str:
     }
     extension = ext_map.get(mime_type, "")
 
-    # Create filename and ensure directory exists
-    filename = f"{file_hash}{extension}"
     upload_dir = Path("data/run_files") / workflow_id
     upload_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save the file
+    # Generate hash from file content, nothing is written yet
+    sha256 = hashlib.sha256()
+    for file_data in _decode_base64_chunks(data_uri, payload_start):
+        sha256.update(file_data)
+    file_hash = sha256.hexdigest()[:16]  # Use first 16 chars of hash
+    filename = f"{file_hash}{extension}"
+
+    # Save the file, unless a file with the same content was saved before.
+    # It is written under a unique temporary name first, so that concurrent
+    # runs never read a partially written file
     file_path = upload_dir / filename
-    with open(file_path, "wb") as f:
-        f.write(file_data)
+    if not file_path.exists():
+        tmp_path = upload_dir / f".{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for file_data in _decode_base64_chunks(data_uri, payload_start):
+                    f.write(file_data)
+            os.replace(tmp_path, file_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
 
     return f"run_files/{workflow_id}/{filename}"
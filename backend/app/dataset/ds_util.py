@@ -1,45 +1,365 @@
-from typing import Any, Dict, Iterator, Set
+import hashlib
+import itertools
+import json
+import os
+import uuid
+from typing import Any, Collection, Dict, Iterator, List, Optional, Set
+
 import pandas as pd
 
+# Rows read from the file at a time, only one chunk is held in memory
+DATASET_CHUNK_ROWS = 10_000
+# JSONL files have no header, their columns are the keys of their first rows
+JSONL_SCHEMA_SAMPLE_ROWS = 1_000
+# The byte offset of every DATASET_INDEX_ROWS-th row of CSV and JSONL datasets is
+# recorded when they are profiled, readers seek to the nearest one before a row
+DATASET_INDEX_ROWS = 10_000
+
+
+def _check_format(file_path: str) -> None:
+    if not file_path.endswith((".csv", ".parquet", ".jsonl")):
+        raise ValueError(f"Unsupported file format: {file_path}")
+
 
 def get_ds_column_names(
     file_path: str,
 ) -> Set[str]:
     """
     Returns the column names of a pandas compatible dataset file.
+    Only the header (CSV), the schema (Parquet) or the first rows (JSONL) are read.
     """
+    _check_format(file_path)
     if file_path.endswith(".csv"):
-        df: pd.DataFrame = pd.read_csv(file_path)  # type: ignore
+        columns = pd.read_csv(file_path, nrows=0).columns  # type: ignore
     elif file_path.endswith(".parquet"):
-        df: pd.DataFrame = pd.read_parquet(file_path)
-    elif file_path.endswith(".jsonl"):
-        df: pd.DataFrame = pd.read_json(file_path, lines=True)  # type: ignore
+        import pyarrow.parquet as pq
+
+        columns = pq.read_schema(file_path).names
     else:
-        raise ValueError(f"Unsupported file format: {file_path}")
+        columns: List[str] = []
+        for row in _iter_jsonl(file_path, limit=JSONL_SCHEMA_SAMPLE_ROWS):
+            columns.extend(key for key in row if key not in columns)
 
     # make sure each column name is a string
-    df.columns = [str(col) for col in df.columns]
-
-    return set(df.columns)
+    return {str(col) for col in columns}
 
 
 def get_ds_iterator(
     file_path: str,
+    columns: Optional[Collection[str]] = None,
+    start_row: int = 0,
+    stop_row: Optional[int] = None,
+    row_offsets: Optional[Dict[str, Any]] = None,
 ) -> Iterator[Dict[str, Any]]:
     """
-    Returns an iterator over the rows of a pandas compatible dataset file.
+    Returns an iterator over the rows of a pandas compatible dataset file, from
+    start_row up to stop_row (excluded).
+    The file is streamed in chunks of DATASET_CHUNK_ROWS rows, and only the given
+    columns are read when columns is set.
+
+    Parquet files skip the row groups before start_row. CSV and JSONL files seek
+    to the nearest indexed row when given the row_offsets of their profile (see
+    DatasetProfiler), and are read from their first row otherwise.
     """
+    _check_format(file_path)
+    if file_path.endswith(".parquet"):
+        rows = _iter_parquet(file_path, columns, start_row)
+        start_row, stop_row = 0, _shift(stop_row, start_row)
+    elif row_offsets is not None and start_row >= row_offsets["interval"]:
+        indexed_row = min(
+            start_row // row_offsets["interval"], len(row_offsets["offsets"]) - 1
+        )
+        offset = row_offsets["offsets"][indexed_row]
+        if file_path.endswith(".csv"):
+            rows = _iter_csv(file_path, columns, offset)
+        else:
+            rows = _iter_jsonl_columns(file_path, columns, offset)
+        skipped_rows = indexed_row * row_offsets["interval"]
+        start_row, stop_row = start_row - skipped_rows, _shift(stop_row, skipped_rows)
+    elif file_path.endswith(".csv"):
+        rows = _iter_csv(file_path, columns)
+    else:
+        rows = _iter_jsonl_columns(file_path, columns)
+    if start_row or stop_row is not None:
+        rows = itertools.islice(rows, start_row, stop_row)
+    return rows
+
+
+def _shift(row: Optional[int], rows: int) -> Optional[int]:
+    return None if row is None else max(0, row - rows)
+
+
+def _iter_csv(
+    file_path: str, columns: Optional[Collection[str]], offset: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Parse a CSV file in chunks, from the record starting at the byte offset"""
+    with open(file_path, "rb") as f:
+        if offset:
+            # make sure each column name is a string
+            header = pd.read_csv(f, nrows=0).columns  # type: ignore
+            names = [str(col) for col in header]
+            f.seek(offset)
+            chunks = pd.read_csv(  # type: ignore
+                f,
+                header=None,
+                names=names,
+                chunksize=DATASET_CHUNK_ROWS,
+                usecols=list(columns) if columns is not None else None,
+            )
+        else:
+            chunks = pd.read_csv(  # type: ignore
+                f,
+                chunksize=DATASET_CHUNK_ROWS,
+                usecols=list(columns) if columns is not None else None,
+            )
+        for chunk in chunks:
+            # make sure each column name is a string
+            chunk.columns = [str(col) for col in chunk.columns]
+            yield from chunk.to_dict("records")  # type: ignore
+
+
+def _iter_parquet(
+    file_path: str, columns: Optional[Collection[str]], start_row: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Read a Parquet file in batches, from the row group holding start_row"""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(file_path)
+    for first_group in range(parquet_file.num_row_groups):
+        group_rows = parquet_file.metadata.row_group(first_group).num_rows
+        if start_row < group_rows:
+            break
+        start_row -= group_rows
+    else:
+        return
+    batches = parquet_file.iter_batches(
+        batch_size=DATASET_CHUNK_ROWS,
+        row_groups=range(first_group, parquet_file.num_row_groups),
+        columns=list(columns) if columns is not None else None,
+    )
+    rows = (row for batch in batches for row in batch.to_pylist())
+    yield from itertools.islice(rows, start_row, None)
+
+
+def _iter_jsonl_columns(
+    file_path: str, columns: Optional[Collection[str]], offset: int = 0
+) -> Iterator[Dict[str, Any]]:
+    for row in _iter_jsonl(file_path, offset=offset):
+        if columns is not None:
+            row = {col: row.get(col) for col in columns}
+        yield row
+
+
+def get_ds_row_count(file_path: str) -> int:
+    """
+    Returns the number of rows of a dataset file. Parquet files store it in their
+    metadata, CSV and JSONL files are read in chunks.
+    """
+    _check_format(file_path)
     if file_path.endswith(".csv"):
-        df: pd.DataFrame = pd.read_csv(file_path)  # type: ignore
+        chunks = pd.read_csv(file_path, chunksize=DATASET_CHUNK_ROWS, usecols=[0])  # type: ignore
+        return sum(len(chunk) for chunk in chunks)
     elif file_path.endswith(".parquet"):
-        df: pd.DataFrame = pd.read_parquet(file_path)
-    elif file_path.endswith(".jsonl"):
-        df: pd.DataFrame = pd.read_json(file_path, lines=True)  # type: ignore
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(file_path).metadata.num_rows
     else:
-        raise ValueError(f"Unsupported file format: {file_path}")
+        with open(file_path, "r", encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
 
-    # make sure each column name is a string
-    df.columns = [str(col) for col in df.columns]
 
-    for _, row in df.iterrows():  # type: ignore
-        yield row.to_dict()  # type: ignore
+def get_ds_hash(file_path: str) -> str:
+    """Returns the sha256 of a dataset file, read in blocks"""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def get_ds_column_types(file_path: str) -> Dict[str, str]:
+    """
+    Returns the type of each column of a dataset file: "int", "float", "bool",
+    "str", or "object" for the other values (e.g. nested JSON values).
+    Parquet files store them in their schema, for CSV and JSONL files they are
+    inferred from the first DATASET_CHUNK_ROWS rows.
+    """
+    _check_format(file_path)
+    if file_path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        column_types: Dict[str, str] = {}
+        for field in pq.read_schema(file_path):
+            if pa.types.is_integer(field.type):
+                column_types[field.name] = "int"
+            elif pa.types.is_floating(field.type):
+                column_types[field.name] = "float"
+            elif pa.types.is_boolean(field.type):
+                column_types[field.name] = "bool"
+            elif pa.types.is_string(field.type) or pa.types.is_large_string(
+                field.type
+            ):
+                column_types[field.name] = "str"
+            else:
+                column_types[field.name] = "object"
+        return column_types
+
+    if file_path.endswith(".csv"):
+        sample = pd.read_csv(file_path, nrows=DATASET_CHUNK_ROWS)  # type: ignore
+    else:
+        sample = pd.DataFrame.from_records(
+            list(_iter_jsonl(file_path, limit=DATASET_CHUNK_ROWS))
+        )
+    column_types = {}
+    for col in sample.columns:
+        values = sample[col].dropna()
+        if pd.api.types.is_bool_dtype(values):
+            column_types[str(col)] = "bool"
+        elif pd.api.types.is_integer_dtype(values):
+            column_types[str(col)] = "int"
+        elif pd.api.types.is_float_dtype(values):
+            # integers with missing values are read as floats
+            is_int = len(values) > 0 and bool((values % 1 == 0).all())
+            column_types[str(col)] = "int" if is_int else "float"
+        elif all(isinstance(value, str) for value in values):
+            column_types[str(col)] = "str"
+        else:
+            column_types[str(col)] = "object"
+    return column_types
+
+
+class DatasetProfiler:
+    """
+    Profiles a CSV or JSONL dataset from the blocks of bytes of its file, so that
+    a file is profiled in the same pass as it is written: its size, its number of
+    rows and the byte offset of every DATASET_INDEX_ROWS-th row.
+
+    CSV records end at the first line break outside of double quotes, blank
+    lines are skipped as pandas does.
+    """
+
+    def __init__(self, file_path: str):
+        _check_format(file_path)
+        self.is_csv = file_path.endswith(".csv")
+        self.size = 0
+        self.row_count = 0
+        self.row_offsets: List[int] = []
+        # The lines read so far that do not end a record yet
+        self._pending = bytearray()
+        self._pending_offset = 0
+        self._record_offset = 0
+        self._in_quotes = False
+        # The first record of a CSV file is its header
+        self._header_read = not self.is_csv
+
+    def update(self, block: bytes) -> None:
+        self.size += len(block)
+        self._pending.extend(block)
+        start = 0
+        while (end := self._pending.find(b"\n", start)) >= 0:
+            self._read_line(start, end + 1)
+            start = end + 1
+        del self._pending[:start]
+        self._pending_offset += start
+
+    def finish(self) -> None:
+        """Profile the last line, when the file does not end with a line break"""
+        if self._pending:
+            self._read_line(0, len(self._pending))
+            self._pending_offset += len(self._pending)
+            self._pending.clear()
+
+    def _read_line(self, start: int, end: int) -> None:
+        if self.is_csv and self._pending.count(b'"', start, end) % 2:
+            self._in_quotes = not self._in_quotes
+        if self._in_quotes:
+            return
+        record_offset = self._record_offset
+        self._record_offset = self._pending_offset + end
+        if (
+            record_offset == self._pending_offset + start
+            and not self._pending[start:end].strip()
+        ):
+            return
+        if not self._header_read:
+            self._header_read = True
+            return
+        if self.row_count % DATASET_INDEX_ROWS == 0:
+            self.row_offsets.append(record_offset)
+        self.row_count += 1
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        """The row offsets, as taken by get_ds_iterator"""
+        return {"interval": DATASET_INDEX_ROWS, "offsets": self.row_offsets}
+
+
+def convert_ds_to_parquet(file_path: str, parquet_path: str) -> None:
+    """
+    Convert a CSV or JSONL dataset file to Parquet, one row group per
+    DATASET_CHUNK_ROWS rows. The file is read twice: once to unify the types of
+    the columns over all the chunks (integers mixed with floats become floats,
+    columns missing from a chunk take the type of the others), then to write
+    them. Raises pyarrow.ArrowTypeError for columns whose types cannot be unified.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schemas = [
+        pa.Schema.from_pandas(chunk, preserve_index=False)
+        for chunk in _iter_frames(file_path)
+    ]
+    if not schemas:
+        schemas = [pa.schema([])]
+    schema = pa.unify_schemas(schemas, promote_options="permissive")
+
+    # Written next to the destination, so that readers never see a partial file
+    tmp_path = f"{parquet_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for chunk in _iter_frames(file_path):
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                )
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _iter_frames(file_path: str) -> Iterator[pd.DataFrame]:
+    """The chunks of a CSV or JSONL file, columns without values are null columns"""
+    if file_path.endswith(".csv"):
+        chunks = pd.read_csv(file_path, chunksize=DATASET_CHUNK_ROWS)  # type: ignore
+    else:
+        rows = _iter_jsonl(file_path)
+        chunks = (
+            pd.DataFrame.from_records(records)
+            for records in iter(
+                lambda: list(itertools.islice(rows, DATASET_CHUNK_ROWS)), []
+            )
+        )
+    for chunk in chunks:
+        # make sure each column name is a string
+        chunk.columns = [str(col) for col in chunk.columns]
+        for col in chunk.columns:
+            if chunk[col].isna().all():
+                chunk[col] = pd.Series([None] * len(chunk), dtype=object)
+        yield chunk
+
+
+def _iter_jsonl(
+    file_path: str, limit: Optional[int] = None, offset: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Parse a JSONL file one line at a time, from the line starting at the offset"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        f.seek(offset)
+        count = 0
+        for line in f:
+            if not line.strip():
+                continue
+            yield json.loads(line)
+            count += 1
+            if limit is not None and count >= limit:
+                return
@@ -0,0 +1,157 @@
+import itertools
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .ds_util import get_ds_iterator
+
+# Rows per row group of the Parquet files, also the rows held in memory while writing
+PARQUET_ROW_GROUP_ROWS = 10_000
+
+
+class OutputFormat(str, Enum):
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+
+
+class OutputWriter(ABC):
+    """
+    Streams output rows to a file, the file stays open until close().
+    Not thread-safe, a writer must be used by one thread at a time.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.rows_written = 0
+
+    @abstractmethod
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class JsonlOutputWriter(OutputWriter):
+    """
+    Appends rows to a JSONL file. The file is truncated to `offset` bytes when
+    opened, so that rows written after a checkpoint (see sync) are written again
+    instead of being duplicated.
+    """
+
+    def __init__(self, file_path: str, offset: int = 0, rows_written: int = 0):
+        super().__init__(file_path)
+        self._file = open(file_path, "ab")
+        self._file.truncate(offset)
+        self.offset = offset
+        self.rows_written = rows_written
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        data = b"".join((json.dumps(row) + "\n").encode("utf-8") for row in rows)
+        self._file.write(data)
+        self.offset += len(data)
+        self.rows_written += len(rows)
+
+    def sync(self) -> int:
+        """Flush the rows written so far to disk, returns the offset they end at"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self.offset
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetOutputWriter(OutputWriter):
+    """
+    Writes rows to a Parquet file with a pyarrow streaming writer, one row group
+    per PARQUET_ROW_GROUP_ROWS rows. The nested output of each node is flattened
+    one level, to a `node_id.field` column per output field.
+
+    The schema is inferred from the first row group unless given. The file is
+    only readable once the writer is closed.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        schema: Optional[Any] = None,
+        row_group_rows: int = PARQUET_ROW_GROUP_ROWS,
+    ):
+        super().__init__(file_path)
+        self.schema = schema
+        self.row_group_rows = row_group_rows
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer: Optional[Any] = None
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._buffer.extend(rows)
+        self.rows_written += len(rows)
+        while len(self._buffer) >= self.row_group_rows:
+            self._write_row_group(self._buffer[: self.row_group_rows])
+            self._buffer = self._buffer[self.row_group_rows :]
+
+    def _write_row_group(self, rows: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        if self._writer is None:
+            self.schema = table.schema
+            self._writer = pq.ParquetWriter(self.file_path, table.flatten().schema)
+        self._writer.write_table(table.flatten())
+
+    def close(self) -> None:
+        if self._buffer or self._writer is None:
+            self._write_row_group(self._buffer)
+            self._buffer = []
+        self._writer.close()
+
+
+def infer_jsonl_schema(file_path: str, chunk_rows: int = PARQUET_ROW_GROUP_ROWS) -> Any:
+    """
+    Returns the Arrow schema of the rows of a JSONL file, unified over all its rows:
+    a field that is null in some rows takes the type of the others, and integers
+    mixed with floats become floats. Raises pyarrow.ArrowTypeError for fields whose
+    types cannot be unified.
+    """
+    import pyarrow as pa
+
+    schemas = [
+        pa.Table.from_pylist(chunk).schema
+        for chunk in _chunks(get_ds_iterator(file_path), chunk_rows)
+    ]
+    if not schemas:
+        return pa.schema([])
+    return pa.unify_schemas(schemas, promote_options="permissive")
+
+
+def convert_jsonl_to_parquet(jsonl_path: str, parquet_path: str) -> None:
+    """Convert a JSONL output file to Parquet, streaming both files"""
+    schema = infer_jsonl_schema(jsonl_path)
+    # Written next to the destination, so that readers never see a partial file
+    tmp_path = f"{parquet_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with ParquetOutputWriter(tmp_path, schema=schema) as writer:
+            for chunk in _chunks(get_ds_iterator(jsonl_path), PARQUET_ROW_GROUP_ROWS):
+                writer.write_rows(chunk)
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(rows)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+# Time a call waits for other calls to join its batch
+BATCH_MAX_WAIT_SECONDS = 0.05
+
+RunBatchFn = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class BatchCollector:
+    """
+    Groups concurrent calls that share a key into a single batched call.
+
+    Rows of a batch run execute concurrently, each in its own workflow run. When
+    they reach the same batch-capable node, the collector hands their inputs to one
+    call of `run_batch` and returns each row its own output. A batch is started when
+    it reaches max_batch_size or when its first call has waited max_wait seconds.
+    An error in a batched call fails every row of that batch.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait: float = BATCH_MAX_WAIT_SECONDS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: Dict[Hashable, List[Tuple[Any, "asyncio.Future[Any]"]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: Set["asyncio.Task[None]"] = set()
+
+    async def submit(self, key: Hashable, run_batch: RunBatchFn, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Any]" = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(key, run_batch)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(
+                self.max_wait, self._flush, key, run_batch
+            )
+        return await future
+
+    def _flush(self, key: Hashable, run_batch: RunBatchFn) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch, run_batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(
+        self, batch: List[Tuple[Any, "asyncio.Future[Any]"]], run_batch: RunBatchFn
+    ) -> None:
+        try:
+            outputs = await run_batch([item for item, _ in batch])
+            if len(outputs) != len(batch):
+                raise ValueError(
+                    f"Batch function returned {len(outputs)} outputs for {len(batch)} inputs"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
+
+
+_current_collector: ContextVar[Optional[BatchCollector]] = ContextVar(
+    "batch_collector", default=None
+)
+
+
+def get_current_batch_collector() -> Optional[BatchCollector]:
+    return _current_collector.get()
+
+
+@contextmanager
+def collect_batches(max_batch_size: int) -> Iterator[BatchCollector]:
+    """
+    Make a new collector active for the enclosed block. Tasks started in the block,
+    e.g. the rows of a mini-batch, share it.
+    """
+    collector = BatchCollector(max_batch_size)
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)
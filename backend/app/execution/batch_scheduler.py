@@ -0,0 +1,64 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Results completed ahead of a slower earlier item, kept per call in flight
+REORDER_BUFFER_FACTOR = 4
+
+
+async def map_sliding_window(
+    items: Iterable[T],
+    fn: Callable[[T], Awaitable[R]],
+    window: int,
+    max_buffered: Optional[int] = None,
+) -> AsyncIterator[R]:
+    """
+    Call fn on each item with up to `window` calls in flight, a new call is started
+    as soon as one finishes instead of waiting for a whole group of calls.
+
+    Results are yielded in the order of the items. Results completed ahead of a
+    slower earlier item wait in a buffer of at most max_buffered results (by default
+    REORDER_BUFFER_FACTOR * window); while it is full no new item is started.
+    The items are read lazily. If a call fails, the other calls are canceled
+    and the error is raised.
+    """
+    if max_buffered is None:
+        max_buffered = REORDER_BUFFER_FACTOR * window
+    iterator = iter(items)
+    in_flight: Dict["asyncio.Future[R]", int] = {}
+    completed: Dict[int, R] = {}
+    next_start = 0
+    next_yield = 0
+    exhausted = False
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(in_flight) < window
+                and next_start - next_yield < window + max_buffered
+            ):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[asyncio.ensure_future(fn(item))] = next_start
+                next_start += 1
+
+            if not in_flight:
+                break
+            done, _ = await asyncio.wait(
+                in_flight.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                completed[in_flight.pop(future)] = future.result()
+            while next_yield in completed:
+                yield completed.pop(next_yield)
+                next_yield += 1
+    finally:
+        for future in in_flight:
+            future.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
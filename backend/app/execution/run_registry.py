@@ -0,0 +1,78 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Time limit in seconds of runs that do not set their own, unset means no limit
+RUN_TIMEOUT_SECONDS = (
+    float(os.environ["RUN_TIMEOUT_SECONDS"]) if os.getenv("RUN_TIMEOUT_SECONDS") else None
+)
+
+
+class RunCanceled(Exception):
+    """Raised by RunRegistry.run when the run was canceled or exceeded its time limit"""
+
+    pass
+
+
+class RunRegistry:
+    """
+    Tracks the runs executing in this process, so that they can be canceled.
+
+    Each run executes as its own asyncio task. Canceling the task cancels
+    whatever it awaits: the node tasks of its executor, the executors of nested
+    subworkflows and the pending LLM HTTP requests. Nodes interrupted this way
+    are recorded as canceled by the executor.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        self._cancel_reasons: Dict[str, str] = {}
+
+    async def run(
+        self, run_id: str, coro: Awaitable[T], timeout: Optional[float] = None
+    ) -> T:
+        """
+        Execute coro as the task of run_id, canceling it after timeout seconds.
+        Raises RunCanceled if the run is canceled through the registry or times out.
+        If the caller itself is canceled, the run is canceled with it.
+        """
+        task = asyncio.ensure_future(coro)
+        self._tasks[run_id] = task
+        timer = None
+        if timeout is not None:
+            timer = asyncio.get_running_loop().call_later(
+                timeout,
+                self.cancel,
+                run_id,
+                f"Run exceeded its time limit of {timeout} seconds",
+            )
+        try:
+            return await task
+        except asyncio.CancelledError:
+            reason = self._cancel_reasons.get(run_id)
+            if reason is None or not task.cancelled():
+                raise
+            raise RunCanceled(reason)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self._tasks.pop(run_id, None)
+            self._cancel_reasons.pop(run_id, None)
+
+    def cancel(self, run_id: str, reason: str = "Run was canceled") -> bool:
+        """Cancel the run, returns False if it is not executing in this process"""
+        task = self._tasks.get(run_id)
+        if task is None or task.done():
+            return False
+        self._cancel_reasons.setdefault(run_id, reason)
+        task.cancel()
+        return True
+
+    def is_running(self, run_id: str) -> bool:
+        task = self._tasks.get(run_id)
+        return task is not None and not task.done()
+
+
+run_registry = RunRegistry()
@@ -1,9 +1,10 @@
 from datetime import datetime
 from pydantic import BaseModel
+from ..schemas.usage_schemas import LLMUsageSchema
 from ..schemas.workflow_schemas import WorkflowDefinitionSchema
 from ..models.task_model import TaskModel, TaskStatus
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
 
 
 class TaskRecorder:
@@ -28,6 +29,39 @@ class TaskRecorder:
         self.tasks[node_id] = task
         return
 
+    def create_tasks(self, node_ids: Iterable[str]):
+        """Create the tasks of several nodes in a single commit"""
+        tasks = [
+            TaskModel(run_id=self.run_id, node_id=node_id, inputs={})
+            for node_id in node_ids
+        ]
+        self.db.add_all(tasks)
+        self.db.commit()
+        for task in tasks:
+            self.tasks[task.node_id] = task
+        return
+
+    def cancel_tasks(
+        self,
+        node_ids: List[str],
+        end_time: Optional[datetime] = None,
+        error: Optional[str] = None,
+    ):
+        """Mark the tasks of several nodes as canceled in a single commit"""
+        missing = [node_id for node_id in node_ids if node_id not in self.tasks]
+        if missing:
+            self.create_tasks(missing)
+        for node_id in node_ids:
+            task = self.tasks[node_id]
+            task.status = TaskStatus.CANCELED
+            if error:
+                task.error = error
+            if end_time:
+                task.end_time = end_time
+            self.db.add(task)
+        self.db.commit()
+        return
+
     def update_task(
         self,
         node_id: str,
@@ -38,6 +72,7 @@ class TaskRecorder:
         subworkflow: Optional[WorkflowDefinitionSchema] = None,
         subworkflow_output: Optional[Dict[str, BaseModel]] = None,
         end_time: Optional[datetime] = None,
+        llm_usage: Optional[LLMUsageSchema] = None,
     ):
         task = self.tasks.get(node_id)
         if not task:
@@ -59,10 +94,12 @@ class TaskRecorder:
                 k: (
                     [x.model_dump() if isinstance(x, BaseModel) else x for x in v]
                     if isinstance(v, list)
-                    else v.model_dump()
+                    else v.model_dump() if isinstance(v, BaseModel) else v
                 )
                 for k, v in subworkflow_output.items()
             }
+        if llm_usage and llm_usage.num_calls:
+            task.llm_usage = llm_usage.model_dump()
         self.db.add(task)
         self.db.commit()
         return
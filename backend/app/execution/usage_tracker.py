@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from ..schemas.usage_schemas import LLMCallUsageSchema, LLMUsageSchema
+
+
+class LLMUsageTracker:
+    """
+    Collects the LLM calls made while it is the active tracker.
+    Calls are forwarded to the parent tracker, so usage recorded inside a
+    node (including nested subworkflows) also counts towards its run.
+    """
+
+    def __init__(self, parent: Optional["LLMUsageTracker"] = None):
+        self.parent = parent
+        self.calls: List[LLMCallUsageSchema] = []
+        self.usage = LLMUsageSchema()
+
+    def record(self, call: LLMCallUsageSchema) -> None:
+        self.calls.append(call)
+        self.usage.add(call)
+        if self.parent is not None:
+            self.parent.record(call)
+
+
+_current_tracker: ContextVar[Optional[LLMUsageTracker]] = ContextVar(
+    "llm_usage_tracker", default=None
+)
+
+
+def get_current_tracker() -> Optional[LLMUsageTracker]:
+    return _current_tracker.get()
+
+
+@contextmanager
+def track_llm_usage(
+    tracker: Optional[LLMUsageTracker] = None,
+) -> Iterator[LLMUsageTracker]:
+    """
+    Make `tracker` the active tracker for the enclosed block.
+    If no tracker is given, a new one chained to the active tracker is created.
+    """
+    if tracker is None:
+        tracker = LLMUsageTracker(parent=get_current_tracker())
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+def record_llm_call(call: LLMCallUsageSchema) -> None:
+    """Record an LLM call on the active tracker, if any."""
+    tracker = get_current_tracker()
+    if tracker is not None:
+        tracker.record(call)
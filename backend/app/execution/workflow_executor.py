@@ -1,5 +1,7 @@
 import asyncio
+from collections import deque
 from datetime import datetime
+import os
 import traceback
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
@@ -13,11 +15,17 @@ from ..schemas.workflow_schemas import (
     WorkflowNodeSchema,
 )
 from .task_recorder import TaskRecorder, TaskStatus
+from .usage_tracker import LLMUsageTracker, get_current_tracker, track_llm_usage
+from .workflow_plan import get_workflow_plan
 from .workflow_execution_context import WorkflowExecutionContext
 
 
-class UpstreamFailure(Exception):
-    pass
+# Time limit in seconds of each node, unset means no limit
+NODE_TIMEOUT_SECONDS = (
+    float(os.environ["NODE_TIMEOUT_SECONDS"])
+    if os.getenv("NODE_TIMEOUT_SECONDS")
+    else None
+)
 
 
 class UnconnectedNode(Exception):
@@ -34,9 +42,12 @@ class WorkflowExecutor:
         workflow: WorkflowDefinitionSchema,
         task_recorder: Optional[TaskRecorder] = None,
         context: Optional[WorkflowExecutionContext] = None,
+        node_timeout: Optional[float] = NODE_TIMEOUT_SECONDS,
     ):
-        # Process subworkflows before initializing other attributes
-        self.workflow = self._process_subworkflows(workflow)
+        # The plan folds subworkflows into their parent nodes, it is shared by
+        # all executors of the same workflow definition
+        self._plan = get_workflow_plan(workflow)
+        self.workflow = self._plan.workflow
         if task_recorder:
             self.task_recorder = task_recorder
         elif context and context.run_id and context.db_session:
@@ -45,204 +56,200 @@ class WorkflowExecutor:
         else:
             self.task_recorder = None
         self.context = context
-        self._node_dict: Dict[str, WorkflowNodeSchema] = {}
+        self.node_timeout = node_timeout
+        self._node_dict: Dict[str, WorkflowNodeSchema] = self._plan.node_dict
         self.node_instances: Dict[str, BaseNode] = {}
-        self._dependencies: Dict[str, Set[str]] = {}
+        self._dependencies: Dict[str, Set[str]] = self._plan.dependencies
         self._node_tasks: Dict[str, asyncio.Task[Optional[BaseNodeOutput]]] = {}
         self._initial_inputs: Dict[str, Dict[str, Any]] = {}
         self._outputs: Dict[str, Optional[BaseNodeOutput]] = {}
+        self._node_usage: Dict[str, LLMUsageTracker] = {}
         self._failed_nodes: Set[str] = set()
-        self._build_node_dict()
-        self._build_dependencies()
-
-    def _process_subworkflows(
-        self, workflow: WorkflowDefinitionSchema
-    ) -> WorkflowDefinitionSchema:
-        # Group nodes by parent_id
-        nodes_by_parent: Dict[Optional[str], List[WorkflowNodeSchema]] = {}
-        for node in workflow.nodes:
-            parent_id = node.parent_id
-            if parent_id not in nodes_by_parent:
-                nodes_by_parent[parent_id] = []
-            node_copy = node.model_copy(update={"parent_id": None})
-            nodes_by_parent[parent_id].append(node_copy)
-
-        # Get root level nodes (no parent)
-        root_nodes = nodes_by_parent.get(None, [])
-
-        # Process each parent node's children into subworkflows
-        for parent_id, child_nodes in nodes_by_parent.items():
-            if parent_id is None:
-                continue
+        # LLM usage of the whole run, chained to the enclosing tracker (e.g. a parent subworkflow node)
+        self.llm_usage = LLMUsageTracker(parent=get_current_tracker())
+
+    def reset(self) -> None:
+        """Clear the state of the previous run, so the executor can run the workflow again"""
+        self._node_tasks = {}
+        self._initial_inputs = {}
+        self._outputs = {}
+        self._node_usage = {}
+        self._failed_nodes = set()
+        self.node_instances = {}
+
+    @property
+    def failed_nodes(self) -> Set[str]:
+        """Nodes of the last run that failed or were skipped due to an upstream failure"""
+        return self._failed_nodes
 
-            # Find the parent node in root nodes
-            parent_node = next(
-                (node for node in root_nodes if node.id == parent_id), None
-            )
-            if not parent_node:
-                continue
+    def _get_source_handles(self) -> Dict[Tuple[str, str], str]:
+        """Mapping of (source_id, target_id) -> source_handle for router nodes only, built once per plan"""
+        return self._plan.source_handles
 
-            # Get links between child nodes
-            child_node_ids = {node.id for node in child_nodes}
-            subworkflow_links = [
-                link
-                for link in workflow.links
-                if link.source_id in child_node_ids and link.target_id in child_node_ids
-            ]
-
-            # Create subworkflow
-            subworkflow = WorkflowDefinitionSchema(
-                nodes=child_nodes, links=subworkflow_links
-            )
+    def _prepare_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Build the input of a node whose predecessors are all resolved.
+        Returns None when the node does not run, after recording why: an upstream
+        failure, a canceled branch or missing inputs. Nothing is raised for these.
+        """
+        node = self._node_dict[node_id]
+        dependency_ids = self._dependencies.get(node_id, set())
 
-            # Update parent node's config with subworkflow
-            parent_node.config = {
-                **parent_node.config,
-                "subworkflow": subworkflow.model_dump(),
-            }
-
-        # Return new workflow with only root nodes
-        return WorkflowDefinitionSchema(
-            nodes=root_nodes,
-            links=[
-                link
-                for link in workflow.links
-                if not any(
-                    node.parent_id
-                    for node in workflow.nodes
-                    if node.id in (link.source_id, link.target_id)
+        # Check if any predecessor nodes failed
+        if any(dep_id in self._failed_nodes for dep_id in dependency_ids):
+            print(f"Node {node_id} skipped due to upstream failure")
+            self._failed_nodes.add(node_id)
+            self._outputs[node_id] = None
+            if self.task_recorder:
+                self.task_recorder.update_task(
+                    node_id=node_id,
+                    status=TaskStatus.CANCELED,
+                    end_time=datetime.now(),
+                    error="Upstream failure",
                 )
-            ],
-        )
-
-    def _build_node_dict(self):
-        self._node_dict = {node.id: node for node in self.workflow.nodes}
-
-    def _build_dependencies(self):
-        dependencies: Dict[str, Set[str]] = {
-            node.id: set() for node in self.workflow.nodes
-        }
-        for link in self.workflow.links:
-            dependencies[link.target_id].add(link.source_id)
-        self._dependencies = dependencies
-
-    def _get_source_handles(self) -> Dict[Tuple[str, str], str]:
-        """Build a mapping of (source_id, target_id) -> source_handle for router nodes only"""
-        source_handles: Dict[Tuple[str, str], str] = {}
-        for link in self.workflow.links:
-            source_node = self._node_dict[link.source_id]
-            if source_node.node_type == "RouterNode":
-                if not link.source_handle:
+            return None
+
+        predecessor_outputs = [self._outputs.get(dep_id) for dep_id in dependency_ids]
+        if node.node_type != "CoalesceNode" and any(
+            [output is None for output in predecessor_outputs]
+        ):
+            self._cancel_node(node_id)
+            return None
+
+        # Get source handles mapping
+        source_handles = self._get_source_handles()
+
+        # Build node input, handling router outputs specially
+        node_input: Dict[str, Any] = {}
+        for dep_id, output in zip(dependency_ids, predecessor_outputs):
+            predecessor_node = self._node_dict[dep_id]
+            if predecessor_node.node_type == "RouterNode":
+                # For router nodes, we must have a source handle
+                source_handle = source_handles.get((dep_id, node_id))
+                if not source_handle:
                     raise ValueError(
-                        f"Missing source_handle in link from router node {link.source_id} to {link.target_id}"
+                        f"Missing source_handle in link from router node {dep_id} to {node_id}"
                     )
-                source_handles[(link.source_id, link.target_id)] = link.source_handle
-        return source_handles
-
-    def _get_async_task_for_node_execution(
-        self, node_id: str
-    ) -> asyncio.Task[Optional[BaseNodeOutput]]:
-        if node_id in self._node_tasks:
-            return self._node_tasks[node_id]
-        # Start task for the node
-        task = asyncio.create_task(self._execute_node(node_id))
-        self._node_tasks[node_id] = task
-
-        # Record task
-        if self.task_recorder:
-            self.task_recorder.create_task(node_id, {})
-        return task
-
-    async def _execute_node(self, node_id: str) -> Optional[BaseNodeOutput]:
-        node = self._node_dict[node_id]
-        node_input = {}
-        try:
-            if node_id in self._outputs:
-                return self._outputs[node_id]
+                # Get the specific route's output from the router
+                route_output = getattr(output, source_handle, None)
+                if route_output is not None:
+                    node_input[dep_id] = route_output
+                else:
+                    self._cancel_node(node_id)
+                    return None
+            else:
+                node_input[dep_id] = output
+
+        # Special handling for InputNode - use initial inputs
+        if node.node_type == "InputNode":
+            node_input = self._initial_inputs.get(node_id, {})
+
+        # Only fail early for None inputs if it is NOT a CoalesceNode
+        if node.node_type != "CoalesceNode" and any(
+            [v is None for v in node_input.values()]
+        ):
+            self._outputs[node_id] = None
+            return None
+        elif node.node_type == "CoalesceNode" and all(
+            [v is None for v in node_input.values()]
+        ):
+            self._outputs[node_id] = None
+            return None
 
-            # Check if any predecessor nodes failed
-            dependency_ids = self._dependencies.get(node_id, set())
+        # Remove None values from input
+        return {k: v for k, v in node_input.items() if v is not None}
 
-            # Wait for dependencies
-            predecessor_outputs: List[Optional[BaseNodeOutput]] = []
-            if dependency_ids:
-                try:
-                    predecessor_outputs = await asyncio.gather(
-                        *(
-                            self._get_async_task_for_node_execution(dep_id)
-                            for dep_id in dependency_ids
-                        ),
-                    )
-                except Exception:
-                    raise UpstreamFailure(
-                        f"Node {node_id} skipped due to upstream failure"
-                    )
+    def _cancel_node(self, node_id: str) -> None:
+        """Mark a node on a branch that is not taken as canceled"""
+        self._outputs[node_id] = None
+        if self.task_recorder:
+            self.task_recorder.update_task(
+                node_id=node_id,
+                status=TaskStatus.CANCELED,
+                end_time=datetime.now(),
+            )
 
-            if any(dep_id in self._failed_nodes for dep_id in dependency_ids):
-                print(f"Node {node_id} skipped due to upstream failure")
-                self._failed_nodes.add(node_id)
-                raise UpstreamFailure(f"Node {node_id} skipped due to upstream failure")
+    def _collect_unselected_branches(
+        self, router_id: str, pending_dependencies: Dict[str, int]
+    ) -> List[str]:
+        """
+        The nodes that can no longer run once a router has resolved: the targets of
+        the routes it did not select and everything downstream of them, except
+        coalesce nodes that still have an input which may produce an output.
+        Only nodes in pending_dependencies (scheduled and not yet resolved) are returned.
+        """
+        router_output = self._outputs.get(router_id)
+        if router_output is None:
+            # A failed router is handled as an upstream failure
+            return []
+        source_handles = self._get_source_handles()
+
+        def is_dead_input(dep_id: str, node_id: str) -> bool:
+            if dep_id == router_id:
+                source_handle = source_handles.get((router_id, node_id))
+                return getattr(router_output, source_handle or "", None) is None
+            return dep_id in dead or (
+                dep_id in self._outputs and self._outputs[dep_id] is None
+            )
 
-            if node.node_type != "CoalesceNode" and any(
-                [output is None for output in predecessor_outputs]
+        dead: Set[str] = set()
+        stack = [
+            node_id
+            for node_id in self._plan.successors.get(router_id, set())
+            if is_dead_input(router_id, node_id)
+        ]
+        while stack:
+            node_id = stack.pop()
+            if node_id in dead or node_id not in pending_dependencies:
+                continue
+            if self._node_dict[node_id].node_type == "CoalesceNode" and not all(
+                is_dead_input(dep_id, node_id)
+                for dep_id in self._dependencies.get(node_id, set())
             ):
-                self._outputs[node_id] = None
-                if self.task_recorder:
-                    self.task_recorder.update_task(
-                        node_id=node_id,
-                        status=TaskStatus.CANCELED,
-                        end_time=datetime.now(),
-                    )
-                return None
-
-            # Get source handles mapping
-            source_handles = self._get_source_handles()
-
-            # Build node input, handling router outputs specially
-            for dep_id, output in zip(dependency_ids, predecessor_outputs):
-                predecessor_node = self._node_dict[dep_id]
-                if predecessor_node.node_type == "RouterNode":
-                    # For router nodes, we must have a source handle
-                    source_handle = source_handles.get((dep_id, node_id))
-                    if not source_handle:
-                        raise ValueError(
-                            f"Missing source_handle in link from router node {dep_id} to {node_id}"
-                        )
-                    # Get the specific route's output from the router
-                    route_output = getattr(output, source_handle, None)
-                    if route_output is not None:
-                        node_input[dep_id] = route_output
-                    else:
-                        self._outputs[node_id] = None
-                        if self.task_recorder:
-                            self.task_recorder.update_task(
-                                node_id=node_id,
-                                status=TaskStatus.CANCELED,
-                                end_time=datetime.now(),
-                            )
-                        return None
-                else:
-                    node_input[dep_id] = output
-
-            # Special handling for InputNode - use initial inputs
-            if node.node_type == "InputNode":
-                node_input = self._initial_inputs.get(node_id, {})
+                # Revisited if another of its inputs turns out to be dead
+                continue
+            dead.add(node_id)
+            stack.extend(self._plan.successors.get(node_id, set()))
+        return list(dead)
 
-            # Only fail early for None inputs if it is NOT a CoalesceNode
-            if node.node_type != "CoalesceNode" and any(
-                [v is None for v in node_input.values()]
-            ):
-                self._outputs[node_id] = None
-                return None
-            elif node.node_type == "CoalesceNode" and all(
-                [v is None for v in node_input.values()]
-            ):
-                self._outputs[node_id] = None
-                return None
+    def _cancel_nodes(self, node_ids: List[str], error: Optional[str] = None) -> None:
+        """Mark nodes that will not run as canceled, in one recorder update"""
+        for node_id in node_ids:
+            self._outputs[node_id] = None
+        if self.task_recorder and node_ids:
+            self.task_recorder.cancel_tasks(
+                node_ids, end_time=datetime.now(), error=error
+            )
 
-            # Remove None values from input
-            node_input = {k: v for k, v in node_input.items() if v is not None}
+    def _fail_node(self, node_id: str, node_input: Dict[str, Any]) -> None:
+        """Record the exception being handled as the failure of a node"""
+        node = self._node_dict[node_id]
+        error_msg = (
+            f"Node execution failed:\n"
+            f"Node ID: {node_id}\n"
+            f"Node Type: {node.node_type}\n"
+            f"Node Title: {node.title}\n"
+            f"Inputs: {node_input}\n"
+            f"Error: {traceback.format_exc()}"
+        )
+        print(error_msg)
+        self._failed_nodes.add(node_id)
+        self._outputs[node_id] = None
+        if self.task_recorder:
+            node_usage = self._node_usage.get(node_id)
+            self.task_recorder.update_task(
+                node_id=node_id,
+                status=TaskStatus.FAILED,
+                end_time=datetime.now(),
+                error=traceback.format_exc(limit=5),
+                llm_usage=node_usage.usage if node_usage else None,
+            )
 
+    async def _execute_node(
+        self, node_id: str, node_input: Dict[str, Any]
+    ) -> Optional[BaseNodeOutput]:
+        node = self._node_dict[node_id]
+        try:
             # update task recorder with inputs
             if self.task_recorder:
                 self.task_recorder.update_task(
@@ -272,8 +279,18 @@ class WorkflowExecutor:
                     subworkflow=node_instance.subworkflow,
                 )
 
-            # Execute node
-            output = await node_instance(node_input)
+            # Execute node, recording the LLM usage of the node
+            node_usage = LLMUsageTracker(parent=self.llm_usage)
+            self._node_usage[node_id] = node_usage
+            with track_llm_usage(node_usage):
+                try:
+                    output = await asyncio.wait_for(
+                        node_instance(node_input), self.node_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"Node {node_id} exceeded its time limit of {self.node_timeout} seconds"
+                    )
 
             # Update task recorder
             if self.task_recorder:
@@ -284,42 +301,122 @@ class WorkflowExecutor:
                     end_time=datetime.now(),
                     subworkflow=node_instance.subworkflow,
                     subworkflow_output=node_instance.subworkflow_output,
+                    llm_usage=node_usage.usage,
                 )
 
             # Store output
             self._outputs[node_id] = output
             return output
-        except UpstreamFailure as e:
-            self._failed_nodes.add(node_id)
+        except asyncio.CancelledError:
+            # The run was canceled or exceeded its time limit
             self._outputs[node_id] = None
             if self.task_recorder:
+                node_usage = self._node_usage.get(node_id)
                 self.task_recorder.update_task(
                     node_id=node_id,
                     status=TaskStatus.CANCELED,
                     end_time=datetime.now(),
-                    error="Upstream failure",
+                    error="Run canceled",
+                    llm_usage=node_usage.usage if node_usage else None,
                 )
-            raise e
+            raise
         except Exception as e:
-            error_msg = (
-                f"Node execution failed:\n"
-                f"Node ID: {node_id}\n"
-                f"Node Type: {node.node_type}\n"
-                f"Node Title: {node.title}\n"
-                f"Inputs: {node_input}\n"
-                f"Error: {traceback.format_exc()}"
-            )
-            print(error_msg)
-            self._failed_nodes.add(node_id)
-            if self.task_recorder:
-                self.task_recorder.update_task(
-                    node_id=node_id,
-                    status=TaskStatus.FAILED,
-                    end_time=datetime.now(),
-                    error=traceback.format_exc(limit=5),
-                )
+            self._fail_node(node_id, node_input)
             raise e
 
+    def _collect_nodes_to_schedule(self, nodes_to_run: Set[str]) -> Set[str]:
+        """The nodes to run, plus the ancestors they need that have no output yet"""
+        scheduled: Set[str] = set()
+        stack = list(nodes_to_run)
+        while stack:
+            node_id = stack.pop()
+            if node_id in scheduled:
+                continue
+            scheduled.add(node_id)
+            for dep_id in self._dependencies.get(node_id, set()):
+                if dep_id not in self._outputs and dep_id not in scheduled:
+                    stack.append(dep_id)
+        return scheduled
+
+    async def _schedule(self, nodes_to_run: Set[str]) -> None:
+        """
+        Run the nodes as soon as all of their predecessors are resolved.
+        Each node counts its unresolved predecessors, a resolved node decrements the
+        counters of its successors and the nodes reaching zero join the ready queue.
+        Only nodes that actually run get a task, skipped and canceled nodes are
+        resolved in place and their state propagates through the same counters.
+        When a router resolves, the branches it did not select are canceled at once.
+        """
+        scheduled = self._collect_nodes_to_schedule(nodes_to_run)
+        pending_dependencies = {
+            node_id: len(self._dependencies.get(node_id, set()) & scheduled)
+            for node_id in scheduled
+        }
+
+        # Record task
+        if self.task_recorder:
+            self.task_recorder.create_tasks(scheduled)
+
+        ready = deque(
+            node_id for node_id, count in pending_dependencies.items() if count == 0
+        )
+        running: Dict[asyncio.Task[Optional[BaseNodeOutput]], str] = {}
+        unresolved = set(scheduled)
+
+        def resolve(node_id: str) -> None:
+            unresolved.discard(node_id)
+            for successor_id in self._plan.successors.get(node_id, set()):
+                if successor_id in pending_dependencies:
+                    pending_dependencies[successor_id] -= 1
+                    if pending_dependencies[successor_id] == 0:
+                        ready.append(successor_id)
+
+        try:
+            while ready or running:
+                while ready:
+                    node_id = ready.popleft()
+                    try:
+                        node_input = self._prepare_node(node_id)
+                    except Exception:
+                        self._fail_node(node_id, {})
+                        node_input = None
+                    if node_input is None:
+                        resolve(node_id)
+                        continue
+                    task = asyncio.create_task(self._execute_node(node_id, node_input))
+                    self._node_tasks[node_id] = task
+                    running[task] = node_id
+
+                if not running:
+                    break
+                done, _ = await asyncio.wait(
+                    running.keys(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    node_id = running.pop(task)
+                    if not task.cancelled() and task.exception() is not None:
+                        print(f"Node {node_id} failed with error: {task.exception()}")
+                    if self._node_dict[node_id].node_type == "RouterNode":
+                        unselected = self._collect_unselected_branches(
+                            node_id, pending_dependencies
+                        )
+                        for unselected_id in unselected:
+                            del pending_dependencies[unselected_id]
+                        self._cancel_nodes(unselected)
+                        for unselected_id in unselected:
+                            resolve(unselected_id)
+                    resolve(node_id)
+        finally:
+            # The run itself was canceled, stop the nodes still running
+            # (they record their own cancellation) and cancel those not started
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            not_started = unresolved - set(running.values())
+            if not_started:
+                self._cancel_nodes(list(not_started), error="Run canceled")
+
     async def run(
         self,
         input: Dict[str, Any] = {},
@@ -384,21 +481,7 @@ class WorkflowExecutor:
         for node_id in nodes_to_run:
             self._outputs.pop(node_id, None)
 
-        # Start tasks for all nodes
-        for node_id in nodes_to_run:
-            self._get_async_task_for_node_execution(node_id)
-
-        # Wait for all tasks to complete, but don't propagate exceptions
-        results = await asyncio.gather(
-            *self._node_tasks.values(), return_exceptions=True
-        )
-
-        # Process results to handle any exceptions
-        for node_id, result in zip(self._node_tasks.keys(), results):
-            if isinstance(result, Exception):
-                print(f"Node {node_id} failed with error: {str(result)}")
-                self._failed_nodes.add(node_id)
-                self._outputs[node_id] = None
+        await self._schedule(nodes_to_run)
 
         # return the non-None outputs
         return {
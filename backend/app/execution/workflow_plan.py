@@ -0,0 +1,159 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..schemas.workflow_schemas import WorkflowDefinitionSchema, WorkflowNodeSchema
+
+
+class WorkflowPlan:
+    """
+    The parts of a workflow that do not change between runs: the workflow with
+    its child nodes folded into their parent's subworkflow, the node lookup,
+    the dependencies and successors of each node and the router source handles.
+
+    Plans are compiled once per workflow definition (see `get_workflow_plan`),
+    so executors and subworkflow nodes running the same definition share them.
+    A plan must not be mutated once compiled.
+    """
+
+    def __init__(self, workflow: WorkflowDefinitionSchema):
+        self.source = workflow
+        self.workflow = process_subworkflows(workflow)
+        self.node_dict: Dict[str, WorkflowNodeSchema] = {
+            node.id: node for node in self.workflow.nodes
+        }
+        self.dependencies: Dict[str, Set[str]] = {
+            node.id: set() for node in self.workflow.nodes
+        }
+        self.successors: Dict[str, Set[str]] = {
+            node.id: set() for node in self.workflow.nodes
+        }
+        for link in self.workflow.links:
+            self.dependencies[link.target_id].add(link.source_id)
+            self.successors[link.source_id].add(link.target_id)
+
+    @cached_property
+    def source_handles(self) -> Dict[Tuple[str, str], str]:
+        """Mapping of (source_id, target_id) -> source_handle for router nodes only"""
+        source_handles: Dict[Tuple[str, str], str] = {}
+        for link in self.workflow.links:
+            source_node = self.node_dict[link.source_id]
+            if source_node.node_type == "RouterNode":
+                if not link.source_handle:
+                    raise ValueError(
+                        f"Missing source_handle in link from router node {link.source_id} to {link.target_id}"
+                    )
+                source_handles[(link.source_id, link.target_id)] = link.source_handle
+        return source_handles
+
+    @cached_property
+    def input_node(self) -> Optional[WorkflowNodeSchema]:
+        return next(
+            (node for node in self.workflow.nodes if node.node_type == "InputNode"),
+            None,
+        )
+
+    @cached_property
+    def output_node(self) -> Optional[WorkflowNodeSchema]:
+        return next(
+            (node for node in self.workflow.nodes if node.node_type == "OutputNode"),
+            None,
+        )
+
+
+def process_subworkflows(workflow: WorkflowDefinitionSchema) -> WorkflowDefinitionSchema:
+    """
+    Fold the nodes that have a parent_id into the subworkflow config of their parent node.
+    The child workflow is stored as a schema object, so that the subworkflow node
+    receives the same object on every run and its own plan can be reused.
+    """
+    if not any(node.parent_id for node in workflow.nodes):
+        return workflow
+
+    # Group nodes by parent_id
+    nodes_by_parent: Dict[Optional[str], List[WorkflowNodeSchema]] = {}
+    for node in workflow.nodes:
+        node_copy = node.model_copy(update={"parent_id": None})
+        nodes_by_parent.setdefault(node.parent_id, []).append(node_copy)
+
+    # Get root level nodes (no parent)
+    root_nodes = nodes_by_parent.get(None, [])
+    root_nodes_by_id = {node.id: node for node in root_nodes}
+
+    # Process each parent node's children into subworkflows
+    for parent_id, child_nodes in nodes_by_parent.items():
+        if parent_id is None:
+            continue
+
+        # Find the parent node in root nodes
+        parent_node = root_nodes_by_id.get(parent_id)
+        if not parent_node:
+            continue
+
+        # Get links between child nodes
+        child_node_ids = {node.id for node in child_nodes}
+        subworkflow_links = [
+            link
+            for link in workflow.links
+            if link.source_id in child_node_ids and link.target_id in child_node_ids
+        ]
+
+        # Update parent node's config with subworkflow
+        parent_node.config = {
+            **parent_node.config,
+            "subworkflow": WorkflowDefinitionSchema(
+                nodes=child_nodes, links=subworkflow_links
+            ),
+        }
+
+    # Return new workflow with only root nodes
+    child_ids = {node.id for node in workflow.nodes if node.parent_id}
+    return WorkflowDefinitionSchema(
+        nodes=root_nodes,
+        links=[
+            link
+            for link in workflow.links
+            if link.source_id not in child_ids and link.target_id not in child_ids
+        ],
+    )
+
+
+# Number of compiled plans kept by content, for definitions that are rebuilt on
+# every run (node configs are revalidated on access, BestOfN builds its subworkflow)
+PLAN_CACHE_SIZE = 256
+_plan_cache: "OrderedDict[str, WorkflowPlan]" = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def get_workflow_plan(workflow: WorkflowDefinitionSchema) -> WorkflowPlan:
+    """
+    Return the plan of the workflow definition, compiling it on first use.
+    The plan is kept on the definition object itself, and by content so that
+    equal definitions built from scratch share the compiled plan.
+    """
+    plan = workflow._plan
+    # model_copy also copies the private attributes, the plan must belong to this object
+    if isinstance(plan, WorkflowPlan) and plan.source is workflow:
+        return plan
+
+    key = hashlib.sha256(workflow.model_dump_json().encode()).hexdigest()
+    with _plan_cache_lock:
+        compiled_plan = _plan_cache.get(key)
+        if compiled_plan is not None:
+            _plan_cache.move_to_end(key)
+    if compiled_plan is None:
+        compiled_plan = WorkflowPlan(workflow)
+        with _plan_cache_lock:
+            _plan_cache[key] = compiled_plan
+            while len(_plan_cache) > PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
+        plan = compiled_plan
+    else:
+        # Shares the compiled parts, which are never mutated
+        plan = copy.copy(compiled_plan)
+        plan.source = workflow
+    workflow._plan = plan
+    return plan
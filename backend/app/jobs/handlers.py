@@ -0,0 +1,30 @@
+from typing import Dict
+
+from .worker import JobHandler
+
+
+def get_job_handlers() -> Dict[str, JobHandler]:
+    """
+    The functions executing each job type, called with the payload of the job
+    as keyword arguments. Imported lazily, they live next to the endpoints that
+    enqueue them.
+    """
+    from ..api.evals_management import execute_eval_run
+    from ..api.rag_management import (
+        execute_document_collection_processing,
+        execute_vector_index_creation,
+    )
+    from ..api.workflow_run import (
+        execute_batch_run,
+        execute_batch_shard,
+        execute_workflow_run,
+    )
+
+    return {
+        "workflow_run": execute_workflow_run,
+        "batch_run": execute_batch_run,
+        "batch_shard": execute_batch_shard,
+        "eval_run": execute_eval_run,
+        "document_collection": execute_document_collection_processing,
+        "vector_index": execute_vector_index_creation,
+    }
@@ -0,0 +1,348 @@
+"""
+Durable queue of long running jobs, executed by worker processes (see worker.py).
+
+A worker claims a job by taking a lease on it and renews the lease while the job
+runs. When a worker dies, its lease expires and another worker claims the job
+again, up to max_attempts times. Jobs are stored in the database, several
+workers on different machines can share the queue.
+"""
+
+import itertools
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from ..models.job_model import JobModel, JobStatus
+
+# Number of times a job is claimed before it is failed, a job is only claimed
+# again when the worker running it stopped renewing its lease
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+class Job(BaseModel):
+    id: str
+    job_type: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class JobQueue(ABC):
+    @abstractmethod
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        resource_id: Optional[str] = None,
+    ) -> str:
+        """Add a job to the queue and return its id. The payload must be JSON serializable."""
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """Take the oldest queued job, or a job whose lease expired, if any"""
+        pass
+
+    @abstractmethod
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease of a running job. Returns False if the worker does not
+        hold the job anymore (it was canceled or claimed by another worker).
+        """
+        pass
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        pass
+
+    @abstractmethod
+    def cancel(self, resource_id: str) -> int:
+        """Cancel the queued and running jobs of a resource, returns their number"""
+        pass
+
+    @abstractmethod
+    def is_active(self, resource_id: str) -> bool:
+        """Whether a job of the resource is queued or held by a live worker"""
+        pass
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class DatabaseJobQueue(JobQueue):
+    """
+    Job queue stored in the jobs table. Claims use SELECT ... FOR UPDATE SKIP LOCKED,
+    so concurrent workers never claim the same job.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        resource_id: Optional[str] = None,
+    ) -> str:
+        with self.session_factory() as db:
+            job = JobModel(
+                job_type=job_type,
+                payload=payload,
+                resource_id=resource_id,
+                status=JobStatus.QUEUED,
+                attempts=0,
+                max_attempts=self.max_attempts,
+            )
+            db.add(job)
+            db.commit()
+            return job.id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        with self.session_factory() as db:
+            while True:
+                now = _now()
+                job = (
+                    db.query(JobModel)
+                    .filter(
+                        or_(
+                            JobModel.status == JobStatus.QUEUED,
+                            and_(
+                                JobModel.status == JobStatus.RUNNING,
+                                JobModel.lease_expires_at < now,
+                            ),
+                        )
+                    )
+                    .order_by(JobModel._intid)
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if job is None:
+                    return None
+                if job.attempts >= job.max_attempts:
+                    # The lease of the last attempt expired
+                    job.status = JobStatus.FAILED
+                    job.error = f"Job was interrupted {job.attempts} times"
+                    job.finished_at = now
+                    db.commit()
+                    continue
+                job.status = JobStatus.RUNNING
+                job.worker_id = worker_id
+                job.attempts += 1
+                job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+                job.started_at = now
+                db.commit()
+                return Job(
+                    id=job.id,
+                    job_type=job.job_type,
+                    payload=job.payload,
+                    attempts=job.attempts,
+                )
+
+    def _update_held(self, job_id: str, worker_id: str, **values: Any) -> bool:
+        with self.session_factory() as db:
+            updated = (
+                db.query(JobModel)
+                .filter(
+                    JobModel.id == job_id,
+                    JobModel.worker_id == worker_id,
+                    JobModel.status == JobStatus.RUNNING,
+                )
+                .update(values, synchronize_session=False)
+            )
+            db.commit()
+            return updated > 0
+
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return self._update_held(
+            job_id,
+            worker_id,
+            lease_expires_at=_now() + timedelta(seconds=lease_seconds),
+        )
+
+    def complete(self, job_id: str, worker_id: str) -> None:
+        self._update_held(
+            job_id, worker_id, status=JobStatus.COMPLETED, finished_at=_now()
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        self._update_held(
+            job_id, worker_id, status=JobStatus.FAILED, error=error, finished_at=_now()
+        )
+
+    def cancel(self, resource_id: str) -> int:
+        with self.session_factory() as db:
+            updated = (
+                db.query(JobModel)
+                .filter(
+                    JobModel.resource_id == resource_id,
+                    JobModel.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+                )
+                .update(
+                    {"status": JobStatus.CANCELED, "finished_at": _now()},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return updated
+
+    def is_active(self, resource_id: str) -> bool:
+        with self.session_factory() as db:
+            job = (
+                db.query(JobModel)
+                .filter(
+                    JobModel.resource_id == resource_id,
+                    or_(
+                        JobModel.status == JobStatus.QUEUED,
+                        and_(
+                            JobModel.status == JobStatus.RUNNING,
+                            JobModel.lease_expires_at >= _now(),
+                        ),
+                    ),
+                )
+                .first()
+            )
+            return job is not None
+
+
+class InMemoryJobQueue(JobQueue):
+    """
+    Job queue kept in the memory of the current process, with the same semantics
+    as DatabaseJobQueue. Used in tests, jobs are lost when the process exits.
+    """
+
+    def __init__(self, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        resource_id: Optional[str] = None,
+    ) -> str:
+        with self._lock:
+            job_id = f"J{next(self._ids)}"
+            self.jobs[job_id] = {
+                "job_type": job_type,
+                "payload": payload,
+                "resource_id": resource_id,
+                "status": JobStatus.QUEUED,
+                "attempts": 0,
+                "worker_id": None,
+                "lease_expires_at": None,
+                "error": None,
+            }
+            return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        with self._lock:
+            now = _now()
+            for job_id, job in self.jobs.items():
+                claimable = job["status"] == JobStatus.QUEUED or (
+                    job["status"] == JobStatus.RUNNING
+                    and job["lease_expires_at"] < now
+                )
+                if not claimable:
+                    continue
+                if job["attempts"] >= self.max_attempts:
+                    job["status"] = JobStatus.FAILED
+                    job["error"] = f"Job was interrupted {job['attempts']} times"
+                    continue
+                job["status"] = JobStatus.RUNNING
+                job["worker_id"] = worker_id
+                job["attempts"] += 1
+                job["lease_expires_at"] = now + timedelta(seconds=lease_seconds)
+                return Job(
+                    id=job_id,
+                    job_type=job["job_type"],
+                    payload=job["payload"],
+                    attempts=job["attempts"],
+                )
+            return None
+
+    def _update_held(self, job_id: str, worker_id: str, **values: Any) -> bool:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if (
+                job is None
+                or job["worker_id"] != worker_id
+                or job["status"] != JobStatus.RUNNING
+            ):
+                return False
+            job.update(values)
+            return True
+
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return self._update_held(
+            job_id,
+            worker_id,
+            lease_expires_at=_now() + timedelta(seconds=lease_seconds),
+        )
+
+    def complete(self, job_id: str, worker_id: str) -> None:
+        self._update_held(job_id, worker_id, status=JobStatus.COMPLETED)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        self._update_held(job_id, worker_id, status=JobStatus.FAILED, error=error)
+
+    def cancel(self, resource_id: str) -> int:
+        with self._lock:
+            canceled: List[Dict[str, Any]] = [
+                job
+                for job in self.jobs.values()
+                if job["resource_id"] == resource_id
+                and job["status"] in (JobStatus.QUEUED, JobStatus.RUNNING)
+            ]
+            for job in canceled:
+                job["status"] = JobStatus.CANCELED
+            return len(canceled)
+
+    def is_active(self, resource_id: str) -> bool:
+        with self._lock:
+            now = _now()
+            return any(
+                job["resource_id"] == resource_id
+                and (
+                    job["status"] == JobStatus.QUEUED
+                    or (
+                        job["status"] == JobStatus.RUNNING
+                        and job["lease_expires_at"] >= now
+                    )
+                )
+                for job in self.jobs.values()
+            )
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """The job queue of the process, stored in the database unless replaced with set_job_queue"""
+    global _job_queue
+    if _job_queue is None:
+        from ..database import SessionLocal
+
+        _job_queue = DatabaseJobQueue(SessionLocal)
+    return _job_queue
+
+
+def set_job_queue(queue: JobQueue) -> None:
+    global _job_queue
+    _job_queue = queue
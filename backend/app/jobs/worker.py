@@ -0,0 +1,186 @@
+"""
+Worker process executing the jobs of the queue: workflow runs, batch runs,
+evals and knowledge base processing. Start any number of them, on one or
+more machines sharing the database:
+
+    python -m app.jobs.worker
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import threading
+import traceback
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from .queue import Job, JobQueue
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+
+JobHandler = Callable[..., Awaitable[None]]
+
+
+class JobWorker:
+    """
+    Claims jobs from the queue and runs up to `concurrency` of them at a time.
+    The leases of running jobs are renewed every third of their duration, a job
+    whose lease cannot be renewed (it was canceled, or claimed by another worker
+    after this one stalled) is canceled.
+
+    The queue is called from threads, and the leases are renewed by a thread of
+    their own, so that a job blocking the event loop does not lose its lease.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        worker_id: Optional[str] = None,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self._running: Dict[str, "asyncio.Task[None]"] = {}
+        # Guards _running, which the renewal thread reads
+        self._running_lock = threading.Lock()
+        self._stopping = asyncio.Event()
+        self._renewal_stopping = threading.Event()
+        self._slot_freed = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop claiming jobs, run() returns once the running jobs are finished"""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        self._renewal_stopping.clear()
+        renewal_thread = threading.Thread(
+            target=self._renew_leases,
+            args=(asyncio.get_running_loop(),),
+            name=f"lease-renewal-{self.worker_id}",
+            daemon=True,
+        )
+        renewal_thread.start()
+        try:
+            while not self._stopping.is_set():
+                job = None
+                if len(self._running) < self.concurrency:
+                    try:
+                        job = await asyncio.to_thread(
+                            self.queue.claim, self.worker_id, self.lease_seconds
+                        )
+                    except Exception:
+                        print(f"Could not claim a job:\n{traceback.format_exc()}")
+                if job is not None:
+                    self._start(job)
+                    continue
+                # Wait for a free slot, a new job or a stop request
+                self._slot_freed.clear()
+                waiters = [
+                    asyncio.create_task(self._slot_freed.wait()),
+                    asyncio.create_task(self._stopping.wait()),
+                ]
+                await asyncio.wait(
+                    waiters,
+                    timeout=self.poll_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for waiter in waiters:
+                    waiter.cancel()
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+        finally:
+            self._renewal_stopping.set()
+            for task in list(self._running.values()):
+                task.cancel()
+            await asyncio.to_thread(renewal_thread.join)
+
+    def _start(self, job: Job) -> None:
+        print(f"Worker {self.worker_id} starting job {job.id} ({job.job_type})")
+        task = asyncio.create_task(self._execute(job))
+        with self._running_lock:
+            self._running[job.id] = task
+
+    async def _execute(self, job: Job) -> None:
+        try:
+            handler = self.handlers.get(job.job_type)
+            if handler is None:
+                raise ValueError(f"No handler for job type {job.job_type}")
+            await handler(**job.payload)
+        except asyncio.CancelledError:
+            # The job was canceled, its state is owned by whoever canceled it
+            print(f"Job {job.id} was canceled")
+        except Exception:
+            print(f"Job {job.id} failed:\n{traceback.format_exc()}")
+            await asyncio.to_thread(
+                self.queue.fail,
+                job.id,
+                self.worker_id,
+                traceback.format_exc(limit=5),
+            )
+        else:
+            await asyncio.to_thread(self.queue.complete, job.id, self.worker_id)
+        finally:
+            with self._running_lock:
+                self._running.pop(job.id, None)
+            self._slot_freed.set()
+
+    def _renew_leases(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Body of the renewal thread, runs until run() returns"""
+        while not self._renewal_stopping.wait(self.lease_seconds / 3):
+            with self._running_lock:
+                running = list(self._running.items())
+            for job_id, task in running:
+                try:
+                    renewed = self.queue.renew(
+                        job_id, self.worker_id, self.lease_seconds
+                    )
+                except Exception:
+                    # Retried on the next iteration, well before the lease expires
+                    print(
+                        f"Could not renew the lease of job {job_id}:\n"
+                        f"{traceback.format_exc()}"
+                    )
+                    continue
+                if not renewed:
+                    print(f"Lost the lease of job {job_id}, canceling it")
+                    loop.call_soon_threadsafe(task.cancel)
+
+
+async def run_worker(worker: JobWorker) -> None:
+    """Run the worker until SIGINT or SIGTERM, then let the running jobs finish"""
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, worker.stop)
+        except NotImplementedError:  # Windows
+            pass
+    await worker.run()
+
+
+def main() -> None:
+    from ..nodes.registry import NodeRegistry
+    from .handlers import get_job_handlers
+    from .queue import get_job_queue
+
+    NodeRegistry.discover_nodes()
+    worker = JobWorker(get_job_queue(), get_job_handlers())
+    print(
+        f"Worker {worker.worker_id} started, running up to {worker.concurrency} jobs at a time"
+    )
+    asyncio.run(run_worker(worker))
+
+
+if __name__ == "__main__":
+    main()
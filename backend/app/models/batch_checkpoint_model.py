@@ -0,0 +1,32 @@
+from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, timezone
+from typing import Any
+from .base_model import BaseModel
+
+
+class BatchCheckpointModel(BaseModel):
+    """
+    Progress of a batch run, used to resume it after an interruption.
+
+    The outputs of a batch run are written in the order of the dataset rows, so
+    the completed rows are the first rows_completed rows of the dataset, and
+    their outputs the first output_offset bytes of the output file.
+    """
+
+    __tablename__ = "batch_checkpoints"
+
+    run_id: Mapped[str] = mapped_column(
+        String, ForeignKey("runs.id"), primary_key=True
+    )
+    # sha256 of the dataset file, rows are only skipped if the file is unchanged
+    dataset_hash: Mapped[str] = mapped_column(String, nullable=False)
+    rows_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_offset: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # Payload of the batch_run job, enqueued again to resume the run
+    job_payload: Mapped[Any] = mapped_column(JSON, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Integer, String, Float, Enum, ForeignKey, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Any, Optional
+from .base_model import BaseModel
+from .run_model import RunStatus
+
+
+class BatchResultModel(BaseModel):
+    """
+    Result of one dataset row of a batch run, written alongside the output file
+    so that the progress and the results of a batch run can be queried in SQL.
+    """
+
+    __tablename__ = "batch_results"
+
+    run_id: Mapped[str] = mapped_column(
+        String, ForeignKey("runs.id"), primary_key=True
+    )
+    # Position of the row in the dataset, and of its line in the output file
+    row_index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    child_run_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    status: Mapped[RunStatus] = mapped_column(Enum(RunStatus), nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Duration of the row in seconds
+    latency: Mapped[float] = mapped_column(Float, nullable=False)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Fields of the output node's output_schema, e.g. {"score": 4, "label": "spam"}
+    outputs: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
@@ -0,0 +1,39 @@
+from sqlalchemy import BigInteger, Integer, String, DateTime, Enum, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, timezone
+from typing import Optional
+from .base_model import BaseModel
+from .run_model import RunStatus
+
+
+class BatchShardModel(BaseModel):
+    """
+    A range of rows of a sharded batch run, executed by its own batch_shard job.
+
+    The outputs of a shard are written to its own part file, the part files are
+    concatenated into the output file of the batch run once all its shards are
+    completed. Like the checkpoint of an unsharded batch run, rows_completed and
+    output_offset let an interrupted shard skip the rows it completed.
+    """
+
+    __tablename__ = "batch_shards"
+
+    run_id: Mapped[str] = mapped_column(
+        String, ForeignKey("runs.id"), primary_key=True
+    )
+    shard_index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Rows start_row to stop_row (excluded) of the dataset
+    start_row: Mapped[int] = mapped_column(Integer, nullable=False)
+    stop_row: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[RunStatus] = mapped_column(Enum(RunStatus), nullable=False)
+    # Token of the batch_shard job allowed to run the shard, the jobs enqueued
+    # with an older token exit without running it
+    job_token: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    output_file_path: Mapped[str] = mapped_column(String, nullable=False)
+    rows_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_offset: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
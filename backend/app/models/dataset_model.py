@@ -1,5 +1,5 @@
-from typing import Optional
-from sqlalchemy import Computed, Integer, String, DateTime
+from typing import Any, Dict, Optional
+from sqlalchemy import BigInteger, Computed, Integer, String, DateTime, JSON
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, timezone
 from .base_model import BaseModel
@@ -18,3 +18,15 @@ class DatasetModel(BaseModel):
     uploaded_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now(timezone.utc)
     )
+    # Profile of the file, recorded at upload
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    row_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # e.g. {"question": "str", "score": "float"}, see get_ds_column_types
+    column_types: Mapped[Optional[Dict[str, str]]] = mapped_column(
+        JSON, nullable=True
+    )
+    # Byte offsets of every n-th row of CSV and JSONL files, e.g.
+    # {"interval": 10000, "offsets": [35, 581273, ...]}, see get_ds_iterator
+    row_offsets: Mapped[Optional[Dict[str, Any]]] = mapped_column(
+        JSON, nullable=True
+    )
@@ -0,0 +1,50 @@
+from sqlalchemy import Computed, Integer, String, DateTime, Enum, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from enum import Enum as PyEnum
+from datetime import datetime, timezone
+from typing import Optional, Any
+from .base_model import BaseModel
+
+
+class JobStatus(PyEnum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELED = "CANCELED"
+
+
+class JobModel(BaseModel):
+    """A long running job (e.g. a workflow run) waiting for or executed by a worker"""
+
+    __tablename__ = "jobs"
+
+    _intid: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement="auto")
+    id: Mapped[str] = mapped_column(
+        String, Computed("'J' || _intid"), nullable=False, unique=True
+    )
+    job_type: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[Any] = mapped_column(JSON, nullable=False)
+    # Id of the run, eval run, collection or index the job works on
+    resource_id: Mapped[Optional[str]] = mapped_column(
+        String, nullable=True, index=True
+    )
+    status: Mapped[JobStatus] = mapped_column(
+        Enum(JobStatus), default=JobStatus.QUEUED, nullable=False, index=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    worker_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
@@ -16,6 +16,10 @@ from app.models.dataset_model import DatasetModel  # type: ignore
 from app.models.base_model import BaseModel
 from app.models.eval_run_model import EvalRunModel  # type: ignore
 from app.models.dc_and_vi_model import DocumentCollectionModel, VectorIndexModel  # type: ignore
+from app.models.job_model import JobModel  # type: ignore
+from app.models.batch_checkpoint_model import BatchCheckpointModel  # type: ignore
+from app.models.batch_result_model import BatchResultModel  # type: ignore
+from app.models.batch_shard_model import BatchShardModel  # type: ignore
 
 # Import database URL
 from app.database import DATABASE_URL
@@ -0,0 +1,27 @@
+"""track-run-cancellation
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 14:02:17.529841
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Update RunStatus enum type
+    op.execute("ALTER TYPE runstatus ADD VALUE IF NOT EXISTS 'CANCELED'")
+
+
+def downgrade() -> None:
+    # Enum values cannot be removed from a postgres type
+    pass
@@ -21,6 +21,7 @@ class RunStatus(PyEnum):
     RUNNING = "RUNNING"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    CANCELED = "CANCELED"
 
 
 class RunModel(BaseModel):
@@ -54,9 +55,14 @@ class RunModel(BaseModel):
     )
     end_time: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     outputs: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    llm_usage: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
     output_file_id: Mapped[Optional[str]] = mapped_column(
         String, ForeignKey("output_files.id"), nullable=True
     )
+    # Progress of batch runs, maintained by the batch runner
+    total_rows: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    completed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     tasks: Mapped[List["TaskModel"]] = relationship(
         "TaskModel", cascade="all, delete-orphan"
     )
@@ -71,27 +77,3 @@ class RunModel(BaseModel):
     output_file: Mapped[Optional["OutputFileModel"]] = relationship(
         "OutputFileModel", back_populates="run"
     )
-
-    @property
-    def percentage_complete(self) -> Optional[float]:
-        if self.status == RunStatus.PENDING:
-            return 0.0
-        elif self.status == RunStatus.COMPLETED:
-            return 1.0
-        elif self.status == RunStatus.FAILED:
-            return 0.0
-        elif self.initial_inputs:
-            return 0.5
-        elif self.input_dataset_id:
-            # return percentage of subruns completed
-            return (
-                1.0
-                * len(
-                    [
-                        subrun
-                        for subrun in self.subruns
-                        if subrun.status == RunStatus.COMPLETED
-                    ]
-                )
-                / (1.0 * len(self.subruns))
-            )
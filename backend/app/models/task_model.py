@@ -46,6 +46,7 @@ class TaskModel(BaseModel):
     end_time: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     subworkflow: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
     subworkflow_output: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    llm_usage: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
 
     # Relationships
     parent_task = relationship("TaskModel", remote_side=[id], back_populates="subtasks")
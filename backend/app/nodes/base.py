@@ -218,7 +218,13 @@ class BaseNode(ABC):
         result = await self.run(input)
 
         try:
-            output_validated = self.output_model.model_validate(result.model_dump())
+            if isinstance(result, self.output_model):
+                # Already validated by the node, avoid a dump/validate round-trip
+                output_validated = result
+            else:
+                output_validated = self.output_model.model_validate(
+                    result.model_dump()
+                )
         except AttributeError:
             output_validated = self.output_model.model_validate(result)
         except Exception as e:
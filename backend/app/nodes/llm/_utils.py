@@ -1,9 +1,11 @@
 # type: ignore
+import asyncio
 import base64
 import json
 import logging
 import os
-import re
+import time
+from contextvars import ContextVar
 from typing import Any, Callable, Dict, List, Optional
 from docx2python import docx2python
 
@@ -12,9 +14,21 @@ from dotenv import load_dotenv
 from litellm import acompletion
 from ollama import AsyncClient
 from pydantic import BaseModel, Field
-from tenacity import AsyncRetrying, stop_after_attempt, wait_random_exponential
+from pydantic_core import from_json
+from tenacity import (
+    AsyncRetrying,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
-from ...utils.file_utils import encode_file_to_base64_data_url
+from ...execution.usage_tracker import record_llm_call
+from ...schemas.usage_schemas import LLMCallUsageSchema
+from ...utils.file_utils import (
+    data_url_cache,
+    encode_file_to_base64_data_url,
+    encode_text_to_base64_data_url,
+)
 from ...utils.path_utils import resolve_file_path, is_external_url
 from ...utils.mime_types_utils import get_mime_type_for_url
 
@@ -130,6 +144,10 @@ def create_messages_with_images(
     return messages
 
 
+# Attempt number of the retried call currently executing, used for usage accounting
+_retry_attempt: ContextVar[int] = ContextVar("retry_attempt", default=1)
+
+
 def async_retry(*dargs, **dkwargs):
     def decorator(f: Callable) -> Callable:
         r = AsyncRetrying(*dargs, **dkwargs)
@@ -137,7 +155,11 @@ def async_retry(*dargs, **dkwargs):
         async def wrapped_f(*args, **kwargs):
             async for attempt in r:
                 with attempt:
-                    return await f(*args, **kwargs)
+                    token = _retry_attempt.set(attempt.retry_state.attempt_number)
+                    try:
+                        return await f(*args, **kwargs)
+                    finally:
+                        _retry_attempt.reset(token)
 
         return wrapped_f
 
@@ -147,19 +169,20 @@ def async_retry(*dargs, **dkwargs):
 @async_retry(
     wait=wait_random_exponential(min=30, max=120),
     stop=stop_after_attempt(3),
-    retry=lambda e: not isinstance(
-        e,
+    retry=retry_if_not_exception_type(
         (
             litellm.exceptions.AuthenticationError,
             ValueError,
             litellm.exceptions.RateLimitError,
-        ),
+            asyncio.CancelledError,
+        )
     ),
 )
 async def completion_with_backoff(**kwargs) -> str:
     """
     Calls the LLM completion endpoint with backoff.
     Supports Azure OpenAI, standard OpenAI, or Ollama based on the model name.
+    Token usage and latency of the call are recorded on the active usage tracker.
     """
     try:
         model = kwargs.get("model", "")
@@ -173,7 +196,9 @@ async def completion_with_backoff(**kwargs) -> str:
             azure_kwargs = setup_azure_configuration(kwargs)
             logging.info(f"Using Azure config for model: {azure_kwargs['model']}")
             try:
+                start_time = time.perf_counter()
                 response = await acompletion(**azure_kwargs, drop_params=True)
+                _record_completion_usage(model, response, start_time)
                 return response.choices[0].message.content
             except Exception as e:
                 logging.error(f"Error calling Azure OpenAI: {e}")
@@ -181,12 +206,12 @@ async def completion_with_backoff(**kwargs) -> str:
 
         elif model.startswith("ollama/"):
             logging.info("=== Ollama Configuration ===")
-            response = await acompletion(**kwargs, drop_params=True)
-            return response.choices[0].message.content
         else:
             logging.info("=== Standard Configuration ===")
-            response = await acompletion(**kwargs, drop_params=True)
-            return response.choices[0].message.content
+        start_time = time.perf_counter()
+        response = await acompletion(**kwargs, drop_params=True)
+        _record_completion_usage(model, response, start_time)
+        return response.choices[0].message.content
 
     except Exception as e:
         logging.error("=== LLM Request Error ===")
@@ -204,6 +229,27 @@ async def completion_with_backoff(**kwargs) -> str:
         raise e
 
 
+def _record_completion_usage(model: str, response: Any, start_time: float) -> None:
+    """
+    Record the token usage reported by a litellm completion response.
+    """
+    usage = getattr(response, "usage", None)
+    prompt_details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(prompt_details, "cached_tokens", None) or getattr(
+        usage, "cache_read_input_tokens", None
+    )
+    record_llm_call(
+        LLMCallUsageSchema(
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_tokens", None) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", None) or 0,
+            cached_tokens=cached_tokens or 0,
+            latency=time.perf_counter() - start_time,
+            retries=_retry_attempt.get() - 1,
+        )
+    )
+
+
 def sanitize_json_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
     """
     Makes a JSON schema compatible with the LLM providers.
@@ -232,6 +278,11 @@ async def generate_text(
     url_variables: Optional[Dict[str, str]] = None,
     output_json_schema: Optional[str] = None,
 ) -> str:
+    """
+    Generate a completion and return it as a JSON string.
+    Responses of models with JSON support are returned without being parsed here,
+    use parse_json_output to recover from malformed or truncated JSON.
+    """
     kwargs = {
         "model": model_name,
         "max_tokens": max_tokens,
@@ -339,18 +390,17 @@ async def generate_text(
                                     file_path = resolve_file_path(url)
                                     logging.info(f"Reading file from: {file_path}")
 
-                                    # Check if file is a DOCX file
+                                    # DOCX files are converted to XML, other files are encoded as is.
+                                    # Encoded files are cached by content hash and encoded off the event loop.
                                     if str(file_path).lower().endswith(".docx"):
-                                        # Convert DOCX to XML
-                                        xml_content = convert_docx_to_xml(
-                                            str(file_path)
-                                        )
-                                        # Encode the XML content directly
-                                        data_url = f"data:text/xml;base64,{base64.b64encode(xml_content.encode()).decode()}"
+                                        encoder = encode_docx_to_xml_data_url
                                     else:
-                                        data_url = encode_file_to_base64_data_url(
-                                            str(file_path)
-                                        )
+                                        encoder = encode_file_to_base64_data_url
+                                    data_url = await asyncio.to_thread(
+                                        data_url_cache.get_or_encode,
+                                        str(file_path),
+                                        encoder,
+                                    )
 
                                     content.append(
                                         {
@@ -375,57 +425,38 @@ async def generate_text(
 
     # For models that don't support JSON output, wrap the response in a JSON structure
     if not supports_json:
-        sanitized_response = response.replace('"', '\\"').replace("\n", "\\n")
-        # Check for provider-specific fields
-        if hasattr(raw_response, "choices") and len(raw_response.choices) > 0:
-            if hasattr(raw_response.choices[0].message, "provider_specific_fields"):
-                provider_fields = raw_response.choices[
-                    0
-                ].message.provider_specific_fields
-                return json.dumps(
-                    {
-                        "output": sanitized_response,
-                        "provider_specific_fields": provider_fields,
-                    }
-                )
-        return f'{{"output": "{sanitized_response}"}}'
+        return json.dumps({"output": response})
 
-    # Ensure response is valid JSON for models that support it
-    if supports_json:
+    # JSON responses are returned unparsed, callers parse them once
+    # with the output model and fall back to parse_json_output
+    return response
+
+
+_json_decoder = json.JSONDecoder()
+
+
+def parse_json_output(response: str) -> Dict[str, Any]:
+    """
+    Parse the JSON object contained in an LLM response in a single pass.
+    Text before and after the object is ignored, and truncated output is repaired
+    by closing any open strings, arrays and objects.
+    Responses without a JSON object are wrapped as {"output": response}.
+    """
+    start = response.find("{")
+    if start != -1:
         try:
-            json.loads(response)
-            return response
+            parsed, _ = _json_decoder.raw_decode(response, start)
+            return parsed
         except json.JSONDecodeError:
-            logging.error(f"Response is not valid JSON: {response}")
-            # Try to fix common json issues
-            if not response.startswith("{"):
-                # Extract JSON if there is extra text
-                json_match = re.search(r"\{.*\}", response, re.DOTALL)
-                if json_match:
-                    response = json_match.group(0)
-                    try:
-                        json.loads(response)
-                        return response
-                    except json.JSONDecodeError:
-                        pass
-
-            # If all attempts to parse JSON fail, wrap the response in a JSON structure
-            sanitized_response = response.replace('"', '\\"').replace("\n", "\\n")
-            # Check for provider-specific fields
-            if hasattr(raw_response, "choices") and len(raw_response.choices) > 0:
-                if hasattr(raw_response.choices[0].message, "provider_specific_fields"):
-                    provider_fields = raw_response.choices[
-                        0
-                    ].message.provider_specific_fields
-                    return json.dumps(
-                        {
-                            "output": sanitized_response,
-                            "provider_specific_fields": provider_fields,
-                        }
-                    )
-            return f'{{"output": "{sanitized_response}"}}'
-
-    return response
+            try:
+                parsed = from_json(response[start:], allow_partial="trailing-strings")
+            except ValueError:
+                parsed = None
+            if isinstance(parsed, dict):
+                logging.warning("Repaired truncated JSON response")
+                return parsed
+    logging.error(f"Response is not valid JSON: {response}")
+    return {"output": response}
 
 
 def convert_output_schema_to_json_schema(
@@ -460,7 +491,11 @@ def encode_image(image_path: str) -> str:
         return base64.b64encode(image_file.read()).decode("utf-8")
 
 
-@async_retry(wait=wait_random_exponential(min=30, max=120), stop=stop_after_attempt(3))
+@async_retry(
+    wait=wait_random_exponential(min=30, max=120),
+    stop=stop_after_attempt(3),
+    retry=retry_if_not_exception_type(asyncio.CancelledError),
+)
 async def ollama_with_backoff(
     model: str,
     messages: list[dict[str, str]],
@@ -483,12 +518,22 @@ async def ollama_with_backoff(
         Either a string response or a validated Pydantic model instance
     """
     client = AsyncClient(host=api_base)
+    start_time = time.perf_counter()
     response = await client.chat(
         model=model.replace("ollama/", ""),
         messages=messages,
         format=format,
         options=(options or OllamaOptions()).to_dict(),
     )
+    record_llm_call(
+        LLMCallUsageSchema(
+            model=model,
+            prompt_tokens=response.prompt_eval_count or 0,
+            completion_tokens=response.eval_count or 0,
+            latency=time.perf_counter() - start_time,
+            retries=_retry_attempt.get() - 1,
+        )
+    )
     return response.message.content
 
 
@@ -524,3 +569,10 @@ def convert_docx_to_xml(file_path: str) -> str:
     except Exception as e:
         logging.error(f"Error converting DOCX to XML: {str(e)}")
         raise
+
+
+def encode_docx_to_xml_data_url(file_path: str) -> str:
+    """
+    Convert a DOCX file to XML and encode it as a base64 data URL.
+    """
+    return encode_text_to_base64_data_url(convert_docx_to_xml(file_path), "text/xml")
@@ -1,7 +1,8 @@
+import asyncio
 import json
-from typing import Dict, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 
 from ....utils.pydantic_utils import json_schema_to_simple_schema
 
@@ -16,7 +17,17 @@ from ...subworkflow.base_subworkflow_node import (
     BaseSubworkflowNodeConfig,
 )
 from .._utils import LLMModels, ModelInfo
-from ..single_llm_call import SingleLLMCallNodeConfig
+from ..single_llm_call import SingleLLMCallNode, SingleLLMCallNodeConfig
+
+GenerateFn = Callable[[int], Awaitable[BaseModel]]
+RateFn = Callable[[int, BaseModel], Awaitable[float]]
+
+RATING_JSON_SCHEMA = '{"type": "object", "properties": {"rating": {"type": "number"} }, "required": ["rating"]}'
+BATCH_RATING_JSON_SCHEMA = '{"type": "object", "properties": {"ratings": {"type": "array", "items": {"type": "number"} } }, "required": ["ratings"]}'
+BATCH_RATING_INSTRUCTION = (
+    "\nYou will be given {num_responses} responses keyed response_0 to response_{last_index}. "
+    "Rate each of them and return the ratings as a list in the same order."
+)
 
 
 class BestOfNNodeConfig(SingleLLMCallNodeConfig, BaseSubworkflowNodeConfig):
@@ -37,6 +48,18 @@ class BestOfNNodeConfig(SingleLLMCallNodeConfig, BaseSubworkflowNodeConfig):
     )
     user_message: str = Field(default="", description="User message template")
     output_schema: Dict[str, str] = Field(default={"response": "string"})
+    max_concurrency: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum number of samples generated or rated concurrently",
+    )
+    rating_threshold: Optional[float] = Field(
+        default=None,
+        description=(
+            "If set, each sample is rated as soon as it is generated and the "
+            "first sample rated at or above this threshold is returned early"
+        ),
+    )
 
 
 class BestOfNNodeInput(BaseNodeInput):
@@ -108,7 +131,7 @@ class BestOfNNode(BaseSubworkflowNode):
                     "system_message": self.config.rating_prompt,
                     "user_message": "",
                     "output_schema": {"rating": "number"},
-                    "output_json_schema": '{"type": "object", "properties": {"rating": {"type": "number"} }, "required": ["rating"]}',
+                    "output_json_schema": RATING_JSON_SCHEMA,
                 },
             )
             nodes.append(rate_node)
@@ -200,6 +223,178 @@ class BestOfNNode(BaseSubworkflowNode):
         self.output_model = self.create_output_model_class(self.config.output_schema)
         super().setup()
 
+    def _create_generation_node(self, node_id: str) -> SingleLLMCallNode:
+        return SingleLLMCallNode(
+            name=node_id,
+            config=SingleLLMCallNodeConfig(
+                llm_info=self.config.llm_info,
+                system_message=self.config.system_message,
+                user_message=self.config.user_message,
+                few_shot_examples=self.config.few_shot_examples,
+                url_variables=self.config.url_variables,
+                output_schema=self.config.output_schema,
+                output_json_schema=self.config.output_json_schema,
+            ),
+        )
+
+    def _create_rating_node(
+        self, node_id: str, system_message: str, output_json_schema: str
+    ) -> SingleLLMCallNode:
+        return SingleLLMCallNode(
+            name=node_id,
+            config=SingleLLMCallNodeConfig(
+                llm_info=self.config.llm_info,
+                system_message=system_message,
+                user_message="",
+                output_json_schema=output_json_schema,
+            ),
+        )
+
+    async def run(self, input: BaseModel) -> BaseModel:
+        """
+        Generate the samples concurrently and rate them, without building a
+        nested workflow executor. The subworkflow is still set up so that the
+        samples and ratings are recorded like the outputs of its nodes.
+        """
+        input_dict = input.model_dump()
+        new_config = self.apply_templates_to_config(self.config, input_dict)
+        self.update_config(new_config)
+        self.setup_subworkflow()
+
+        mapped_input = self._map_input(input)
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        self.subworkflow_output = {}
+
+        async def generate(index: int) -> BaseModel:
+            node_id = f"generation_node_{index}"
+            async with semaphore:
+                sample = await self._create_generation_node(node_id)(mapped_input)
+            self.subworkflow_output[node_id] = sample
+            return sample
+
+        async def rate(index: int, sample: BaseModel) -> float:
+            node_id = f"rating_node_{index}"
+            async with semaphore:
+                rating = await self._create_rating_node(
+                    node_id, self.config.rating_prompt, RATING_JSON_SCHEMA
+                )({f"generation_node_{index}": sample.model_dump()})
+            self.subworkflow_output[node_id] = rating
+            return float(rating.rating)  # type: ignore
+
+        if self.config.rating_threshold is not None:
+            samples, ratings = await self._generate_until_threshold(generate, rate)
+        else:
+            samples, ratings = await self._generate_and_rate_batch(generate, rate)
+
+        best_index = max(ratings, key=lambda index: ratings[index])
+        output = self.output_model.model_validate(samples[best_index].model_dump())
+        self.subworkflow_output["pick_one_node"] = output
+        self.subworkflow_output["output_node"] = output
+        return output
+
+    async def _generate_and_rate_batch(
+        self, generate: GenerateFn, rate: RateFn
+    ) -> Tuple[Dict[int, BaseModel], Dict[int, float]]:
+        """
+        Generate all samples concurrently and rate them with a single LLM call.
+        Falls back to rating each sample separately if the batched rating is unusable.
+        """
+        results = await asyncio.gather(
+            *(generate(i) for i in range(self.config.samples)),
+            return_exceptions=True,
+        )
+        samples = self._successful_samples(results)
+        if len(samples) == 1:
+            return samples, {index: 0.0 for index in samples}
+
+        indices = sorted(samples)
+        rating_node = self._create_rating_node(
+            "rating_node",
+            self.config.rating_prompt
+            + BATCH_RATING_INSTRUCTION.format(
+                num_responses=len(indices), last_index=len(indices) - 1
+            ),
+            BATCH_RATING_JSON_SCHEMA,
+        )
+        try:
+            batch_rating = await rating_node(
+                {
+                    f"response_{position}": samples[index].model_dump()
+                    for position, index in enumerate(indices)
+                }
+            )
+            batch_ratings: List[float] = [float(r) for r in batch_rating.ratings]  # type: ignore
+        except Exception as e:
+            print(f"[WARNING]: Batched rating failed in {self.name}: {e}")
+            batch_ratings = []
+
+        if len(batch_ratings) == len(indices):
+            ratings = dict(zip(indices, batch_ratings))
+            for index, rating in ratings.items():
+                self.subworkflow_output[f"rating_node_{index}"] = {"rating": rating}
+            return samples, ratings
+
+        rating_results = await asyncio.gather(
+            *(rate(index, samples[index]) for index in indices),
+            return_exceptions=True,
+        )
+        ratings = {
+            index: (0.0 if isinstance(rating, BaseException) else rating)
+            for index, rating in zip(indices, rating_results)
+        }
+        return samples, ratings
+
+    async def _generate_until_threshold(
+        self, generate: GenerateFn, rate: RateFn
+    ) -> Tuple[Dict[int, BaseModel], Dict[int, float]]:
+        """
+        Generate and rate samples concurrently, stopping at the first sample
+        whose rating reaches the configured threshold.
+        """
+
+        async def generate_and_rate(index: int) -> Tuple[int, BaseModel, float]:
+            sample = await generate(index)
+            return index, sample, await rate(index, sample)
+
+        samples: Dict[int, BaseModel] = {}
+        ratings: Dict[int, float] = {}
+        errors: List[BaseException] = []
+        tasks = [
+            asyncio.create_task(generate_and_rate(i))
+            for i in range(self.config.samples)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    index, sample, rating = await next_done
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                samples[index] = sample
+                ratings[index] = rating
+                if rating >= self.config.rating_threshold:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not samples:
+            raise errors[0] if errors else ValueError(
+                f"No samples were generated by {self.name}"
+            )
+        return samples, ratings
+
+    def _successful_samples(self, results: List[Any]) -> Dict[int, BaseModel]:
+        samples = {
+            index: result
+            for index, result in enumerate(results)
+            if not isinstance(result, BaseException)
+        }
+        if not samples:
+            raise next(r for r in results if isinstance(r, BaseException))
+        return samples
+
 
 if __name__ == "__main__":
     node = BestOfNNode(
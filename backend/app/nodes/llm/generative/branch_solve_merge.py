@@ -1,8 +1,9 @@
-from typing import Any, Dict, List
+import asyncio
+import json
+from typing import Dict, List
 
 from pydantic import BaseModel, Field
 
-from ....execution.workflow_executor import WorkflowExecutor
 from ....nodes.base import BaseNodeInput, BaseNodeOutput
 from ....schemas.workflow_schemas import (
     WorkflowDefinitionSchema,
@@ -13,7 +14,11 @@ from ...subworkflow.base_subworkflow_node import (
     BaseSubworkflowNode,
     BaseSubworkflowNodeConfig,
 )
-from .._utils import LLMModels, ModelInfo
+from .._utils import LLMModels, ModelInfo, convert_output_schema_to_json_schema
+from ..single_llm_call import SingleLLMCallNode, SingleLLMCallNodeConfig
+
+BRANCH_JSON_SCHEMA = '{"type": "object", "properties": {"subtasks": {"type": "array", "items": {"type": "string"} } }, "required": ["subtasks"]}'
+SOLVE_JSON_SCHEMA = '{"type": "object", "properties": {"solution": {"type": "string"} }, "required": ["solution"]}'
 
 
 class BranchSolveMergeNodeConfig(BaseSubworkflowNodeConfig):
@@ -46,6 +51,11 @@ class BranchSolveMergeNodeConfig(BaseSubworkflowNodeConfig):
     )
     input_schema: Dict[str, str] = Field(default={"task": "string"})
     output_schema: Dict[str, str] = Field(default={"response": "string"})
+    max_concurrency: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum number of subtasks solved concurrently",
+    )
 
 
 class BranchSolveMergeNodeInput(BaseNodeInput):
@@ -62,127 +72,98 @@ class BranchSolveMergeNode(BaseSubworkflowNode):
     config_model = BranchSolveMergeNodeConfig
     input_model = BranchSolveMergeNodeInput
     output_model = BranchSolveMergeNodeOutput
+    input_node_id = "branch_solve_merge_input_node"
+    branch_node_id = "branch_node"
+    merge_node_id = "merge_node"
+    output_node_id = "output_node"
 
     async def run(self, input: BaseModel) -> BaseModel:
         """
-        Run the BranchSolveMergeNode in two steps:
-        Step 1: Run the branch node to get subtasks.
-        Step 2: Build the rest of the subworkflow based on the subtasks and execute it.
+        Run the BranchSolveMergeNode in three steps without nested workflow executors:
+        Step 1: Run the branch LLM call to get subtasks.
+        Step 2: Solve the subtasks concurrently, bounded by max_concurrency.
+        Step 3: Merge the solutions into the final answer.
+        The subworkflow is built once the subtasks are known, so that the
+        outputs of each step are recorded like the outputs of its nodes.
         """
         # Apply templates to config fields
         input_dict = input.model_dump()
         new_config = self.apply_templates_to_config(self.config, input_dict)
         self.update_config(new_config)
-
-        # Step 1: Run the branch node to get the subtasks
-        # Build subworkflow for step 1
-        self.setup_branch_subworkflow()
-        branch_output = await self.run_subworkflow(input)
-
-        # Extract subtasks from branch_output
-        subtasks: List[str] = branch_output["subtasks"]
+        self.subworkflow_output = {}
+
+        # Step 1: Decompose the task into subtasks
+        branch_output = await self._create_llm_node(
+            self.branch_node_id,
+            self.config.branch_system_message,
+            BRANCH_JSON_SCHEMA,
+        )(self._map_input(input))
+        self.subworkflow_output[self.branch_node_id] = branch_output
+        subtasks: List[str] = branch_output.subtasks  # type: ignore
         assert isinstance(subtasks, list)
-
-        # Step 2: Build the subworkflow including solve nodes for each subtask
         self.setup_full_subworkflow(subtasks)
 
-        # Prepare the inputs for the subworkflow, including passing the previous outputs
-        # We don't want the branch node to run again, so we pass its output
-        self.subworkflow_output = {self.branch_node_id: branch_output}
-
-        # Run the subworkflow starting from solve nodes
-        final_output = await self.run_subworkflow(input)
-
-        # Return the output of the output node
-        return self.output_model.model_validate(final_output)
-
-    def setup_branch_subworkflow(self) -> None:
-        """
-        Setup the subworkflow for Step 1: Running the branch node to get subtasks.
-        """
-        nodes: List[WorkflowNodeSchema] = []
-        links: List[WorkflowLinkSchema] = []
-
-        # Input node
-        input_node_id = "branch_solve_merge_input_node"
-        self.input_node_id = input_node_id
-        input_node = WorkflowNodeSchema(
-            id=input_node_id,
-            node_type="InputNode",
-            config={
-                "output_schema": {"task": "string"},
-                "enforce_schema": False,
-            },
-        )
-        nodes.append(input_node)
-
-        # Branch node: Decompose task into subtasks
-        branch_node_id = "branch_node"
-        self.branch_node_id = branch_node_id
-        branch_node = WorkflowNodeSchema(
-            id=branch_node_id,
-            node_type="SingleLLMCallNode",
-            config={
-                "llm_info": self.config.llm_info.model_dump(),
-                "system_message": self.config.branch_system_message,
-                "user_message": "",
-                "output_schema": {
-                    "subtasks": "List[str]"
-                },  # Expecting list of subtasks
-            },
-        )
-        nodes.append(branch_node)
-
-        # Link input node to branch node
-        links.append(
-            WorkflowLinkSchema(
-                source_id=input_node_id,
-                target_id=branch_node_id,
-            )
-        )
+        # Step 2: Solve the subtasks concurrently, keeping the order of the subtasks
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
 
-        # Output node
-        output_node_id = "output_node"
-        self.output_node_id = output_node_id
-        output_node = WorkflowNodeSchema(
-            id=output_node_id,
-            node_type="OutputNode",
-            config={
-                "output_schema": {"subtasks": "List[str]"},
-                "output_map": {"subtasks": f"{branch_node_id}.subtasks"},
-            },
+        async def solve(idx: int, subtask: str) -> str:
+            solve_node_id = f"solve_node_{idx}"
+            async with semaphore:
+                solve_output = await self._create_llm_node(
+                    solve_node_id,
+                    self.config.solve_system_message,
+                    SOLVE_JSON_SCHEMA,
+                )({"subtask": subtask})
+            self.subworkflow_output[solve_node_id] = solve_output  # type: ignore
+            return solve_output.solution  # type: ignore
+
+        solutions = await asyncio.gather(
+            *(solve(idx, subtask) for idx, subtask in enumerate(subtasks))
         )
-        nodes.append(output_node)
 
-        # Link branch node to output node
-        links.append(
-            WorkflowLinkSchema(
-                source_id=branch_node_id,
-                target_id=output_node_id,
-            )
+        # Step 3: Merge the solutions
+        merge_output = await self._create_llm_node(
+            self.merge_node_id,
+            self.config.merge_system_message,
+            json.dumps(convert_output_schema_to_json_schema(self.config.output_schema)),
+        )({"subtasks": subtasks, "solutions": solutions})
+        self.subworkflow_output[self.merge_node_id] = merge_output
+
+        output = self.output_model.model_validate(merge_output.model_dump())
+        self.subworkflow_output[self.output_node_id] = output
+        return output
+
+    def _create_llm_node(
+        self, node_id: str, system_message: str, output_json_schema: str
+    ) -> SingleLLMCallNode:
+        return SingleLLMCallNode(
+            name=node_id,
+            config=SingleLLMCallNodeConfig(
+                llm_info=self.config.llm_info,
+                system_message=system_message,
+                user_message="",
+                output_json_schema=output_json_schema,
+            ),
         )
 
-        self.subworkflow = WorkflowDefinitionSchema(nodes=nodes, links=links)
-        self.setup_subworkflow()
-
     def setup_full_subworkflow(self, subtasks: List[str]) -> None:
         """
-        Setup the subworkflow for Step 2: Solve subtasks and merge solutions.
-        This subworkflow reuses the branch node's output and adds solve nodes for each subtask.
+        Setup the subworkflow that describes the branch, solve and merge steps.
+        It is not executed, it only gives structure to the recorded outputs.
         """
         nodes: List[WorkflowNodeSchema] = []
         links: List[WorkflowLinkSchema] = []
 
-        # Input node (same as before)
+        # Input node
         input_node_id = self.input_node_id
         input_node = WorkflowNodeSchema(
             id=input_node_id,
             node_type="InputNode",
-            config={"echo_mode": True},
+            config={"enforce_schema": False},
         )
         nodes.append(input_node)
 
-        # Branch node (same as before)
+        # Branch node: Decompose task into subtasks
         branch_node_id = self.branch_node_id
         branch_node = WorkflowNodeSchema(
             id=branch_node_id,
@@ -192,6 +173,7 @@ class BranchSolveMergeNode(BaseSubworkflowNode):
                 "system_message": self.config.branch_system_message,
                 "user_message": "",
                 "output_schema": {"subtasks": "List[str]"},
+                "output_json_schema": BRANCH_JSON_SCHEMA,
             },
         )
         nodes.append(branch_node)
@@ -216,7 +198,8 @@ class BranchSolveMergeNode(BaseSubworkflowNode):
                     "llm_info": self.config.llm_info.model_dump(),
                     "system_message": self.config.solve_system_message,
                     "user_message": f"{{{{branch_node.subtasks[{idx}]}}}}",
-                    "output_schema": {f"solution_{idx}": "string"},
+                    "output_schema": {"solution": "string"},
+                    "output_json_schema": SOLVE_JSON_SCHEMA,
                 },
             )
             nodes.append(solve_node)
@@ -230,19 +213,14 @@ class BranchSolveMergeNode(BaseSubworkflowNode):
             )
 
         # Merge node: Combine solutions
-        merge_node_id = "merge_node"
+        merge_node_id = self.merge_node_id
         merge_node = WorkflowNodeSchema(
             id=merge_node_id,
             node_type="SingleLLMCallNode",
             config={
                 "llm_info": self.config.llm_info.model_dump(),
                 "system_message": self.config.merge_system_message,
-                "user_message": "\n".join(
-                    [
-                        f"{{{{solve_node_{i}.solution_{i}}}}}"
-                        for i in range(len(subtasks))
-                    ]
-                ),
+                "user_message": "",
                 "output_schema": self.config.output_schema,
             },
         )
@@ -258,7 +236,7 @@ class BranchSolveMergeNode(BaseSubworkflowNode):
             )
 
         # Output node
-        output_node_id = "output_node"
+        output_node_id = self.output_node_id
         output_node = WorkflowNodeSchema(
             id=output_node_id,
             node_type="OutputNode",
@@ -280,59 +258,17 @@ class BranchSolveMergeNode(BaseSubworkflowNode):
             )
         )
 
-        # Update subworkflow
         self.subworkflow = WorkflowDefinitionSchema(nodes=nodes, links=links)
-
-        # Since we have already run branch node, we don't want to run it again
-        # subworkflow_output stores outputs from previous runs
         self.setup_subworkflow()
 
-    async def run_subworkflow(self, input: BaseModel) -> Dict[str, Any]:
-        """
-        Run the current subworkflow and return the output of the output node.
-        """
-        assert self.subworkflow is not None
-
-        # Map input
-        mapped_input = self._map_input(input)
-
-        # Prepare inputs for subworkflow
-        input_node = next(
-            (node for node in self.subworkflow.nodes if node.node_type == "InputNode")
-        )
-        input_dict = {input_node.id: mapped_input}
-
-        # Use stored outputs to avoid re-running nodes
-        precomputed_outputs = self.subworkflow_output or {}
-
-        # Execute the subworkflow
-        workflow_executor = WorkflowExecutor(
-            workflow=self.subworkflow, context=self.context
-        )
-        outputs = await workflow_executor.run(
-            input_dict, precomputed_outputs=precomputed_outputs
-        )
-
-        # Store outputs for potential reuse
-        if self.subworkflow_output is None:
-            self.subworkflow_output = outputs
-        else:
-            self.subworkflow_output.update(outputs)
-
-        # Get the output of the output node
-        output_node = next(
-            (node for node in self.subworkflow.nodes if node.node_type == "OutputNode")
-        )
-        return outputs[output_node.id].model_dump()
-
     def setup(self) -> None:
         # Initial setup
         # We don't set up the subworkflow here because it depends on data available at runtime
+        self.output_model = self.create_output_model_class(self.config.output_schema)
         super().setup()
 
 
 if __name__ == "__main__":
-    import asyncio
     from pprint import pprint
 
     async def main():
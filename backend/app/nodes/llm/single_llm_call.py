@@ -1,9 +1,10 @@
 import json
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Type
 
 from dotenv import load_dotenv
 from jinja2 import Template
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 from ...utils.pydantic_utils import get_nested_field, json_schema_to_model
 
@@ -13,7 +14,13 @@ from ..base import (
     BaseNodeConfig,
     BaseNode,
 )
-from ._utils import LLMModels, ModelInfo, create_messages, generate_text
+from ._utils import (
+    LLMModels,
+    ModelInfo,
+    create_messages,
+    generate_text,
+    parse_json_output,
+)
 
 load_dotenv()
 
@@ -51,6 +58,18 @@ class SingleLLMCallNodeOutput(BaseNodeOutput):
     pass
 
 
+@lru_cache(maxsize=256)
+def get_output_model_for_schema(
+    output_json_schema: str, model_name: str
+) -> Type[BaseModel]:
+    """
+    Build the output model for a JSON schema once and share it between node instances.
+    """
+    return json_schema_to_model(
+        json.loads(output_json_schema), model_name, SingleLLMCallNodeOutput
+    )
+
+
 class SingleLLMCallNode(BaseNode):
     """
     Node type for calling an LLM with structured i/o and support for params in system prompt and user_input.
@@ -65,10 +84,8 @@ class SingleLLMCallNode(BaseNode):
     def setup(self) -> None:
         super().setup()
         if self.config.output_json_schema:
-            self.output_model = json_schema_to_model(
-                json.loads(self.config.output_json_schema),
-                self.name,
-                SingleLLMCallNodeOutput,
+            self.output_model = get_output_model_for_schema(
+                self.config.output_json_schema, self.name
             )  # type: ignore
 
     async def run(self, input: BaseModel) -> BaseModel:
@@ -176,10 +193,17 @@ class SingleLLMCallNode(BaseNode):
                 )
             raise e
 
-        assistant_message_dict = json.loads(assistant_message_str)
-
-        # Validate and return
-        assistant_message = self.output_model.model_validate(assistant_message_dict)
+        # Parse and validate in a single pass, repairing the JSON only if it is malformed
+        try:
+            assistant_message = self.output_model.model_validate_json(
+                assistant_message_str
+            )
+        except ValidationError as e:
+            if not any(error["type"] == "json_invalid" for error in e.errors()):
+                raise e
+            assistant_message = self.output_model.model_validate(
+                parse_json_output(assistant_message_str)
+            )
         return assistant_message
 
 
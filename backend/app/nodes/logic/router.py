@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from pydantic import BaseModel, create_model
 
 from ..base import BaseNodeConfig, BaseNode, BaseNodeInput, BaseNodeOutput
@@ -9,6 +9,102 @@ from ...schemas.router_schemas import (
 )
 
 
+ConditionFn = Callable[[Dict[str, Any]], bool]
+
+
+def _get_nested_value(data: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    """Get value from nested dictionary using a pre-split dot notation path."""
+    current: Any = data
+    for key in path:
+        if not isinstance(current, dict):
+            return None
+        if key not in current:
+            return None
+        current = current[key]  # type: ignore
+    return current
+
+
+def compile_condition(condition: RouteConditionRuleSchema) -> ConditionFn:
+    """
+    Compile a single condition into a function of the input dump.
+    The variable path is split and the compared value is parsed once.
+    """
+    if not condition.variable:
+        return lambda data: False
+
+    path = tuple(condition.variable.split("."))
+    operator = condition.operator
+    str_value = str(condition.value)
+    try:
+        float_value: Optional[float] = float(condition.value)
+    except (ValueError, TypeError):
+        float_value = None
+
+    compare: Callable[[Any], bool]
+    if operator == ComparisonOperator.CONTAINS:
+        compare = lambda value: str_value in str(value)
+    elif operator == ComparisonOperator.EQUALS:
+        compare = lambda value: str(value) == str_value
+    elif operator == ComparisonOperator.STARTS_WITH:
+        compare = lambda value: str(value).startswith(str_value)
+    elif operator == ComparisonOperator.NOT_STARTS_WITH:
+        compare = lambda value: not str(value).startswith(str_value)
+    elif operator == ComparisonOperator.IS_EMPTY:
+        compare = lambda value: not bool(value)
+    elif operator == ComparisonOperator.IS_NOT_EMPTY:
+        compare = lambda value: bool(value)
+    elif float_value is None:
+        # Numeric comparison with a value that is not a number
+        compare = lambda value: False
+    elif operator == ComparisonOperator.NUMBER_EQUALS:
+        compare = lambda value: float(value) == float_value
+    elif operator == ComparisonOperator.GREATER_THAN:
+        compare = lambda value: float(value) > float_value  # type: ignore
+    elif operator == ComparisonOperator.LESS_THAN:
+        compare = lambda value: float(value) < float_value  # type: ignore
+    else:
+        compare = lambda value: False
+
+    def evaluate(data: Dict[str, Any]) -> bool:
+        variable_value = _get_nested_value(data, path)
+        if variable_value is None:
+            return operator == ComparisonOperator.IS_EMPTY
+        try:
+            return compare(variable_value)
+        except (ValueError, TypeError, AttributeError):
+            return False
+
+    return evaluate
+
+
+def compile_route(route: RouteConditionGroupSchema) -> ConditionFn:
+    """
+    Compile the conditions of a route, combined from left to right with their
+    AND/OR operators. Conditions that cannot change the result are not evaluated.
+    """
+    if not route.conditions:
+        # If no conditions, consider it always matches
+        return lambda data: True
+
+    first = compile_condition(route.conditions[0])
+    rest = [
+        (condition.logicalOperator == "OR", compile_condition(condition))
+        for condition in route.conditions[1:]
+    ]
+
+    def evaluate(data: Dict[str, Any]) -> bool:
+        result = first(data)
+        for is_or, condition in rest:
+            if is_or:
+                if not result:
+                    result = condition(data)
+            elif result:  # AND is default
+                result = condition(data)
+        return result
+
+    return evaluate
+
+
 class RouterNodeConfig(BaseNodeConfig):
     """Configuration for the router node."""
 
@@ -50,80 +146,17 @@ class RouterNode(BaseNode):
     input_model = RouterNodeInput
     config_model = RouterNodeConfig
 
-    def _evaluate_single_condition(
-        self, input: BaseModel, condition: RouteConditionRuleSchema
-    ) -> bool:
-        """Evaluate a single condition against a specific input variable"""
-
-        def get_nested_value(data: Dict[str, Any], target_key: str) -> Any:
-            """Get value from nested dictionary using dot notation path."""
-            keys = target_key.split(".")
-            current = data
-
-            for key in keys:
-                if not isinstance(current, dict):
-                    return None
-                if key not in current:
-                    return None
-                current = current[key]
+    def setup(self) -> None:
+        super().setup()
+        self._compile_routes()
 
-            return current
-
-        try:
-            if not condition.variable:
-                return False
-
-            # Retrieve the variable value, including support for nested paths
-            variable_value = get_nested_value(input.model_dump(), condition.variable)
-
-            if variable_value is None:
-                if condition.operator != ComparisonOperator.IS_EMPTY:
-                    return False
-                else:
-                    return True
-            if condition.operator == ComparisonOperator.CONTAINS:
-                return str(condition.value) in str(variable_value)
-            elif condition.operator == ComparisonOperator.EQUALS:
-                return str(variable_value) == str(condition.value)
-            elif condition.operator == ComparisonOperator.NUMBER_EQUALS:
-                return float(variable_value) == float(condition.value)
-            elif condition.operator == ComparisonOperator.GREATER_THAN:
-                return float(variable_value) > float(condition.value)
-            elif condition.operator == ComparisonOperator.LESS_THAN:
-                return float(variable_value) < float(condition.value)
-            elif condition.operator == ComparisonOperator.STARTS_WITH:
-                return str(variable_value).startswith(str(condition.value))
-            elif condition.operator == ComparisonOperator.NOT_STARTS_WITH:
-                return not str(variable_value).startswith(str(condition.value))
-            elif condition.operator == ComparisonOperator.IS_EMPTY:
-                return not bool(variable_value)
-            elif condition.operator == ComparisonOperator.IS_NOT_EMPTY:
-                return bool(variable_value)
-            else:
-                return False
-        except (ValueError, TypeError, AttributeError):
-            return False
-
-    def _evaluate_route_conditions(
-        self, input: BaseModel, route: RouteConditionGroupSchema
-    ) -> bool:
-        """Evaluate all conditions in a route with AND/OR logic"""
-        if not route.conditions:
-            # If no conditions, consider it always matches
-            return True
-
-        result = self._evaluate_single_condition(input, route.conditions[0])
-
-        for i in range(1, len(route.conditions)):
-            condition = route.conditions[i]
-            current_result = self._evaluate_single_condition(input, condition)
-
-            if condition.logicalOperator == "OR":
-                result = result or current_result
-            else:  # AND is default
-                result = result and current_result
-
-        return result
+    def _compile_routes(self) -> None:
+        """Compile the route conditions, so that each evaluation only walks closures"""
+        self._compiled_route_map = self._config.route_map
+        self._compiled_routes: List[Tuple[str, ConditionFn]] = [
+            (route_name, compile_route(route))
+            for route_name, route in self.config.route_map.items()
+        ]
 
     async def run(self, input: BaseModel) -> BaseModel:
         """
@@ -162,9 +195,15 @@ class RouterNode(BaseNode):
 
         output: Dict[str, Optional[BaseModel]] = {}
 
-        for route_name, route in self.config.route_map.items():
-            if self._evaluate_route_conditions(input, route):
-                output[route_name] = output_model(**input.model_dump())
+        # The config may have been replaced since setup
+        if self._compiled_route_map is not self._config.route_map:
+            self._compile_routes()
+
+        # Evaluate all conditions against a single dump of the input
+        input_data = input.model_dump()
+        for route_name, route_matches in self._compiled_routes:
+            if route_matches(input_data):
+                output[route_name] = output_model(**input_data)
 
         return self.output_model(**output)
 
@@ -1,6 +1,8 @@
 from abc import abstractmethod
-from typing import Any, Dict, List
-from pydantic import BaseModel, create_model
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+from pydantic import BaseModel, Field, GetCoreSchemaHandler, create_model
+from pydantic_core import core_schema
 
 from ..primitives.output import OutputNode
 
@@ -15,6 +17,57 @@ from ...schemas.workflow_schemas import WorkflowDefinitionSchema
 
 class BaseLoopSubworkflowNodeConfig(BaseSubworkflowNodeConfig):
     subworkflow: WorkflowDefinitionSchema
+    history_window: Optional[int] = Field(
+        default=None,
+        ge=1,
+        title="History window",
+        description="Number of most recent iterations exposed in loop_history, all iterations if not set",
+    )
+
+
+class LoopHistory(Mapping[str, List[Dict[str, Any]]]):
+    """
+    Read-only view of the outputs of previous iterations, keyed by node id.
+
+    The view wraps the append-only lists of the loop node, so passing it to an
+    iteration does not copy the history. Pydantic only checks its type, hence
+    it is not revalidated as it flows through the subworkflow. Dumps return a
+    shallow dict copy, so that dumped inputs stay JSON serializable.
+    When a window is set, only the last `window` outputs of each node are exposed.
+    """
+
+    def __init__(
+        self, outputs: Dict[str, List[Dict[str, Any]]], window: Optional[int] = None
+    ):
+        self._outputs = outputs
+        self._window = window
+
+    def __getitem__(self, node_id: str) -> List[Dict[str, Any]]:
+        node_outputs = self._outputs[node_id]
+        if self._window is None:
+            return node_outputs
+        return node_outputs[-self._window :]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._outputs)
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def __repr__(self) -> str:
+        return f"LoopHistory({dict(self)!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source_type: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        # Dumped histories are plain dicts, they are validated again as such
+        return core_schema.union_schema(
+            [core_schema.is_instance_schema(cls), core_schema.dict_schema()],
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda history: dict(history)
+            ),
+        )
 
 
 class BaseLoopSubworkflowNodeInput(BaseNodeInput):
@@ -30,25 +83,20 @@ class BaseLoopSubworkflowNode(BaseSubworkflowNode):
     config_model = BaseLoopSubworkflowNodeConfig
     iteration: int
     loop_outputs: Dict[str, List[Dict[str, Any]]]
+    loop_history: LoopHistory
 
     def setup(self) -> None:
         super().setup()
         self.loop_outputs = {}
+        self.loop_history = LoopHistory(self.loop_outputs, self.config.history_window)
         self.iteration = 0
 
     def _update_loop_outputs(self, iteration_output: Dict[str, Dict[str, Any]]) -> None:
-        """Update the loop_outputs dictionary with the current iteration's output"""
+        """Append the current iteration's output to the loop_outputs lists"""
         for node_id, node_outputs in iteration_output.items():
             # Skip storing the special loop_history field
-            if "loop_history" in node_outputs:
-                node_outputs = {
-                    k: v for k, v in node_outputs.items() if k != "loop_history"
-                }
-
-            if node_id not in self.loop_outputs:
-                self.loop_outputs[node_id] = [node_outputs]
-            else:
-                self.loop_outputs[node_id].append(node_outputs)
+            node_outputs.pop("loop_history", None)
+            self.loop_outputs.setdefault(node_id, []).append(node_outputs)
 
     @abstractmethod
     async def stopping_condition(self, input: Dict[str, Any]) -> bool:
@@ -57,18 +105,14 @@ class BaseLoopSubworkflowNode(BaseSubworkflowNode):
 
     async def run_iteration(self, input: Dict[str, Any]) -> Dict[str, Any]:
         """Run a single iteration of the loop subworkflow"""
-        self.subworkflow = self.config.subworkflow
         assert self.subworkflow is not None
 
-        # Inject loop outputs into the input
-        iteration_input = {**input, "loop_history": self.loop_outputs}
+        # Inject the view of the previous iterations' outputs into the input
+        iteration_input = {**input, "loop_history": self.loop_history}
 
-        # Execute the subworkflow
-        self._executor = WorkflowExecutor(
-            workflow=self.config.subworkflow, context=self.context
-        )
-        workflow_executor = self._executor
-        outputs = await workflow_executor.run(iteration_input)
+        # Execute the subworkflow, reusing the executor of the previous iterations
+        self._executor.reset()
+        outputs = await self._executor.run(iteration_input)
 
         # Convert outputs to dict format
         iteration_outputs = {
@@ -87,6 +131,10 @@ class BaseLoopSubworkflowNode(BaseSubworkflowNode):
     async def run(self, input: BaseModel) -> BaseModel:
         """Execute the loop subworkflow until stopping condition is met"""
         current_input = self._map_input(input)
+        self.subworkflow = self.config.subworkflow
+        self._executor = WorkflowExecutor(
+            workflow=self.subworkflow, context=self.context
+        )
 
         # Run iterations until stopping condition is met
         while not await self.stopping_condition(current_input):
@@ -0,0 +1,127 @@
+import asyncio
+import traceback
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ...execution.workflow_executor import WorkflowExecutor
+from ...schemas.workflow_schemas import WorkflowDefinitionSchema
+from ..base import BaseNodeInput, BaseNodeOutput
+from ..subworkflow.base_subworkflow_node import (
+    BaseSubworkflowNode,
+    BaseSubworkflowNodeConfig,
+)
+
+
+class MapNodeConfig(BaseSubworkflowNodeConfig):
+    subworkflow: WorkflowDefinitionSchema
+    list_field: str = Field(
+        default="items",
+        title="List field",
+        description="Subworkflow input field holding the list to map over. Each element replaces the list under the same field name in the input of its subworkflow run",
+    )
+    max_concurrency: int = Field(
+        default=5,
+        ge=1,
+        title="Max concurrency",
+        description="Maximum number of elements processed concurrently",
+    )
+    fail_fast: bool = Field(
+        default=False,
+        title="Fail fast",
+        description="Fail the node as soon as one element fails, instead of recording the error for that element",
+    )
+
+
+class MapNodeInput(BaseNodeInput):
+    pass
+
+
+class MapNodeOutput(BaseNodeOutput):
+    results: List[Optional[Dict[str, Any]]] = Field(
+        ..., description="Subworkflow outputs, in the order of the input list"
+    )
+    errors: List[Optional[str]] = Field(
+        ..., description="Error of each element, None for the elements that succeeded"
+    )
+
+
+class MapNode(BaseSubworkflowNode):
+    name = "map_node"
+    display_name = "Map"
+    config_model = MapNodeConfig
+    input_model = MapNodeInput
+    output_model = MapNodeOutput
+
+    async def run_item(self, input: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Run the subworkflow for a single element of the list"""
+        assert self.subworkflow is not None
+        workflow_executor = WorkflowExecutor(
+            workflow=self.subworkflow, context=self.context
+        )
+        outputs = await workflow_executor.run(input)
+        return {node_id: output.model_dump() for node_id, output in outputs.items()}
+
+    async def run(self, input: BaseModel) -> BaseModel:
+        """Run the subworkflow over every element of the list, concurrently"""
+        self.subworkflow = self.config.subworkflow
+        self.setup_subworkflow()
+        output_node_id = self._subworkflow_output_node.id
+
+        mapped_input = self._map_input(input)
+        items = mapped_input.get(self.config.list_field)
+        if not isinstance(items, list):
+            raise ValueError(
+                f"Map node expects a list in field '{self.config.list_field}', got {type(items).__name__}"
+            )
+
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        item_outputs: List[Optional[Dict[str, Dict[str, Any]]]] = [None] * len(items)
+        errors: List[Optional[str]] = [None] * len(items)
+
+        async def map_item(idx: int, item: Any) -> None:
+            async with semaphore:
+                try:
+                    outputs = await self.run_item(
+                        {**mapped_input, self.config.list_field: item}
+                    )
+                    if output_node_id not in outputs:
+                        raise ValueError(
+                            f"Subworkflow did not produce an output for element {idx}"
+                        )
+                    item_outputs[idx] = outputs
+                except Exception as e:
+                    if self.config.fail_fast:
+                        raise
+                    errors[idx] = f"{type(e).__name__}: {e}"
+                    print(
+                        f"[WARNING]: Map node {self.name} failed on element {idx}:\n{traceback.format_exc(limit=5)}"
+                    )
+
+        tasks = [
+            asyncio.create_task(map_item(idx, item)) for idx, item in enumerate(items)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # An element failed with fail_fast or the node was cancelled, stop the rest
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        # Collect the outputs of each subworkflow node, one entry per element
+        self.subworkflow_output = {
+            node.id: [
+                outputs.get(node.id) if outputs is not None else None
+                for outputs in item_outputs
+            ]
+            for node in self.subworkflow.nodes
+        }
+
+        return self.output_model.model_validate(
+            {
+                "results": self.subworkflow_output[output_node_id],
+                "errors": errors,
+            }
+        )
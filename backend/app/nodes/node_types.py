@@ -57,6 +57,11 @@ SUPPORTED_NODE_TYPES = {
             "module": ".nodes.loops.for_loop_node",
             "class_name": "ForLoopNode",
         },
+        {
+            "node_type_name": "MapNode",
+            "module": ".nodes.loops.map_node",
+            "class_name": "MapNode",
+        },
         {
             "node_type_name": "RetrieverNode",
             "module": ".nodes.llm.retriever",
@@ -1,13 +1,26 @@
-from typing import Dict, Any
+from enum import Enum
+from typing import Any, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from ...execution.batch_collector import get_current_batch_collector
 from ..base import (
     BaseNode,
     BaseNodeConfig,
     BaseNodeInput,
     BaseNodeOutput,
 )
+from .sandbox import call_user_function, process_sandbox
+
+
+class PythonExecutionMode(str, Enum):
+    PROCESS = "process"
+    INLINE = "inline"
+
+
+class BatchInputFormat(str, Enum):
+    LIST = "list"
+    DATAFRAME = "dataframe"
 
 
 class PythonFuncNodeConfig(BaseNodeConfig):
@@ -18,6 +31,23 @@ class PythonFuncNodeConfig(BaseNodeConfig):
             "# Return a dictionary of variables that you would like to see in the node output.",
         ]
     )
+    execution_mode: PythonExecutionMode = Field(
+        PythonExecutionMode.PROCESS,
+        description="'process' runs the code in a sandboxed worker process with time and memory limits. 'inline' runs it in the server process, for trivial snippets.",
+    )
+    timeout: float = Field(
+        default=30.0,
+        gt=0,
+        description="Maximum run time of the code in seconds, in process mode",
+    )
+    batch_mode: bool = Field(
+        default=False,
+        description="The code is the body of user_function_batch(inputs) and returns one output dict per input, as a list or a DataFrame. In batch runs it is called once with the inputs of many rows.",
+    )
+    batch_input_format: BatchInputFormat = Field(
+        BatchInputFormat.LIST,
+        description="In batch mode, pass the inputs as a list of input models or as a pandas DataFrame with <node>.<field> columns",
+    )
 
 
 class PythonFuncNodeInput(BaseNodeInput):
@@ -45,23 +75,39 @@ class PythonFuncNode(BaseNode):
     async def run(self, input: BaseModel) -> BaseModel:
 
         self.output_model = self.create_output_model_class(self.config.output_schema)
-        # Prepare the execution environment
-        exec_globals: Dict[str, Any] = {}
-        exec_locals: Dict[str, Any] = {}
-
-        # Indent user code properly
-        code_body = "\n".join("    " + line for line in self.config.code.split("\n"))
-
-        # Build the code to execute
-        function_code = f"def user_function(input_model):\n{code_body}\n"
-
-        # Execute the user-defined function code
-        exec(function_code, exec_globals, exec_locals)
 
         # Call the user-defined function and retrieve the output
-        output_data = exec_locals["user_function"](input)
+        if not self.config.batch_mode:
+            if self.config.execution_mode == PythonExecutionMode.INLINE:
+                output_data = call_user_function(self.config.code, input, None)
+            else:
+                output_data = await process_sandbox.run(
+                    self.config.code, input, self.config.timeout
+                )
+        else:
+            # In batch runs, concurrent rows calling the same code share one call
+            collector = get_current_batch_collector()
+            if collector is None:
+                output_data = (await self.run_batch([input]))[0]
+            else:
+                batch_key = (
+                    self.config.code,
+                    self.config.batch_input_format,
+                    self.config.execution_mode,
+                    self.config.timeout,
+                )
+                output_data = await collector.submit(batch_key, self.run_batch, input)
         return self.output_model.model_validate(output_data)
 
+    async def run_batch(self, inputs: List[BaseModel]) -> List[Any]:
+        """Call user_function_batch once on the inputs of several rows"""
+        batch_format = self.config.batch_input_format.value
+        if self.config.execution_mode == PythonExecutionMode.INLINE:
+            return call_user_function(self.config.code, inputs, batch_format)
+        return await process_sandbox.run(
+            self.config.code, inputs, self.config.timeout, batch_format
+        )
+
 
 if __name__ == "__main__":
     from pydantic import BaseModel, create_model
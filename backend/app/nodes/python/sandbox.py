@@ -0,0 +1,321 @@
+"""
+Execution backends for the code of Python function nodes.
+
+The code is compiled once per process and kept by its source, so repeated
+calls only pay for the function call. In process mode the function runs in a
+warm pool of spawned worker processes, with per call limits on wall-clock time,
+CPU time and memory, so that heavy code cannot block the event loop of the server.
+Inputs are pickled to the workers, pydantic models are sent as plain field values
+and rebuilt in the worker, so dynamically created model classes need not be importable.
+
+In batch mode the code is the body of user_function_batch(inputs), called once
+with the inputs of many rows, as a list of models or as a pandas DataFrame.
+"""
+
+import asyncio
+import builtins
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import traceback
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, create_model
+
+try:
+    import resource
+except ImportError:  # not available on Windows, limits are then not enforced
+    resource = None  # type: ignore
+
+PYTHON_FUNC_POOL_SIZE = int(
+    os.getenv("PYTHON_FUNC_POOL_SIZE", str(os.cpu_count() or 1))
+)
+PYTHON_FUNC_MAX_MEMORY_MB = int(os.getenv("PYTHON_FUNC_MAX_MEMORY_MB", "2048"))
+
+# Workers are replaced after this many calls, to release what user code leaves behind
+MAX_CALLS_PER_WORKER = 1000
+# Time given to a worker to report its own timeout before the pool is restarted
+TIMEOUT_GRACE_SECONDS = 5.0
+
+
+@lru_cache(maxsize=256)
+def compile_user_function(code: str, batch: bool = False) -> Callable[[Any], Any]:
+    """
+    Compile the body of a Python function node into user_function(input_model),
+    or into user_function_batch(inputs) in batch mode
+    """
+    name, argument = (
+        ("user_function_batch", "inputs") if batch else ("user_function", "input_model")
+    )
+    # Indent user code properly
+    code_body = "\n".join("    " + line for line in code.split("\n"))
+    function_code = f"def {name}({argument}):\n{code_body}\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(function_code, "<python_func_node>", "exec"), namespace)
+    return namespace[name]
+
+
+def call_user_function(code: str, input: Any, batch_format: Optional[str]) -> Any:
+    """
+    Call the user function on one input model, or on a list of input models
+    when batch_format is set ("list" or "dataframe"). In batch mode the
+    function returns a list or a DataFrame, which is split into one output per input.
+    """
+    if batch_format is None:
+        output = compile_user_function(code)(input)
+        return output.model_dump() if isinstance(output, BaseModel) else output
+
+    inputs = _to_dataframe(input) if batch_format == "dataframe" else input
+    outputs = compile_user_function(code, batch=True)(inputs)
+    if hasattr(outputs, "to_dict"):
+        # DataFrame, convert numpy scalars back to python values
+        outputs = [
+            {
+                key: value.item() if hasattr(value, "item") else value
+                for key, value in row.items()
+            }
+            for row in outputs.to_dict("records")
+        ]
+    outputs = list(outputs)
+    if len(outputs) != len(input):
+        raise ValueError(
+            f"user_function_batch returned {len(outputs)} outputs for {len(input)} inputs"
+        )
+    return [
+        output.model_dump() if isinstance(output, BaseModel) else output
+        for output in outputs
+    ]
+
+
+def _to_dataframe(inputs: List[Any]) -> Any:
+    """Stack input models into a DataFrame, with columns named <node>.<field>"""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas is required for the dataframe batch input format")
+    return pd.json_normalize(
+        [
+            input.model_dump() if isinstance(input, BaseModel) else input
+            for input in inputs
+        ]
+    )
+
+
+class _ModelValue:
+    """Picklable stand-in for a pydantic model instance"""
+
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+
+    def __getstate__(self) -> Tuple[str, Dict[str, Any]]:
+        return self.name, self.fields
+
+    def __setstate__(self, state: Tuple[str, Dict[str, Any]]) -> None:
+        self.name, self.fields = state
+
+
+def dump_input(value: Any) -> Any:
+    """Convert pydantic models (at any depth) into picklable values"""
+    if isinstance(value, BaseModel):
+        return _ModelValue(
+            type(value).__name__,
+            {
+                name: dump_input(getattr(value, name))
+                for name in type(value).model_fields
+            },
+        )
+    if isinstance(value, Mapping):
+        return {key: dump_input(item) for key, item in value.items()}  # type: ignore
+    if isinstance(value, list):
+        return [dump_input(item) for item in value]  # type: ignore
+    return value
+
+
+@lru_cache(maxsize=1024)
+def _get_model_class(name: str, field_names: Tuple[str, ...]) -> type[BaseModel]:
+    return create_model(name, **{field: (Any, ...) for field in field_names})  # type: ignore
+
+
+def load_input(value: Any) -> Any:
+    """Rebuild the values converted by dump_input"""
+    if isinstance(value, _ModelValue):
+        model_class = _get_model_class(value.name, tuple(value.fields))
+        return model_class.model_construct(
+            **{name: load_input(item) for name, item in value.fields.items()}
+        )
+    if isinstance(value, dict):
+        return {key: load_input(item) for key, item in value.items()}  # type: ignore
+    if isinstance(value, list):
+        return [load_input(item) for item in value]  # type: ignore
+    return value
+
+
+def _raise_timeout(signum: int, frame: Any) -> None:
+    if signum == signal.SIGALRM:
+        raise TimeoutError("Python function exceeded its time limit")
+    raise TimeoutError("Python function exceeded its CPU time limit")
+
+
+@contextmanager
+def _limits(timeout: float, memory_limit_bytes: int) -> Iterator[None]:
+    """Apply wall-clock, CPU time and memory limits to the enclosed block"""
+    if resource is None:
+        yield
+        return
+
+    previous_cpu = resource.getrlimit(resource.RLIMIT_CPU)
+    previous_memory = resource.getrlimit(resource.RLIMIT_DATA)
+    used_cpu = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_limit = math.ceil(used_cpu.ru_utime + used_cpu.ru_stime + timeout)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, previous_cpu[1]))
+    resource.setrlimit(resource.RLIMIT_DATA, (memory_limit_bytes, previous_memory[1]))
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.signal(signal.SIGXCPU, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        resource.setrlimit(resource.RLIMIT_CPU, previous_cpu)
+        resource.setrlimit(resource.RLIMIT_DATA, previous_memory)
+
+
+def _run_in_worker(
+    code: str,
+    input_value: Any,
+    timeout: float,
+    memory_limit_bytes: int,
+    batch_format: Optional[str],
+) -> Tuple[str, Any]:
+    """
+    Entry point of the worker processes. Errors are returned as text, exceptions
+    of user defined classes could not be unpickled by the server.
+    """
+    try:
+        input_model = load_input(input_value)
+        with _limits(timeout, memory_limit_bytes):
+            output = call_user_function(code, input_model, batch_format)
+        return "ok", output
+    except BaseException as e:
+        return "error", (type(e).__name__, str(e), traceback.format_exc(limit=5))
+
+
+def _raise_worker_error(error: Tuple[str, str, str]) -> None:
+    error_type_name, message, formatted_traceback = error
+    error_type = getattr(builtins, error_type_name, None)
+    if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+        error_type = RuntimeError
+        message = f"{error_type_name}: {message}"
+    raise error_type(f"{message}\n\nWorker traceback:\n{formatted_traceback}")
+
+
+class ProcessSandbox:
+    """
+    Warm pool of worker processes running the code of Python function nodes.
+    The pool is started on first use, and restarted when a worker does not
+    return after its time limit (e.g. stuck in a C extension).
+    """
+
+    def __init__(self, max_workers: int, memory_limit_mb: int):
+        self.max_workers = max_workers
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self._pool: Optional[Any] = None
+        self._pending: Dict["asyncio.Future[Tuple[str, Any]]", Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> Any:
+        with self._lock:
+            if self._pool is None:
+                # spawn, as forking a server process with running threads is unsafe
+                context = multiprocessing.get_context("spawn")
+                self._pool = context.Pool(
+                    processes=self.max_workers, maxtasksperchild=MAX_CALLS_PER_WORKER
+                )
+            return self._pool
+
+    def _restart(self, pool: Any) -> None:
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            pending = [
+                future
+                for future, future_pool in self._pending.items()
+                if future_pool is pool
+            ]
+        for future in pending:
+            future.get_loop().call_soon_threadsafe(
+                _set_future_exception,
+                future,
+                RuntimeError("Python function worker pool was restarted"),
+            )
+        # terminate joins the workers, do not block the event loop on it
+        threading.Thread(target=pool.terminate, daemon=True).start()
+
+    async def run(
+        self,
+        code: str,
+        input: BaseModel | List[BaseModel],
+        timeout: float,
+        batch_format: Optional[str] = None,
+    ) -> Any:
+        """
+        Run the user function in a worker. In batch mode input is a list of models
+        and the time limit applies to the whole batch.
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Tuple[str, Any]]" = loop.create_future()
+        pool = self._get_pool()
+        with self._lock:
+            self._pending[future] = pool
+        pool.apply_async(
+            _run_in_worker,
+            (
+                code,
+                dump_input(input),
+                timeout,
+                self.memory_limit_bytes,
+                batch_format,
+            ),
+            callback=lambda result: loop.call_soon_threadsafe(
+                _set_future_result, future, result
+            ),
+            error_callback=lambda e: loop.call_soon_threadsafe(
+                _set_future_exception, future, e
+            ),
+        )
+        try:
+            status, value = await asyncio.wait_for(
+                future, timeout + TIMEOUT_GRACE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            self._restart(pool)
+            raise TimeoutError("Python function exceeded its time limit")
+        finally:
+            with self._lock:
+                self._pending.pop(future, None)
+
+        if status == "error":
+            _raise_worker_error(value)
+        return value
+
+
+def _set_future_result(future: "asyncio.Future[Any]", result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future: "asyncio.Future[Any]", e: BaseException) -> None:
+    if not future.done():
+        future.set_exception(e)
+
+
+process_sandbox = ProcessSandbox(PYTHON_FUNC_POOL_SIZE, PYTHON_FUNC_MAX_MEMORY_MB)
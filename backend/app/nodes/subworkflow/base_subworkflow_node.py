@@ -6,6 +6,7 @@ from jinja2 import Template
 from ...schemas.workflow_schemas import WorkflowNodeSchema
 from ..base import BaseNode, BaseNodeConfig
 from ...execution.workflow_executor import WorkflowExecutor
+from ...execution.workflow_plan import get_workflow_plan
 from ...utils.pydantic_utils import get_nested_field
 
 
@@ -26,23 +27,13 @@ class BaseSubworkflowNode(BaseNode, ABC):
 
     def setup_subworkflow(self) -> None:
         assert self.subworkflow is not None
-        self._node_dict: Dict[str, WorkflowNodeSchema] = {
-            node.id: node for node in self.subworkflow.nodes
-        }
-        self._dependencies: Dict[str, Set[str]] = self._build_dependencies()
+        # The plan is compiled once per subworkflow definition and shared across invocations
+        plan = get_workflow_plan(self.subworkflow)
+        self._node_dict: Dict[str, WorkflowNodeSchema] = plan.node_dict
+        self._dependencies: Dict[str, Set[str]] = plan.dependencies
 
-        self._subworkflow_output_node = next(
-            (node for node in self.subworkflow.nodes if node.node_type == "OutputNode")
-        )
-
-    def _build_dependencies(self) -> Dict[str, Set[str]]:
-        assert self.subworkflow is not None
-        dependencies: Dict[str, Set[str]] = {
-            node.id: set() for node in self.subworkflow.nodes
-        }
-        for link in self.subworkflow.links:
-            dependencies[link.target_id].add(link.source_id)
-        return dependencies
+        assert plan.output_node is not None, "Subworkflow must have an output node"
+        self._subworkflow_output_node = plan.output_node
 
     def _map_input(self, input: BaseModel) -> Dict[str, Any]:
         if self.config.input_map == {} or self.config.input_map is None:
@@ -58,8 +49,11 @@ class BaseSubworkflowNode(BaseNode, ABC):
     ) -> BaseSubworkflowNodeConfig:
         """Apply templates to all config fields ending with _message"""
         updates: Dict[str, str] = {}
-        for field_name, value in model.model_dump().items():
-            if isinstance(value, str) and field_name.endswith("_message"):
+        for field_name in type(model).model_fields:
+            if not field_name.endswith("_message"):
+                continue
+            value = getattr(model, field_name)
+            if isinstance(value, str):
                 template = Template(value)
                 updates[field_name] = template.render(**input_data)
         if updates:
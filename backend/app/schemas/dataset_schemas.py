@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -10,6 +10,9 @@ class DatasetResponseSchema(BaseModel):
     filename: str
     created_at: datetime
     updated_at: datetime
+    file_size: Optional[int] = None
+    row_count: Optional[int] = None
+    column_types: Optional[Dict[str, str]] = None
 
 
 class DatasetListResponseSchema(BaseModel):
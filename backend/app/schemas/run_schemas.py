@@ -1,16 +1,23 @@
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, Field, computed_field
 from datetime import datetime
 
 from .workflow_schemas import WorkflowVersionResponseSchema
 from ..models.run_model import RunStatus
 from .task_schemas import TaskResponseSchema, TaskStatus
+from .usage_schemas import LLMUsageSchema
 
 
 class StartRunRequestSchema(BaseModel):
     initial_inputs: Optional[Dict[str, Dict[str, Any]]] = None
     parent_run_id: Optional[str] = None
     files: Optional[Dict[str, List[str]]] = None  # Maps node_id to list of file paths
+    timeout: Optional[float] = Field(
+        default=None, gt=0, description="Time limit of the run in seconds"
+    )
+    node_timeout: Optional[float] = Field(
+        default=None, gt=0, description="Time limit of each node in seconds"
+    )
 
 
 class RunResponseSchema(BaseModel):
@@ -27,9 +34,16 @@ class RunResponseSchema(BaseModel):
     start_time: Optional[datetime]
     end_time: Optional[datetime]
     tasks: List[TaskResponseSchema]
+    llm_usage: Optional[LLMUsageSchema] = None
+    total_rows: Optional[int] = None
+    completed_rows: int = 0
+    failed_rows: int = 0
 
     @computed_field(return_type=float)
     def percentage_complete(self):
+        if self.total_rows:
+            # Batch runs, the tasks of their rows belong to their subruns
+            return (self.completed_rows + self.failed_rows) / self.total_rows * 100
         if not self.tasks:
             return 0
         completed_tasks = sum(
@@ -50,4 +64,56 @@ class PartialRunRequestSchema(BaseModel):
 
 class BatchRunRequestSchema(BaseModel):
     dataset_id: str
-    mini_batch_size: int = 10
+    mini_batch_size: int = Field(
+        default=10, ge=1, description="Number of rows executed concurrently"
+    )
+    shard_rows: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Rows of each shard, the shards run as separate jobs on any worker",
+    )
+
+
+class BatchResultResponseSchema(BaseModel):
+    run_id: str
+    row_index: int
+    child_run_id: Optional[str]
+    status: RunStatus
+    error: Optional[str]
+    latency: float
+    prompt_tokens: int
+    completion_tokens: int
+    outputs: Optional[Dict[str, Any]]
+
+    class Config:
+        from_attributes = True
+
+
+class BatchOutputFieldSummarySchema(BaseModel):
+    """Aggregates of a numeric field of the output node over the rows where it is set"""
+
+    field: str
+    count: int
+    mean: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+
+
+class BatchResultsSummarySchema(BaseModel):
+    run_id: str
+    total_rows: int
+    status_counts: Dict[str, int]
+    mean_latency: Optional[float]
+    max_latency: Optional[float]
+    prompt_tokens: int
+    completion_tokens: int
+    output_fields: List[BatchOutputFieldSummarySchema]
+
+
+class BatchProgressResponseSchema(BaseModel):
+    run_id: str
+    status: RunStatus
+    total_rows: Optional[int]
+    completed_rows: int
+    failed_rows: int
+    percentage_complete: float
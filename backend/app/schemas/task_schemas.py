@@ -2,6 +2,7 @@ from typing import Dict, Optional, Any
 from pydantic import BaseModel
 from datetime import datetime
 from ..models.task_model import TaskStatus
+from .usage_schemas import LLMUsageSchema
 from .workflow_schemas import WorkflowDefinitionSchema
 
 
@@ -18,6 +19,7 @@ class TaskResponseSchema(BaseModel):
     end_time: Optional[datetime]
     subworkflow: Optional[WorkflowDefinitionSchema]
     subworkflow_output: Optional[Dict[str, Any]]
+    llm_usage: Optional[LLMUsageSchema] = None
 
     class Config:
         from_attributes = True  # Enable ORM mode
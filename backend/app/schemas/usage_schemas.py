@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+
+class LLMCallUsageSchema(BaseModel):
+    """
+    Token usage and timing of a single LLM call.
+    latency is the provider round-trip time of the successful attempt in seconds.
+    """
+
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    latency: float = 0.0
+    retries: int = 0
+
+
+class LLMUsageSchema(BaseModel):
+    """
+    Aggregated LLM usage of a task or a run.
+    models maps each model name to the number of calls made to it.
+    """
+
+    num_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+    latency: float = 0.0
+    retries: int = 0
+    models: Dict[str, int] = {}
+
+    def add(self, call: LLMCallUsageSchema) -> None:
+        self.num_calls += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.cached_tokens += call.cached_tokens
+        self.total_tokens += call.prompt_tokens + call.completion_tokens
+        self.latency += call.latency
+        self.retries += call.retries
+        self.models[call.model] = self.models.get(call.model, 0) + 1
+
+    def merge(self, other: "LLMUsageSchema") -> None:
+        self.num_calls += other.num_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.total_tokens += other.total_tokens
+        self.latency += other.latency
+        self.retries += other.retries
+        for model, count in other.models.items():
+            self.models[model] = self.models.get(model, 0) + count
+
+
+class TaskUsageResponseSchema(BaseModel):
+    task_id: str
+    node_id: str
+    llm_usage: Optional[LLMUsageSchema]
+
+
+class RunUsageResponseSchema(BaseModel):
+    run_id: str
+    llm_usage: Optional[LLMUsageSchema]
+    tasks: List[TaskUsageResponseSchema]
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, PrivateAttr, field_validator, model_validator
 
 
 class WorkflowNodeCoordinatesSchema(BaseModel):
@@ -88,6 +88,18 @@ class WorkflowDefinitionSchema(BaseModel):
     nodes: List[WorkflowNodeSchema]
     links: List[WorkflowLinkSchema]
     test_inputs: List[Dict[str, Any]] = []
+    # Compiled execution plan, see app.execution.workflow_plan.get_workflow_plan
+    _plan: Any = PrivateAttr(default=None)
+
+    def __eq__(self, other: object) -> bool:
+        # The compiled plan is a cache, it must not take part in comparisons
+        if not isinstance(other, WorkflowDefinitionSchema):
+            return NotImplemented
+        return (
+            self.nodes == other.nodes
+            and self.links == other.links
+            and self.test_inputs == other.test_inputs
+        )
 
     @field_validator("nodes")
     def nodes_must_have_unique_ids(cls, v: List[WorkflowNodeSchema]):
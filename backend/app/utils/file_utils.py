@@ -1,19 +1,42 @@
 import base64
+import hashlib
 import mimetypes
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+# Raw bytes read per chunk when streaming files, must be a multiple of 3 so
+# that the base64 encoding of consecutive chunks can be concatenated
+ENCODING_CHUNK_SIZE = 3 * 256 * 1024
+
+# Upper bound for the total size of the cached data URLs
+DATA_URL_CACHE_MAX_BYTES = int(
+    os.getenv("DATA_URL_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+)
 
 
 def encode_file_to_base64_data_url(file_path: str) -> str:
     """
     Read a file and encode it as a base64 data URL with the appropriate MIME type.
+    The file is encoded in chunks, so the raw content is never held in memory as a whole.
     """
     path = Path(file_path)
     mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
 
+    parts = [f"data:{mime_type};base64,"]
     with open(path, "rb") as f:
-        file_content = f.read()
-        base64_data = base64.b64encode(file_content).decode("utf-8")
-        return f"data:{mime_type};base64,{base64_data}"
+        while chunk := f.read(ENCODING_CHUNK_SIZE):
+            parts.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+def encode_text_to_base64_data_url(text: str, mime_type: str) -> str:
+    """
+    Encode a string as a base64 data URL with the given MIME type.
+    """
+    return f"data:{mime_type};base64,{base64.b64encode(text.encode()).decode()}"
 
 
 def get_file_mime_type(file_path: str) -> str:
@@ -36,3 +59,108 @@ def get_file_mime_type(file_path: str) -> str:
         }
         mime_type = mime_map.get(ext, "application/octet-stream")
     return mime_type
+
+
+# Content hash, encoder name and MIME type of the file
+DataURLKey = Tuple[str, str, Optional[str]]
+
+
+class DataURLCache:
+    """
+    Size-bounded LRU cache of encoded data URLs keyed by file content hash, and
+    by the MIME type guessed from the file name, which encoders embed in the URL.
+
+    File hashes are memoized by (path, size, mtime), so a cache hit does not
+    need to read the file again. The cache is thread-safe so that encoding
+    can run in worker threads, and concurrent misses for the same key wait
+    for the first encoder instead of encoding the file twice.
+    """
+
+    def __init__(self, max_bytes: int, max_hash_entries: int = 4096):
+        self.max_bytes = max_bytes
+        self.max_hash_entries = max_hash_entries
+        self._entries: OrderedDict[DataURLKey, str] = OrderedDict()
+        self._hashes: OrderedDict[Tuple[str, int, int], str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[DataURLKey, threading.Lock] = {}
+
+    def get_content_hash(self, file_path: str) -> str:
+        stat = os.stat(file_path)
+        stat_key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            content_hash = self._hashes.get(stat_key)
+            if content_hash is not None:
+                self._hashes.move_to_end(stat_key)
+                return content_hash
+
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(ENCODING_CHUNK_SIZE):
+                sha.update(chunk)
+        content_hash = sha.hexdigest()
+
+        with self._lock:
+            self._hashes[stat_key] = content_hash
+            while len(self._hashes) > self.max_hash_entries:
+                self._hashes.popitem(last=False)
+        return content_hash
+
+    def get_or_encode(
+        self,
+        file_path: str,
+        encoder: Callable[[str], str] = encode_file_to_base64_data_url,
+    ) -> str:
+        """
+        Return the data URL produced by `encoder` for the file, encoding it only
+        if the same content has not been encoded by the same encoder, from a file
+        of the same MIME type, before.
+        """
+        key = (
+            self.get_content_hash(file_path),
+            encoder.__name__,
+            mimetypes.guess_type(file_path)[0],
+        )
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            cached = self._get(key)
+            if cached is not None:
+                return cached
+            data_url = encoder(file_path)
+            self._put(key, data_url)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return data_url
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hashes.clear()
+            self._size = 0
+
+    def _get(self, key: DataURLKey) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _put(self, key: DataURLKey, value: str) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+data_url_cache = DataURLCache(DATA_URL_CACHE_MAX_BYTES)
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from app.jobs.queue import InMemoryJobQueue
+from app.jobs.worker import JobWorker
+from app.models.job_model import JobStatus
+
+
+async def run_until(worker: JobWorker, condition, timeout: float = 5.0) -> None:
+    """Run the worker until the condition holds, then stop it"""
+    worker_task = asyncio.create_task(worker.run())
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await worker_task
+    assert condition()
+
+
+def make_worker(queue: InMemoryJobQueue, handlers, **kwargs) -> JobWorker:
+    return JobWorker(queue, handlers, poll_interval=0.01, worker_id="w1", **kwargs)
+
+
+def test_claimed_job_is_completed():
+    queue = InMemoryJobQueue()
+    payloads = []
+
+    async def handler(**payload):
+        payloads.append(payload)
+
+    job_id = queue.enqueue("echo", {"x": 1}, resource_id="r1")
+    worker = make_worker(queue, {"echo": handler})
+    asyncio.run(
+        run_until(worker, lambda: queue.jobs[job_id]["status"] == JobStatus.COMPLETED)
+    )
+    assert payloads == [{"x": 1}]
+    assert queue.jobs[job_id]["attempts"] == 1
+    assert queue.jobs[job_id]["worker_id"] == "w1"
+
+
+def test_failing_handler_fails_job():
+    queue = InMemoryJobQueue()
+
+    async def handler():
+        raise RuntimeError("boom")
+
+    job_id = queue.enqueue("broken", {})
+    worker = make_worker(queue, {"broken": handler})
+    asyncio.run(
+        run_until(worker, lambda: queue.jobs[job_id]["status"] == JobStatus.FAILED)
+    )
+    assert "RuntimeError: boom" in queue.jobs[job_id]["error"]
+    assert queue.is_active("broken") is False
+
+
+def test_lost_lease_cancels_job():
+    queue = InMemoryJobQueue()
+    events = []
+
+    async def handler():
+        events.append("started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("canceled")
+            raise
+
+    job_id = queue.enqueue("slow", {})
+
+    async def scenario():
+        worker = make_worker(queue, {"slow": handler}, lease_seconds=0.3)
+        worker_task = asyncio.create_task(worker.run())
+        while "started" not in events:
+            await asyncio.sleep(0.01)
+        # Another worker claimed the job after this one stalled
+        queue.jobs[job_id]["worker_id"] = "w2"
+        while "canceled" not in events:
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await asyncio.wait_for(worker_task, 5)
+
+    asyncio.run(scenario())
+    assert events == ["started", "canceled"]
+    assert queue.jobs[job_id]["status"] == JobStatus.RUNNING
+    assert queue.jobs[job_id]["worker_id"] == "w2"
+
+
+def test_cancel_resource_jobs():
+    queue = InMemoryJobQueue()
+    events = []
+
+    async def handler(name: str):
+        events.append(f"{name} started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append(f"{name} canceled")
+            raise
+
+    running_id = queue.enqueue("slow", {"name": "running"}, resource_id="r1")
+
+    async def scenario():
+        worker = make_worker(queue, {"slow": handler}, lease_seconds=0.3)
+        worker_task = asyncio.create_task(worker.run())
+        while "running started" not in events:
+            await asyncio.sleep(0.01)
+        worker.stop()
+        queued_id = queue.enqueue("slow", {"name": "queued"}, resource_id="r1")
+        other_id = queue.enqueue("slow", {"name": "other"}, resource_id="r2")
+        assert queue.cancel("r1") == 2
+        assert queue.is_active("r1") is False
+        assert queue.is_active("r2") is True
+        # The running job is canceled when its lease is renewed
+        while "running canceled" not in events:
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(worker_task, 5)
+        return queued_id, other_id
+
+    queued_id, other_id = asyncio.run(scenario())
+    assert events == ["running started", "running canceled"]
+    assert queue.jobs[running_id]["status"] == JobStatus.CANCELED
+    assert queue.jobs[queued_id]["status"] == JobStatus.CANCELED
+    assert queue.jobs[other_id]["status"] == JobStatus.QUEUED
+
+
+def test_job_blocking_event_loop_keeps_lease():
+    queue = InMemoryJobQueue()
+    lease_held = []
+
+    async def handler():
+        # Blocks the event loop for longer than the lease
+        time.sleep(0.8)
+        job = queue.jobs[job_id]
+        lease_held.append(job["lease_expires_at"] > datetime.now(timezone.utc))
+
+    job_id = queue.enqueue("blocking", {})
+    worker = make_worker(queue, {"blocking": handler}, lease_seconds=0.3)
+    asyncio.run(
+        run_until(worker, lambda: queue.jobs[job_id]["status"] == JobStatus.COMPLETED)
+    )
+    assert lease_held == [True]
+    assert queue.jobs[job_id]["attempts"] == 1
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from pydantic import create_model
+
+from app.nodes.loops.base_loop_subworkflow_node import LoopHistory
+from app.nodes.loops.for_loop_node import (
+    ForLoopNode,
+    ForLoopNodeConfig,
+    ForLoopNodeInput,
+)
+from app.schemas.workflow_schemas import WorkflowDefinitionSchema
+
+
+def test_loop_history_dumps_to_dict():
+    outputs = {"increment": [{"count": 1}, {"count": 2}]}
+    history = LoopHistory(outputs, window=1)
+    model = create_model("IterationInput", loop_history=(LoopHistory, ...))
+    dumped = model(loop_history=history).model_dump()
+    assert dumped["loop_history"] == {"increment": [{"count": 2}]}
+    assert type(dumped["loop_history"]) is dict
+    json.dumps(dumped)
+
+
+def test_loop_with_node_json_dumping_its_input():
+    subworkflow = WorkflowDefinitionSchema.model_validate(
+        {
+            "nodes": [
+                {
+                    "id": "loop_input",
+                    "title": "loop_input",
+                    "node_type": "InputNode",
+                    "config": {
+                        "output_schema": {"count": "int", "loop_history": "dict"},
+                        "enforce_schema": False,
+                    },
+                },
+                {
+                    "id": "increment",
+                    "title": "increment",
+                    "node_type": "PythonFuncNode",
+                    "config": {
+                        "code": (
+                            "import json\n"
+                            "dumped = json.dumps(input_model.model_dump())\n"
+                            "dumped = json.loads(dumped)\n"
+                            "history = dumped['loop_input']['loop_history']\n"
+                            "return {'count': input_model.loop_input.count + 1,"
+                            " 'seen': len(history.get('increment', []))}"
+                        ),
+                        "output_schema": {"count": "int", "seen": "int"},
+                        "execution_mode": "inline",
+                    },
+                },
+                {
+                    "id": "loop_output",
+                    "title": "loop_output",
+                    "node_type": "OutputNode",
+                    "config": {
+                        "output_map": {
+                            "count": "increment.count",
+                            "seen": "increment.seen",
+                        },
+                        "output_schema": {"count": "int", "seen": "int"},
+                    },
+                },
+            ],
+            "links": [
+                {"source_id": "loop_input", "target_id": "increment"},
+                {"source_id": "increment", "target_id": "loop_output"},
+            ],
+        }
+    )
+    node = ForLoopNode(
+        name="loop",
+        config=ForLoopNodeConfig(subworkflow=subworkflow, num_iterations=3),
+    )
+
+    class LoopInput(ForLoopNodeInput):
+        count: int = 0
+
+    output = asyncio.run(node(LoopInput()))
+    assert output.count == 3  # type: ignore
+    assert output.seen == 2  # type: ignore
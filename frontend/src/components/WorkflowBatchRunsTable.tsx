@@ -23,6 +23,7 @@ interface WorkflowRun {
     input_dataset_id: string | null
     status: 'COMPLETED' | 'FAILED' | 'IN_PROGRESS'
     output_file_id: string
+    percentage_complete?: number
 }
 
 interface FormattedRun {
@@ -51,7 +52,7 @@ const WorkflowBatchRunsTable: React.FC = () => {
                     id: run.id,
                     workflow_name: run.workflow.name,
                     dataset: run.input_dataset_id || 'N/A',
-                    progress: run.status === 'COMPLETED' ? 100 : run.status === 'FAILED' ? 0 : 50,
+                    progress: run.status === 'COMPLETED' ? 100 : Math.floor(run.percentage_complete ?? 0),
                     output_file_id: run.output_file_id,
                 }))
                 setWorkflowBatchRuns(formattedRuns)
@@ -10,7 +10,7 @@ import { AppDispatch } from '@/store/store'
 import { createNode } from '@/utils/nodeFactory'
 import { MouseEvent as ReactMouseEvent } from 'react'
 
-export const GROUP_NODE_TYPES = ['ForLoopNode']
+export const GROUP_NODE_TYPES = ['ForLoopNode', 'MapNode']
 
 // we have to make sure that parent nodes are rendered before their children
 export const sortNodes = (a: Node, b: Node): number => {
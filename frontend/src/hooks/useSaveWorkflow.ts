@@ -5,6 +5,7 @@ import { RootState } from '../store/store'
 import { debounce } from 'lodash'
 import { WorkflowCreateRequest, WorkflowNode } from '@/types/api_types/workflowSchemas'
 import { FlowWorkflowEdge as Edge } from '@/types/api_types/nodeTypeSchemas'
+import { GROUP_NODE_TYPES } from '@/components/nodes/loops/groupNodeUtils'
 
 export const useSaveWorkflow = () => {
     const nodes = useSelector((state: RootState) => state.flow.nodes)
@@ -70,7 +71,7 @@ export const useSaveWorkflow = () => {
                             config,
                             title,
                             parent_id: node.parentId || null,
-                            dimensions: node.type === 'ForLoopNode' ? node.measured : undefined,
+                            dimensions: GROUP_NODE_TYPES.includes(node.type) ? node.measured : undefined,
                         }
                     })
 
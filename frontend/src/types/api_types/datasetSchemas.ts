@@ -5,6 +5,9 @@ export interface DatasetResponse {
     filename: string
     created_at: string
     updated_at: string
+    file_size?: number
+    row_count?: number
+    column_types?: Record<string, string>
 }
 
 export interface DatasetListResponse {
@@ -1,11 +1,13 @@
 import { WorkflowVersionResponse } from './workflowSchemas'
-import { TaskResponse } from './taskSchemas'
+import { LLMUsage, TaskResponse } from './taskSchemas'
 
-export type RunStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED' | 'CANCELLED'
+export type RunStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED' | 'CANCELED'
 
 export interface StartRunRequest {
     initial_inputs?: Record<string, Record<string, any>>
     parent_run_id?: string
+    timeout?: number
+    node_timeout?: number
 }
 
 export interface RunResponse {
@@ -22,9 +24,22 @@ export interface RunResponse {
     start_time?: string
     end_time?: string
     tasks: TaskResponse[]
+    llm_usage?: LLMUsage
+    total_rows?: number | null
+    completed_rows?: number
+    failed_rows?: number
     percentage_complete?: number
 }
 
+export interface BatchProgressResponse {
+    run_id: string
+    status: RunStatus
+    total_rows: number | null
+    completed_rows: number
+    failed_rows: number
+    percentage_complete: number
+}
+
 export interface PartialRunRequest {
     node_id: string
     rerun_predecessors: boolean
@@ -35,4 +50,5 @@ export interface PartialRunRequest {
 export interface BatchRunRequest {
     dataset_id: string
     mini_batch_size: number
+    shard_rows?: number
 }
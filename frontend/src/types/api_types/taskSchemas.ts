@@ -2,6 +2,17 @@ import { WorkflowDefinition } from './workflowSchemas'
 
 export type TaskStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED' | 'CANCELED'
 
+export interface LLMUsage {
+    num_calls: number
+    prompt_tokens: number
+    completion_tokens: number
+    cached_tokens: number
+    total_tokens: number
+    latency: number
+    retries: number
+    models: Record<string, number>
+}
+
 export interface TaskResponse {
     id: string
     run_id: string
@@ -15,4 +26,5 @@ export interface TaskResponse {
     end_time?: string
     subworkflow?: WorkflowDefinition
     subworkflow_output?: Record<string, any>
+    llm_usage?: LLMUsage
 }
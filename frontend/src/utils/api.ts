@@ -5,7 +5,7 @@ import { DatasetResponse, DatasetListResponse } from '@/types/api_types/datasetS
 import { EvalRunRequest, EvalRunResponse } from '@/types/api_types/evalSchemas'
 import { NodeTypeSchema, MinimumNodeConfigSchema } from '@/types/api_types/nodeTypeSchemas'
 import { OutputFileResponse } from '@/types/api_types/outputFileSchemas'
-import { RunResponse } from '@/types/api_types/runSchemas'
+import { BatchProgressResponse, RunResponse, RunStatus } from '@/types/api_types/runSchemas'
 import {
     DocumentChunkSchema,
     DocumentWithChunksSchema,
@@ -83,6 +83,78 @@ export const getRunStatus = async (runID: string): Promise<RunResponse> => {
     }
 }
 
+export const cancelRun = async (runID: string): Promise<RunResponse> => {
+    try {
+        const response = await axios.post(`${API_BASE_URL}/run/${runID}/cancel/`)
+        return response.data
+    } catch (error) {
+        console.error('Error canceling run:', error)
+        throw error
+    }
+}
+
+export const resumeRun = async (runID: string): Promise<RunResponse> => {
+    try {
+        const response = await axios.post(`${API_BASE_URL}/run/${runID}/resume/`)
+        return response.data
+    } catch (error) {
+        console.error('Error resuming run:', error)
+        throw error
+    }
+}
+
+export const getBatchProgress = async (runID: string): Promise<BatchProgressResponse> => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}/run/${runID}/progress/`)
+        return response.data
+    } catch (error) {
+        console.error('Error fetching batch progress:', error)
+        throw error
+    }
+}
+
+export const streamBatchProgress = (
+    runID: string,
+    onProgress: (progress: BatchProgressResponse) => void
+): EventSource => {
+    // The server closes the stream once the run has finished
+    const source = new EventSource(`${API_BASE_URL}/run/${runID}/progress/stream/`)
+    source.addEventListener('progress', (event) => {
+        const progress: BatchProgressResponse = JSON.parse((event as MessageEvent).data)
+        onProgress(progress)
+        if (progress.status !== 'PENDING' && progress.status !== 'RUNNING') {
+            source.close()
+        }
+    })
+    return source
+}
+
+export const getBatchResults = async (
+    runID: string,
+    page: number = 1,
+    pageSize: number = 100,
+    status: RunStatus | null = null
+): Promise<any> => {
+    try {
+        const params = { page, page_size: pageSize, ...(status ? { status } : {}) }
+        const response = await axios.get(`${API_BASE_URL}/run/${runID}/results/`, { params })
+        return response.data
+    } catch (error) {
+        console.error('Error fetching batch results:', error)
+        throw error
+    }
+}
+
+export const getBatchResultsSummary = async (runID: string): Promise<any> => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}/run/${runID}/results/summary/`)
+        return response.data
+    } catch (error) {
+        console.error('Error fetching batch results summary:', error)
+        throw error
+    }
+}
+
 export const getRun = async (runID) => {
     try {
         const response = await axios.get(`${API_BASE_URL}/run/${runID}/`)
@@ -166,12 +238,14 @@ export const startRun = async (
 export const startBatchRun = async (
     workflowID: string,
     datasetID: string,
-    miniBatchSize: number = 10
+    miniBatchSize: number = 10,
+    shardRows?: number
 ): Promise<any> => {
     try {
         const requestBody = {
             dataset_id: datasetID,
             mini_batch_size: miniBatchSize,
+            shard_rows: shardRows,
         }
         const response = await axios.post(`${API_BASE_URL}/wf/${workflowID}/start_batch_run/`, requestBody)
         return response.data
@@ -210,12 +284,19 @@ export const getWorkflowRuns = async (
     }
 }
 
-export const downloadOutputFile = async (outputFileID: string): Promise<void> => {
+export const downloadOutputFile = async (
+    outputFileID: string,
+    format: 'jsonl' | 'parquet' | null = null
+): Promise<void> => {
     try {
         const fileInfoResponse = await axios.get<OutputFileResponse>(`${API_BASE_URL}/of/${outputFileID}/`)
-        const fileName = fileInfoResponse.data.file_name
+        let fileName = fileInfoResponse.data.file_name
+        if (format) {
+            fileName = fileName.replace(/\.[^.]+$/, `.${format}`)
+        }
 
         const response = await axios.get(`${API_BASE_URL}/of/${outputFileID}/download/`, {
+            params: format ? { format } : {},
             responseType: 'blob',
         })
 
@@ -298,13 +379,18 @@ export const deleteApiKey = async (name: string): Promise<any> => {
     }
 }
 
-export const uploadDataset = async (name: string, description: string, file: File): Promise<DatasetResponse> => {
+export const uploadDataset = async (
+    name: string,
+    description: string,
+    file: File,
+    convertToParquet: boolean = false
+): Promise<DatasetResponse> => {
     try {
         const formData = new FormData()
         formData.append('file', file)
 
         const response = await axios.post(
-            `${API_BASE_URL}/ds/?name=${encodeURIComponent(name)}&description=${encodeURIComponent(description)}`,
+            `${API_BASE_URL}/ds/?name=${encodeURIComponent(name)}&description=${encodeURIComponent(description)}&convert_to_parquet=${convertToParquet}`,
             formData,
             {
                 headers: {
@@ -22,7 +22,7 @@ import DynamicNode from '../components/nodes/DynamicNode'
 import InputNode from '../components/nodes/InputNode'
 import { CoalesceNode } from '../components/nodes/logic/CoalesceNode'
 import { RouterNode } from '../components/nodes/logic/RouterNode'
-import { createDynamicGroupNodeWithChildren } from '../components/nodes/loops/groupNodeUtils'
+import { createDynamicGroupNodeWithChildren, GROUP_NODE_TYPES } from '../components/nodes/loops/groupNodeUtils'
 import {
     addNodeWithConfig,
     connect,
@@ -59,7 +59,7 @@ export const useNodeTypes = ({
                     types[node.name] = (props: any) => <RouterNode key={props.id} {...props} readOnly={readOnly} />
                 } else if (includeCoalesceNode && node.name === 'CoalesceNode') {
                     types[node.name] = CoalesceNode
-                } else if (node.name === 'ForLoopNode') {
+                } else if (GROUP_NODE_TYPES.includes(node.name)) {
                     types[node.name] = (props: any) => <DynamicGroupNode key={props.id} {...props} />
                 } else {
                     types[node.name] = (props: any) => (
@@ -118,7 +118,7 @@ export const createNodeAtCenter = (
     }
 
     // If this is a dynamic group node, handle it specially
-    if (nodeType === 'ForLoopNode') {
+    if (GROUP_NODE_TYPES.includes(nodeType)) {
         const created = createDynamicGroupNodeWithChildren(nodeTypes, nodeType, id, position, dispatch)
         if (created) return
     }
@@ -439,7 +439,7 @@ export const useAdjustGroupNodesZIndex = ({ nodes }: useAdjustGroupNodesZIndexOp
     return useMemo(() => {
         let groupNodeZIndex = -1
         const updatedNodes = nodes.map((node) => {
-            if (node.type === 'ForLoopNode') {
+            if (GROUP_NODE_TYPES.includes(node.type)) {
                 return {
                     ...node,
                     style: {
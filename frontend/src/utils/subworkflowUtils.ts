@@ -1,5 +1,6 @@
 import { WorkflowDefinition } from '@/types/api_types/workflowSchemas'
 import { TaskResponse } from '@/types/api_types/taskSchemas'
+import { GROUP_NODE_TYPES } from '@/components/nodes/loops/groupNodeUtils'
 
 interface RolloutWorkflowParams {
     workflowDefinition: WorkflowDefinition
@@ -25,7 +26,7 @@ export function rolloutWorkflowDefinition({ workflowDefinition, tasks }: Rollout
 
         // Find the node type
         const nodeType = rolledOutDefinition.nodes.find((node) => node.id === task.node_id).node_type
-        if (nodeType === 'ForLoopNode') {
+        if (GROUP_NODE_TYPES.includes(nodeType)) {
             // just pull the subworkflow outputs into the parent node
             if (task.subworkflow_output) {
                 outputs = { ...outputs, ...task.subworkflow_output }